@@ -1,7 +1,10 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import AuthenticationForm
+from django.core.urlresolvers import reverse
+from django.forms.formsets import BaseFormSet
 
+from stronger import choices
 from stronger.models import (
     BodyWeight,
     DailyNutrition,
@@ -69,15 +72,19 @@ class UserSettingsForm(forms.ModelForm):
 
 
 class FindUserForm(forms.ModelForm):
-    """Provides users a select list of registered users."""
+    """
+    Provides users a select list of registered users, or a typeahead once
+    there are too many users to list.
+    """
 
-    username = forms.ModelChoiceField(
-        queryset=User.objects.all().order_by('username'),
-        empty_label="Find a user",
-        widget=forms.Select(attrs={
-            'title': 'Find a user'
-            })
-    )
+    def __init__(self, *args, **kwargs):
+        super(FindUserForm, self).__init__(*args, **kwargs)
+        _search_field(self, 'username', choices.user_choices(),
+            'Find a user', 'ajax_find_users')
+
+    username = forms.ChoiceField(widget=forms.Select(attrs={
+        'title': 'Find a user'
+    }))
 
     class Meta:
         model = User
@@ -190,19 +197,36 @@ class EditWorkoutForm(forms.ModelForm):
 
 
 class SetForm(forms.ModelForm):
+    """
+    A set in the record workout formset.
 
-    exercise = forms.ModelChoiceField(
-        queryset=Exercise.objects.all(),
-        empty_label="Pick an exercise",
-        widget=forms.Select(attrs={
-            'class': 'workout-exercise col-xs-12',
-            'title': 'Select an exercise'
-        })
-    )
+    The exercise is validated against the cached exercise catalogue, which
+    BaseSetFormSet shares between every form. Its select list only renders
+    the selected exercise, and record_workouts.js fills in the rest from
+    the catalogue endpoint - rather than rendering every exercise 24 times.
+    """
+
+    exercise = forms.ChoiceField(widget=forms.Select(attrs={
+        'class': 'workout-exercise col-xs-12',
+        'title': 'Select an exercise'
+    }))
+
+    def __init__(self, *args, **kwargs):
+        exercises = kwargs.pop('exercises', None)
+        super(SetForm, self).__init__(*args, **kwargs)
+        if exercises is None:
+            exercises = exercise_set_choices()
+
+        field = self.fields['exercise']
+        field.choices = exercises
+        selected = self['exercise'].value()
+        field.widget.choices = exercises[:1] + (
+            [(selected, selected)] if selected else [])
 
     class Meta:
         model = Set
-        fields = ('exercise', 'weight', 'reps')
+        # the exercise is a plain choice, so it isn't looked up per form
+        fields = ('weight', 'reps')
         widgets = {
             'weight': forms.TextInput(attrs={
                 'placeholder': '60kg',
@@ -215,6 +239,18 @@ class SetForm(forms.ModelForm):
         }
 
 
+class BaseSetFormSet(BaseFormSet):
+    """Builds the exercise choices once for every SetForm in the formset."""
+
+    def __init__(self, *args, **kwargs):
+        self.exercises = exercise_set_choices()
+        super(BaseSetFormSet, self).__init__(*args, **kwargs)
+
+    def _construct_form(self, i, **kwargs):
+        kwargs['exercises'] = self.exercises
+        return super(BaseSetFormSet, self)._construct_form(i, **kwargs)
+
+
 class FindWorkoutForm(forms.ModelForm):
     """
     Rendersa select list, from which users can pick a workout they have 
@@ -223,9 +259,8 @@ class FindWorkoutForm(forms.ModelForm):
 
     def __init__(self, user, *args, **kwargs):
         super(FindWorkoutForm, self).__init__(*args, **kwargs)
-        self.fields['name'] = forms.ModelChoiceField(
-            queryset=Workout.objects.filter(user=user)
-        )
+        _search_field(self, 'name', choices.workout_choices(user),
+            'Find a workout', 'ajax_find_workouts')
 
     name = forms.ChoiceField(widget=forms.Select(attrs={
         'class': 'wide-form-field',
@@ -260,10 +295,15 @@ class AddExerciseForm(forms.ModelForm):
 class FindExerciseForm(forms.ModelForm):
     """Provides users a select list, from which they can choose an exercise."""
 
+    def __init__(self, *args, **kwargs):
+        super(FindExerciseForm, self).__init__(*args, **kwargs)
+        _search_field(self, 'name', choices.exercise_choices(),
+            'Find an exercise', 'ajax_find_exercises')
+
     name = forms.ChoiceField(widget=forms.Select(attrs={
         'class': 'wide-form-field',
         'title': 'Find an Exercise'
-    }), choices=Exercise.objects.categorise_exercises())
+    }))
 
     class Meta:
         model = User
@@ -325,3 +365,25 @@ class DailyNutritionForm(forms.ModelForm):
             }),
         }
 
+
+def _search_field(form, name, field_choices, empty_label, typeahead_url):
+    """
+    Fills the select list of a search field with choices. If there are too
+    many choices to list (see stronger.choices) the field becomes a text
+    input, which stronger.js turns into a typeahead backed by the named
+    URL.
+    """
+    field = form.fields[name]
+    if field_choices is not None:
+        field.choices = [('', empty_label)] + field_choices
+        return
+
+    attrs = dict(field.widget.attrs, placeholder=empty_label)
+    attrs['data-typeahead-url'] = reverse(typeahead_url)
+    form.fields[name] = forms.CharField(widget=forms.TextInput(attrs=attrs))
+
+
+def exercise_set_choices():
+    """Returns the exercise choices of a SetForm, from the catalogue."""
+    return [('', 'Pick an exercise')] + [(name, name)
+        for name, _ in choices.exercise_catalogue()]
@@ -0,0 +1,29 @@
+"""Test the public facing forms."""
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from stronger.tests.factories import UserFactory
+
+from ..forms import FindUserForm
+
+
+class TestFindUserForm(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.danny = UserFactory(username='danny')
+        self.ray = UserFactory(username='ray')
+
+    def test_select_list(self):
+        self.assertEqual(FindUserForm().fields['username'].choices,
+            [('', 'Find a user'), (self.danny.pk, 'danny'),
+             (self.ray.pk, 'ray')])
+
+    @override_settings(CHOICES_TYPEAHEAD_THRESHOLD=1)
+    def test_typeahead(self):
+        """Assert a typeahead is rendered once there are too many users."""
+        html = str(FindUserForm()['username'])
+        self.assertIn('data-typeahead-url="/ajax/find-users/"', html)
+        self.assertNotIn('danny', html)
@@ -1,11 +1,16 @@
 """Test all public facing views."""
 
+import json
+import time
+from datetime import timedelta
+
 from django.core.urlresolvers import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils import timezone
 
-from stronger.models import Workout, DailyNutrition, Exercise
+from stronger.models import BodyWeight, DailyNutrition, Exercise, Set, Workout
 
 from .utils import (
     User,
@@ -241,6 +246,16 @@ class ProfileTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "profile.html")
 
+    def test_news_read_from_activities(self):
+        workout = Workout.objects.create(user=self.user, date=timezone.now(),
+            description='Legs', comments='')
+        self.client.login(**TEST_CREDS)
+        response = self.client.get(
+            reverse('profile', kwargs={'username': TEST_USERNAME})
+        )
+        self.assertEqual(response.context['news'], [workout])
+        self.assertIsNone(response.context['older_news'])
+
     def test_invalid_username_raises_404(self):
         self.client.login(**TEST_CREDS)
         response = self.client.get(
@@ -307,6 +322,32 @@ class WorkoutsTest(TestCase):
         self.assertRedirects(response, '/workouts/{}'.format(wko.id))
         self.assertTemplateUsed(response, "workout.html")
 
+    def test_ajax_workouts(self):
+        self.client.login(**TEST_CREDS)
+        Workout.objects.create(user=self.user, date=timezone.now(),
+                description='Bench day', comments='Good session with Ray')
+        response = self.client.get(reverse('ajax_workouts'),
+                {'days-back': 7})
+        counts = json.loads(response.content)['average-workout-count']
+        self.assertEqual(len(counts['categories']),
+                len(counts['user_average']))
+        self.assertEqual(counts['user_average'][-1], 1)
+
+    def test_ajax_workouts_aligns_site_average_by_month(self):
+        """Assert a site series missing the current month is not shifted
+        against the user's months."""
+        cache.clear()
+        self.client.login(**TEST_CREDS)
+        Workout.objects.create(user=self.user, date=timezone.now(),
+                description='Bench day', comments='Good session with Ray')
+        months = [m for m, _ in Workout.objects.average_workouts_per_month()]
+        cache.set('workouts-per-month:365:{:%Y-%m}'.format(timezone.now()),
+                (time.time() + 3600, [(m, 2) for m in months[:-1]]))
+        response = self.client.get(reverse('ajax_workouts'),
+                {'days-back': 7})
+        counts = json.loads(response.content)['average-workout-count']
+        self.assertEqual(counts['site_average'], [2] * (len(months) - 1) + [0])
+
 
 class WorkoutTest(TestCase):
     """Tests for the individual workout page."""
@@ -340,6 +381,17 @@ class WorkoutTest(TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, "404.html")
 
+    def test_ajax_workout_reads_summary(self):
+        exc = Exercise.objects.create(name='Bench', primary_muscle='Chest',
+                secondary_muscles='Triceps', added_by=self.user)
+        Set.objects.create(workout=self.wko, exercise=exc, weight=100, reps=5)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('ajax_workout',
+                    kwargs={'workout_id': self.wko.id}))
+        data = json.loads(response.content)
+        self.assertEqual(data['sets'], [['Bench', 5]])
+        self.assertEqual(data['muscle-groups'], {'Chest': 1})
+
 
 class RecordWorkoutTest(TestCase):
 
@@ -374,6 +426,84 @@ class RecordWorkoutTest(TestCase):
         }, follow=True)
         self.assertRedirects(response, reverse('workout', kwargs={'workout_id':1}))
 
+    def test_sets_validated_against_cached_catalogue(self):
+        """Assert sets with unknown exercises are rejected, and exercises
+        aren't rendered into every form."""
+        cache.clear()
+        user = create_user()
+        Exercise.objects.create(name='Bench', primary_muscle='Chest',
+                secondary_muscles='Triceps', added_by=user)
+        self.client.login(**TEST_CREDS)
+        data = {
+            'date': '2014-01-01',
+            'description': 'Push session',
+            'comments': 'Felt quite easy today',
+            'form-INITIAL_FORMS': '0',
+            'form-TOTAL_FORMS': '2',
+            'form-MAX_NUM_FORMS': '',
+            'form-0-exercise': 'Bench',
+            'form-0-weight': '100',
+            'form-0-reps': '5',
+            'form-1-exercise': 'Curl',
+            'form-1-weight': '20',
+            'form-1-reps': '10',
+        }
+        response = self.client.post(reverse('record_workout'), data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['set_formset'].is_valid())
+        self.assertFalse(Workout.objects.exists())
+
+        response = self.client.get(reverse('record_workout'))
+        self.assertEqual(response.content.count('value="Bench"'), 0)
+
+    def test_sets_recorded_in_bulk(self):
+        cache.clear()
+        user = create_user()
+        Exercise.objects.create(name='Bench', primary_muscle='Chest',
+                secondary_muscles='Triceps', added_by=user)
+        self.client.login(**TEST_CREDS)
+        response = self.client.post(reverse('record_workout'), data={
+            'date': '2014-01-01',
+            'description': 'Push session',
+            'comments': 'Felt quite easy today',
+            'form-INITIAL_FORMS': '0',
+            'form-TOTAL_FORMS': '3',
+            'form-MAX_NUM_FORMS': '',
+            'form-0-exercise': 'Bench',
+            'form-0-weight': '100',
+            'form-0-reps': '5',
+            'form-1-exercise': 'Bench',
+            'form-1-weight': '90',
+            'form-1-reps': '8',
+        })
+        workout = Workout.objects.get()
+        self.assertRedirects(response, reverse('workout',
+                kwargs={'workout_id': workout.id}))
+        self.assertEqual(sorted(Set.objects.filter(workout=workout)
+                .values_list('weight', flat=True)), [90, 100])
+        self.assertEqual(workout.summary.set_count, 2)
+
+    def test_ajax_exercise_catalogue(self):
+        cache.clear()
+        user = create_user()
+        Exercise.objects.create(name='Bench', primary_muscle='Chest',
+                secondary_muscles='Triceps', added_by=user)
+        response = self.client.get(reverse('ajax_exercise_catalogue'))
+        self.assertEqual(json.loads(response.content),
+                {'exercises': [['Bench', 'Chest']]})
+
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('ajax_exercise_catalogue'),
+                    HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Exercise.objects.create(name='Squat', primary_muscle='Legs',
+                secondary_muscles='Glutes', added_by=user)
+        response = self.client.get(reverse('ajax_exercise_catalogue'),
+                HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
 
 class TestNutrition(TestCase):
 
@@ -408,6 +538,84 @@ class TestNutrition(TestCase):
         self.assertRedirects(response, reverse('meal', kwargs={'meal_id': 1}))
         self.assertEqual(DailyNutrition.objects.all().count(), 1)
 
+    def test_ajax_nutrition_summary(self):
+        self.client.login(**TEST_CREDS)
+        today = timezone.now()
+        exc = Exercise.objects.create(name='Bench', primary_muscle='Chest',
+                secondary_muscles='Triceps', added_by=self.user)
+        wko = Workout.objects.create(user=self.user, date=today)
+        Set.objects.create(workout=wko, exercise=exc, weight=100, reps=5)
+        for days_ago, calories in ((0, 3000), (1, 2000), (3, 2200)):
+            DailyNutrition.objects.create(user=self.user,
+                    date=today.date() - timedelta(days=days_ago),
+                    calories=calories, protein=150, carbs=200, fats=60,
+                    created_on=today)
+
+        response = self.client.get(reverse('ajax_nutrition_summary'),
+                {'days-back': 2})
+        data = json.loads(response.content)
+        self.assertEqual(sorted(data['calorie-tracker'].values()),
+                [2000, 3000])
+        self.assertEqual(data['macros'],
+                {'protein': 300, 'carbs': 400, 'fats': 120})
+        self.assertEqual(data['macro-breakdown'],
+                {'workout_days': [150, 200, 60], 'rest_days': [150, 200, 60]})
+
+    def test_ajax_energy_balance(self):
+        self.client.login(**TEST_CREDS)
+        today = timezone.now().date()
+        for days_ago in xrange(40):
+            DailyNutrition.objects.create(user=self.user,
+                    date=today - timedelta(days=days_ago), calories=2500,
+                    protein=150, carbs=200, fats=60,
+                    created_on=timezone.now())
+        BodyWeight.objects.create(user=self.user, bodyweight=80,
+                date=today - timedelta(days=39))
+
+        response = self.client.get(reverse('ajax_energy_balance'),
+                {'days-back': 7})
+        data = json.loads(response.content)
+        self.assertEqual(len(data['intake']), 8)
+        self.assertEqual(data['trend'][today.isoformat()], 80)
+        self.assertEqual(data['maintenance'][today.isoformat()], 2500)
+        self.assertIsNone(data['estimate'])
+
+    def test_ajax_energy_balance_counts_back_from_today(self):
+        """Assert days logged before the period are left out, even when
+        nothing has been logged since."""
+        self.client.login(**TEST_CREDS)
+        today = timezone.now().date()
+        for days_ago in xrange(10, 40):
+            DailyNutrition.objects.create(user=self.user,
+                    date=today - timedelta(days=days_ago), calories=2500,
+                    protein=150, carbs=200, fats=60,
+                    created_on=timezone.now())
+        BodyWeight.objects.create(user=self.user, bodyweight=80,
+                date=today - timedelta(days=39))
+
+        response = self.client.get(reverse('ajax_energy_balance'),
+                {'days-back': 7})
+        data = json.loads(response.content)
+        self.assertEqual(data['intake'], {})
+        self.assertEqual(data['trend'], {})
+
+    def test_ajax_bodyweight(self):
+        today = timezone.now().date()
+        for days_ago in xrange(30):
+            BodyWeight.objects.create(user=self.user, bodyweight=80,
+                    date=today - timedelta(days=days_ago))
+
+        response = self.client.get(reverse('ajax_bodyweight',
+                kwargs={'username': self.user.username}),
+                {'max-points': 10})
+        data = json.loads(response.content)
+        self.assertEqual(len(data['bodyweight']), 10)
+        self.assertEqual(data['trend'][-1], [today.isoformat(), 80])
+
+        response = self.client.get(reverse('ajax_bodyweight',
+                kwargs={'username': self.user.username}), {'bucket': 'year'})
+        self.assertEqual(len(json.loads(response.content)['trend']), 30)
+
 
 class TestExercises(TestCase):
 
@@ -420,6 +628,19 @@ class TestExercises(TestCase):
             'added_by': self.user,
         }
 
+    def test_ajax_find_exercises(self):
+        self.client.login(**TEST_CREDS)
+        Exercise.objects.create(**self.exercise_data)
+        response = self.client.get(reverse('ajax_find_exercises'),
+                {'q': 'ben'})
+        self.assertEqual(json.loads(response.content),
+                {'results': [{'id': 'Bench', 'text': 'Bench'}]})
+
+    def test_ajax_find_exercises_redirects_anonymous(self):
+        url = reverse('ajax_find_exercises')
+        response = self.client.get(url)
+        self.assertRedirects(response, '/login?next={}'.format(url))
+
     def test_exercises_page_redirects_anonymous(self):
         response = self.client.get(reverse('exercises'), follow=True)
         self.assertRedirects(response, "/login?next=/exercises")
@@ -441,6 +662,21 @@ class TestExercises(TestCase):
                 kwargs={'exercise_name': 'bench'}))
         self.assertTemplateUsed(response, "exercise.html")
 
+    def test_exercise_page_lists_own_workouts(self):
+        self.client.login(**TEST_CREDS)
+        exc = Exercise.objects.create(**self.exercise_data)
+        other = create_user('ray', 'ray@example.com')
+        for user in (self.user, other):
+            wko = Workout.objects.create(user=user, date=timezone.now())
+            Set.objects.create(workout=wko, exercise=exc, weight=100, reps=5)
+        response = self.client.get(reverse('exercise',
+                kwargs={'exercise_name': exc.clean_name}))
+        self.assertEqual([w.user for w in response.context['workouts']],
+                [self.user])
+        self.assertEqual(response.context['all_time_rep_count'], 5)
+        self.assertEqual(response.context['month_rep_count'], 5)
+        self.assertIsNone(response.context['older_workouts'])
+
     def test_authenticated_users_can_find_exercises(self):
         self.client.login(**TEST_CREDS)
         exc = Exercise.objects.create(**self.exercise_data)
@@ -448,6 +684,69 @@ class TestExercises(TestCase):
                 data={'name': 'Bench'}, follow=True)
         self.assertRedirects(response, '/exercises/{}'.format(exc.clean_name))
 
+    def test_ajax_exercise_history_records(self):
+        self.client.login(**TEST_CREDS)
+        exc = Exercise.objects.create(**self.exercise_data)
+        wko = Workout.objects.create(user=self.user, date=timezone.now(),
+                description='Bench day', comments='Good session with Ray')
+        Set.objects.create(workout=wko, exercise=exc, weight=100, reps=5)
+        response = self.client.get(reverse('ajax_exercise_history',
+                kwargs={'exercise_name': exc.clean_name}), {'reps': 5})
+        records = json.loads(response.content)['exercise-records']
+        self.assertEqual(records['personal_records']['5'],
+                [100, TEST_USERNAME])
+        self.assertEqual(records['site_records']['1'], [0, None])
+
+    def test_ajax_exercise_history_is_downsampled(self):
+        self.client.login(**TEST_CREDS)
+        exc = Exercise.objects.create(**self.exercise_data)
+        today = timezone.now()
+        for days_ago in xrange(40):
+            wko = Workout.objects.create(user=self.user,
+                    date=today - timedelta(days=days_ago))
+            Set.objects.create(workout=wko, exercise=exc,
+                    weight=100 + days_ago % 7, reps=5)
+        response = self.client.get(reverse('ajax_exercise_history',
+                kwargs={'exercise_name': exc.clean_name}),
+                {'reps': 5, 'max-points': 10})
+        data = json.loads(response.content)
+        self.assertEqual(len(data['exercise-progress']), 10)
+        self.assertEqual(len(data['exercise-e1rm']['estimated']), 10)
+
+        start = (today - timedelta(days=9)).strftime('%Y-%m-%d')
+        response = self.client.get(reverse('ajax_exercise_history',
+                kwargs={'exercise_name': exc.clean_name}),
+                {'reps': 5, 'start': start})
+        progress = json.loads(response.content)['exercise-progress']
+        self.assertEqual(len(progress), 10)
+        self.assertEqual(min(progress), start)
+
+    def test_ajax_big_three_progress_is_cached(self):
+        cache.clear()
+        bench = Exercise.objects.create(**self.exercise_data)
+        squat = Exercise.objects.create(name='Squat', primary_muscle='Quads',
+                secondary_muscles='Glutes', added_by=self.user)
+        wko = Workout.objects.create(user=self.user, date=timezone.now())
+        Set.objects.create(workout=wko, exercise=bench, weight=100, reps=5)
+        Set.objects.create(workout=wko, exercise=bench, weight=105, reps=3)
+        Set.objects.create(workout=wko, exercise=squat, weight=140, reps=5)
+        day = timezone.localtime(wko.date).strftime('%Y-%m-%d')
+        url = reverse('ajax_big_three_progress',
+                kwargs={'username': TEST_USERNAME})
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(json.loads(response.content),
+                {'squat': {day: 140}, 'bench': {day: 105}, 'deadlift': {}})
+
+        # only the user is looked up once the history is cached
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        Set.objects.create(workout=wko, exercise=bench, weight=110, reps=1)
+        response = self.client.get(url)
+        self.assertEqual(json.loads(response.content)['bench'], {day: 110})
+
 
 class UsersTest(TestCase):
 
@@ -464,3 +763,8 @@ class UsersTest(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "users.html")
+
+    def test_ajax_find_users_redirects_anonymous(self):
+        url = reverse('ajax_find_users')
+        response = self.client.get(url)
+        self.assertRedirects(response, '/login?next={}'.format(url))
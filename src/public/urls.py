@@ -23,6 +23,8 @@ urlpatterns = patterns('',
         'public.views.user_day', name='user_day'),
     url(r'^users/$', 'public.views.users', name='users'),
     url(r'^settings$', 'public.views.settings', name='settings'),
+    url(r'^ajax/find-users/$', 'public.views.ajax_find_users',
+        name='ajax_find_users'),
 
     # workouts
     url(r'^workouts$', 'public.views.workouts', name='workouts'),
@@ -36,6 +38,8 @@ urlpatterns = patterns('',
         name='ajax_workout'),
     url(r'^ajax/workouts/$', 'public.views.ajax_workouts',
         name='ajax_workouts'),
+    url(r'^ajax/find-workouts/$', 'public.views.ajax_find_workouts',
+        name='ajax_find_workouts'),
 
     # meals
     url(r'^nutrition$', 'public.views.nutrition', name='nutrition'),
@@ -44,6 +48,10 @@ urlpatterns = patterns('',
     # internal meal ajax requests
     url(r'^ajax/nutrition-summary/$', 'public.views.ajax_nutrition_summary',
         name='ajax_nutrition_summary'),
+    url(r'^ajax/energy-balance/$', 'public.views.ajax_energy_balance',
+        name='ajax_energy_balance'),
+    url(r'^ajax/bodyweight/(?P<username>[-a-zA-Z0-9]+)/$',
+        'public.views.ajax_bodyweight', name='ajax_bodyweight'),
 
     # exercises
     url(r'^exercises$', 'public.views.exercises', name='exercises'),
@@ -56,6 +64,10 @@ urlpatterns = patterns('',
         'public.views.ajax_big_three_progress', name='ajax_big_three_progress'),
     url(r'^ajax/popular-exercises$', 'public.views.ajax_popular_exercises',
         name='ajax_popular_exercises'),
+    url(r'^ajax/find-exercises/$', 'public.views.ajax_find_exercises',
+        name='ajax_find_exercises'),
+    url(r'^ajax/exercise-catalogue/$', 'public.views.ajax_exercise_catalogue',
+        name='ajax_exercise_catalogue'),
 
     # groups and users
     url(r'^groups/(?P<group_name>[-a-zA-Z0-9]+)$', 'public.views.group',
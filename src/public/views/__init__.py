@@ -6,14 +6,30 @@ from .exercise import (
     ajax_big_three_progress,
     ajax_popular_exercises,
     ajax_exercise_history,
+    ajax_find_exercises,
+    ajax_exercise_catalogue,
 )
 from .group import group, groups
-from .nutrition import nutrition, meal, ajax_nutrition_summary
-from .user import profile, users, dashboard, user_day, settings
+from .nutrition import (
+    nutrition,
+    meal,
+    ajax_nutrition_summary,
+    ajax_energy_balance,
+    ajax_bodyweight,
+)
+from .user import (
+    profile,
+    users,
+    dashboard,
+    user_day,
+    settings,
+    ajax_find_users,
+)
 from .workout import (
     workout,
     workouts,
     ajax_workout,
     record_workout,
     ajax_workouts,
+    ajax_find_workouts,
 )
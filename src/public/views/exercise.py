@@ -1,7 +1,5 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 import json
-from itertools import groupby
-from operator import attrgetter
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
@@ -9,12 +7,26 @@ from django.core.urlresolvers import reverse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponseRedirect, JsonResponse
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
 from ..forms import AddExerciseForm, FindExerciseForm, Friend
-from stronger.models import Exercise, Set
+from stronger import analytics, choices
+from stronger.constants import TIME_WINDOWS
+from stronger.models import DailyTrainingRollup, Exercise, Set, Workout
+
+from .utils import (
+    DEFAULT_MAX_POINTS,
+    _date_param,
+    _max_points,
+    _typeahead_response,
+)
 
 User = get_user_model()
 
+# the number of workouts listed per page on an exercise page
+WORKOUTS_PER_PAGE = 10
+
 
 @login_required
 def exercise(request, exercise_name):
@@ -30,30 +42,24 @@ def exercise(request, exercise_name):
         if exercise_form.is_valid():
             exercise_form.save()
 
-    workouts_including_exercise = [
-        s.workout for s in Set.objects.filter(
-            exercise=exercise
-        ).select_related('workout')
-    ]
+    workouts, older_workouts = Workout.objects.page_including_exercise(
+        request.user, exercise, request.GET.get('before'), WORKOUTS_PER_PAGE)
+
+    todays_date = timezone.localtime(timezone.now()).date()
+    rep_counts = DailyTrainingRollup.objects.rep_totals(request.user,
+        exercise, {
+            'year': todays_date.replace(month=1, day=1),
+            'month': todays_date.replace(day=1),
+        })
 
-    todays_date = timezone.now().date()
     data = {
         'exercise': exercise,
-        'workouts': workouts_including_exercise,
+        'workouts': workouts,
+        'older_workouts': older_workouts,
         'edit_exercise_form': AddExerciseForm(instance=exercise),
-        'all_time_rep_count': exercise.sum_reps(request.user),
-        'year_rep_count': exercise.sum_reps(
-            request.user, timezone.make_aware(
-                datetime(todays_date.year, 1, 1),
-                timezone.get_default_timezone()
-            )
-        ),
-        'month_rep_count': exercise.sum_reps(
-            request.user, timezone.make_aware(
-                datetime(todays_date.year, todays_date.month, 1),
-                timezone.get_default_timezone()
-            )
-        ),
+        'all_time_rep_count': rep_counts['all_time'],
+        'year_rep_count': rep_counts['year'],
+        'month_rep_count': rep_counts['month'],
     }
 
     return render(request, "exercise.html", data)
@@ -83,7 +89,7 @@ def exercises(request):
             )
         )
 
-    following = [friend for friend in Friend.objects.following(request.user)]
+    following = [f.friend for f in Friend.objects.following(request.user)]
     data = {
         'exercise_count': Exercise.objects.count(),
         'exercise_form': AddExerciseForm(),
@@ -103,65 +109,118 @@ def exercises(request):
 def ajax_big_three_progress(request, username):
     """
     Returns the ajax history for the three big powerlifting exercises - 
-    squat, deadlift and bench.
+    squat, deadlift and bench - as the greatest weight lifted per workout.
     """
 
-    user = get_object_or_404(User, username=request.user)
-
-    big_three_history = {
-        'squat': _exercise_history(user,
-            get_object_or_404(Exercise, clean_name='squat')),
-        'deadlift': _exercise_history(user,
-            get_object_or_404(Exercise, clean_name='deadlift')),
-        'bench': _exercise_history(user,
-            get_object_or_404(Exercise, clean_name='bench'))
-    }
-
-    # we only want to keep the greatest weight lifted per workout
-    for exercise, history in big_three_history.iteritems():
-        big_three_history[exercise] = dict((d, max(w)) 
-            for d, w in history.iteritems())
-
-    return JsonResponse(big_three_history)
+    user = get_object_or_404(User, username=username)
+    return JsonResponse(DailyTrainingRollup.objects.big_three_progress(user))
 
 def ajax_popular_exercises(request):
-    """Return the most popular exercises."""
+    """
+    Return the most popular exercises, optionally within a time window
+    passed as a GET parameter (for example ?window=week).
+    """
+    window = request.GET.get('window')
+    if window not in TIME_WINDOWS:
+        window = None
+
     data = {
-        'popular_exercises': Exercise.objects.most_popular(5)
+        'popular_exercises': Exercise.objects.most_popular(5, window)
     }
     return JsonResponse(data)
 
+@cache_control(max_age=0)
+@condition(etag_func=lambda request: choices.exercise_catalogue_version())
+def ajax_exercise_catalogue(request):
+    """
+    Returns [name, primary muscle] pairs of every exercise. Responses carry
+    an ETag which changes with the catalogue, so clients can revalidate a
+    cached copy without the catalogue being read.
+    """
+    return JsonResponse({'exercises': choices.exercise_catalogue()})
+
+@login_required
+def ajax_find_exercises(request):
+    """Returns the exercises whose name contains the q GET parameter."""
+    return _typeahead_response(choices.search_exercises(
+        request.GET.get('q', '')))
+
 def ajax_exercise_history(request, exercise_name):
+    """
+    Returns the records and progression of the authenticated user for a
+    given exercise, including their estimated one rep max over time.
+
+    The estimate formula (epley or brzycki) and the period the estimates
+    are grouped by (day, week or month) can be passed as GET parameters.
+    The history can be limited with start and end dates (YYYY-MM-DD), the
+    heaviest lifts bucketed by week or month, and both series are capped at
+    max-points points so the response stays small however long the history.
+    """
 
     exercise = get_object_or_404(Exercise, clean_name=exercise_name)
+
+    formula = request.GET.get('formula', 'epley')
+    if formula not in analytics.ONE_REP_MAX_FORMULAS:
+        formula = 'epley'
+    period = request.GET.get('period', 'day')
+    if period not in analytics.PERIODS:
+        period = 'day'
+    bucket = request.GET.get('bucket', 'day')
+    if bucket not in analytics.PERIODS:
+        bucket = 'day'
+
+    start, end = _history_range(request)
+    max_points = _max_points(request)
+
     data = {
         'exercise-records': _exercise_records(request.user, exercise),
         'exercise-progress': _exercise_progression(request.user,
-            exercise, request.GET.get('reps', '5')),
+            exercise, request.GET.get('reps', '5'), start, end, bucket,
+            max_points),
+        'exercise-e1rm': analytics.progression(request.user, exercise,
+            formula, period, start, end, max_points),
     }
     return JsonResponse(data)
 
-def _exercise_progression(user, exercise, reps=5):
+def _history_range(request):
+    """
+    Returns the (start, end) datetimes of the history requested by the
+    start and end GET parameters, either of which may be None.
+    """
+
+    def _parse(param, day_offset):
+        day = _date_param(request, param)
+        if day is None:
+            return None
+        return timezone.make_aware(
+            datetime.combine(day + timedelta(days=day_offset), time.min),
+            timezone.get_current_timezone())
+
+    end = _parse('end', 1)
+    return _parse('start', 0), end and end - timedelta(microseconds=1)
+
+def _exercise_progression(user, exercise, reps=5, start=None, end=None,
+                          bucket='day', max_points=DEFAULT_MAX_POINTS):
     """
     Returns the highest weight lifted by a user for a specified exercise, in
-    a particular rep range, in each recorded workout.
+    a particular rep range, in each day (or week or month) they trained.
+
+    The maxima are calculated in the database. Daily series longer than
+    max_points are downsampled, keeping the shape of the progression.
 
     We expect this to demonstrate progression over time - but that is not
     guaranteed!
     """
-    exercise_sets = Set.objects.filter(
-        exercise=exercise,
-        reps=reps,
-        workout__user=user
-    )
 
-    history = {}
-    exercises_sorted_by_workout = sorted(exercise_sets, key=attrgetter("workout"))
-    for workout, sets in groupby(
-        exercises_sorted_by_workout, key=attrgetter("workout")):
-        history[workout.date.strftime("%Y-%m-%d")] = max([s.weight for s in sets])
+    try:
+        reps = int(reps)
+    except ValueError:
+        return {}
 
-    return history
+    history = Set.objects.heaviest_per_period(user, exercise, reps, start,
+        end, bucket)
+    return dict((d.strftime("%Y-%m-%d"), weight)
+        for d, weight in analytics.downsample(history, max_points))
 
 def _exercise_records(user, exercise):
     """Returns the user specific and site wide records of the heavies weight
@@ -175,7 +234,7 @@ def _exercise_records(user, exercise):
             except KeyError:
                 temp_records[i] = (0, None)
             else:
-                temp_records[i] = (record.weight, record.workout.user.username)
+                temp_records[i] = (record.weight, record.user.username)
         return temp_records
 
     return {
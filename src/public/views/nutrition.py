@@ -1,4 +1,3 @@
-from collections import defaultdict
 from datetime import timedelta
 import json
 
@@ -10,10 +9,16 @@ from django.http import HttpResponseRedirect, JsonResponse
 from django.utils import timezone
 
 from ..forms import DailyNutritionForm, BodyWeightForm, Friend
-from stronger.models import DailyNutrition, Workout
+from stronger import analytics
+from stronger.models import DailyNutrition, MaintenanceEstimate, Workout
+
+from .utils import _date_param, _leaderboard_window, _max_points
 
 User = get_user_model()
 
+# the longest period of energy balance history returned at once
+MAX_ENERGY_BALANCE_DAYS = 365 * 2
+
 
 @login_required
 def nutrition(request):
@@ -39,18 +44,21 @@ def nutrition(request):
                     kwargs={'meal_id': dailyn.id}))
 
     following = [f.id for f in Friend.objects.following(request.user)]
+    day_type_averages = DailyNutrition.objects.day_type_averages(request.user)
 
     data = {
         'meal_record_form': DailyNutritionForm(),
         'bodyweight_form': BodyWeightForm,
-        'bodyweight': request.user.bodyweight_history(),
         'dn_history': DailyNutrition.objects.filter(user=request.user)
             .order_by('-date')[:5],
-        'average_workout_kcal': DailyNutrition.objects.workout_day_nutrition(
-            request.user, calories_only=True),
-        'average_rest_kcal': DailyNutrition.objects.rest_day_nutrition(
-            request.user, calories_only=True),
-        'most_nutrition': DailyNutrition.objects.most_frequent_users(),
+        'average_workout_kcal':
+            day_type_averages['workout_days']['calories'],
+        'average_rest_kcal': day_type_averages['rest_days']['calories'],
+        'day_type_averages': day_type_averages,
+        'maintenance_estimate': MaintenanceEstimate.objects.for_user(
+            request.user),
+        'most_nutrition': DailyNutrition.objects.most_frequent_users(
+            window=_leaderboard_window(request)),
         'friend_nutrition_history': DailyNutrition.objects.filter(
             user__in=following).order_by('-date')[:10],
         'js_data': json.dumps({
@@ -101,60 +109,94 @@ def ajax_nutrition_summary(request):
     defaults to 14 days.
     """
 
-    days_back = request.GET.get('days-back', '14')
+    try:
+        days_back = max(int(request.GET.get('days-back', '14')), 0)
+    except ValueError:
+        days_back = 14
 
     end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=int(days_back))
-    nutrition_history = DailyNutrition.objects.filter(user=request.user,
-                    date__range=(start_date, end_date)).order_by('-date')
-
-    calorie_history = dict()
-    for daily_nutrition in nutrition_history:
-        calorie_history[daily_nutrition.date.strftime("%Y-%m-%d")] \
-            = daily_nutrition.calories
-
-    total_macros = defaultdict(int)
-    for daily_nutrition in nutrition_history:
-        total_macros['fats'] += daily_nutrition.fats
-        total_macros['carbs'] += daily_nutrition.carbs
-        total_macros['protein'] += daily_nutrition.protein
-
-    # calculate average macro breakdown on WO and non WO days
-    workout_macros, rest_macros = _get_macro_breakdown(request.user,
-        nutrition_history)
+    start_date = end_date - timedelta(days=days_back)
+    summary = DailyNutrition.objects.summary(request.user, start_date,
+        end_date)
 
     data = {
-        'calorie-tracker': calorie_history,
-        'macros': total_macros,
+        'calorie-tracker': dict((d.strftime("%Y-%m-%d"), calories)
+            for d, calories in summary['calories'].iteritems()),
+        'macros': summary['macros'],
         'macro-breakdown': {
-            'workout_days': workout_macros,
-            'rest_days': rest_macros,
+            'workout_days': _macro_averages(summary['workout_days']),
+            'rest_days': _macro_averages(summary['rest_days']),
         }
     }
 
     return JsonResponse(data)
 
-def _get_macro_breakdown(user, data):
+def ajax_energy_balance(request):
+    """
+    Returns the calories eaten, smoothed bodyweight trend and estimated
+    maintenance calories of the authenticated user for each day over a
+    time period, which defaults to 90 days, alongside their stored
+    maintenance estimate.
+    """
 
-    workout_dates = [w.date.date() for w in Workout.objects.filter(user=user)]
+    try:
+        days_back = min(max(int(request.GET.get('days-back', '90')), 1),
+            MAX_ENERGY_BALANCE_DAYS)
+    except ValueError:
+        days_back = 90
 
-    workout_day_nutrition = [n for n in data if n.date in workout_dates]
-    off_day_nutrition = [n for n in data if n.date not in workout_dates]
+    start_date = timezone.now().date() - timedelta(days=days_back)
+    days, intake, trend, maintenance = analytics.user_energy_balance(
+        request.user, start=start_date)
+    labels = [str(d) for d in days]
+    estimate = MaintenanceEstimate.objects.for_user(request.user)
 
-    def calculate_macros(data, dates):
+    data = {
+        'intake': analytics.series(labels, intake),
+        'trend': analytics.series(labels, trend),
+        'maintenance': analytics.series(labels, maintenance),
+        'estimate': estimate and {
+            'calories': estimate.calories,
+            'trend_weight': estimate.trend_weight,
+            'date': estimate.date.strftime("%Y-%m-%d"),
+        },
+    }
 
-        temp = []
-        no_dates = len(dates)
+    return JsonResponse(data)
 
-        try:
-            # could loop over macro names if models supports __getitem__
-            temp.append(sum([n.protein for n in data])/ no_dates)
-            temp.append(sum([n.carbs for n in data]) / no_dates)
-            temp.append(sum([n.fats for n in data]) / no_dates)
-        except ZeroDivisionError:
-            pass
+def ajax_bodyweight(request, username):
+    """
+    Returns the weigh-ins and smoothed bodyweight trend of a user, as
+    compact [[date, weight], ...] arrays.
+
+    The history can be limited with start and end dates (YYYY-MM-DD),
+    averaged by week or month with the bucket GET parameter, and daily
+    series are capped at max-points points.
+    """
 
-        return temp
+    user = get_object_or_404(User, username=username)
+    bucket = request.GET.get('bucket', 'day')
+    if bucket not in analytics.PERIODS:
+        bucket = 'day'
 
-    return calculate_macros(workout_day_nutrition, workout_dates), \
-        calculate_macros(off_day_nutrition, workout_dates)
+    dates, weights, trend = analytics.bodyweight_trend(user,
+        _date_param(request, 'start'), _date_param(request, 'end'), bucket,
+        _max_points(request))
+    labels = [str(d) for d in dates]
+
+    data = {
+        'bodyweight': [[d, round(float(w), 1)]
+            for d, w in zip(labels, weights)],
+        'trend': [[d, round(float(t), 1)] for d, t in zip(labels, trend)],
+    }
+
+    return JsonResponse(data)
+
+def _macro_averages(averages):
+    """
+    Returns the average [protein, carbs, fats] consumed on a kind of day,
+    or an empty list if no such days were recorded.
+    """
+    if not averages['days']:
+        return []
+    return [averages['protein'], averages['carbs'], averages['fats']]
@@ -6,9 +6,16 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect, Http404
 
 from ..forms import FindUserForm, UserSettingsForm
-from stronger.models import Friend, DailyNutrition, Workout
+from stronger import choices
+from stronger.models import (
+    Activity,
+    DailyNutrition,
+    FeedEntry,
+    Friend,
+    Workout,
+)
 
-from .utils import _get_activites
+from .utils import _typeahead_response
 
 User = get_user_model()
 
@@ -35,14 +42,24 @@ def users(request):
 
     return render(request, "users.html", data)
 
+@login_required
+def ajax_find_users(request):
+    """Returns the users whose username starts with the q GET parameter."""
+    return _typeahead_response(choices.search_users(request.GET.get('q', '')))
+
 @login_required
 def dashboard(request):
     """
-    Renders the dashboard homepage for an authenticated user.
+    Renders the dashboard homepage for an authenticated user, including a
+    page of activity by the user and the users they follow.
     """
 
+    activities, older_news = FeedEntry.objects.feed(request.user,
+        request.GET.get('before'))
+
     data = {
-        'news': _get_activites(request),
+        'news': [a.target for a in activities],
+        'older_news': older_news,
         'friends': User.objects.order_by('date_joined')[:6],
         'js_data': json.dumps({
             'user': request.user.id,
@@ -60,9 +77,12 @@ def profile(request, username):
     """
 
     user = get_object_or_404(User, username=username)
+    activities, older_news = Activity.objects.feed([user],
+        request.GET.get('before'))
 
     data = {
-        'news': _get_activites(request, username=username),
+        'news': [a.target for a in activities],
+        'older_news': older_news,
         'followers': Friend.objects.followers(user),
         'following': Friend.objects.following(user),
         'user': user,
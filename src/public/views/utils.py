@@ -1,35 +1,44 @@
-import datetime
-from itertools import chain
-import pytz
-from operator import attrgetter
-
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
 
-from stronger.models import Workout, DailyNutrition, BodyWeight
+from stronger.constants import TIME_WINDOWS
 
 User = get_user_model()
 
-
-def _get_activites(request, username=None):
-    """Get all timeline activities."""
-
-    if username:
-        user = get_object_or_404(User, username=username)
-        workouts = Workout.objects.filter(user=user).order_by('-date')
-        nutrition = DailyNutrition.objects.filter(user=user).order_by('-date')
-        bodyweight = BodyWeight.objects.filter(user=user).order_by('date')
-    else:
-        workouts = Workout.objects.all().order_by('-date')
-        nutrition = DailyNutrition.objects.all().order_by('-date')
-        bodyweight = BodyWeight.objects.all().order_by('date')
-
-    # we need to transform date objects into datetime objects
-    # otherwise the comparison with attrgetter() will raise a TypeError
-    for d in chain(nutrition, bodyweight):
-        # to make the new date timezone area we use the pytz package
-        d.date = pytz.utc.localize(datetime.datetime.combine(d.date,
-            datetime.datetime.min.time()))
-
-    return sorted(chain(workouts, nutrition, bodyweight),
-        key=attrgetter('date'), reverse=True)[:10]
+# the number of points returned per chart series by default, and the most
+# a client may ask for
+DEFAULT_MAX_POINTS = 250
+MAX_POINTS_LIMIT = 1000
+
+
+def _leaderboard_window(request):
+    """
+    Returns the leaderboard time window requested via the window GET
+    parameter, defaulting to all time.
+    """
+    window = request.GET.get('window', 'all')
+    return window if window in TIME_WINDOWS else 'all'
+
+def _date_param(request, param):
+    """Returns a YYYY-MM-DD date GET parameter, or None if it is invalid."""
+    try:
+        return parse_date(request.GET.get(param, ''))
+    except ValueError:
+        return None
+
+def _max_points(request):
+    """Returns the max-points GET parameter, clamped to a sensible range."""
+    try:
+        max_points = int(request.GET.get('max-points', DEFAULT_MAX_POINTS))
+    except ValueError:
+        max_points = DEFAULT_MAX_POINTS
+    return min(max(max_points, 3), MAX_POINTS_LIMIT)
+
+def _typeahead_response(choices):
+    """
+    Returns (value, label) choices as the JSON a select2 typeahead
+    expects, e.g. {"results": [{"id": 1, "text": "danny"}]}.
+    """
+    return JsonResponse({'results': [{'id': value, 'text': label}
+        for value, label in choices]})
@@ -1,16 +1,31 @@
 import datetime
-from collections import defaultdict
 import json
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse
+from django.db import transaction
 from django.forms.formsets import formset_factory
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponseRedirect, JsonResponse
 
-from ..forms import EditWorkoutForm, WorkoutForm, FindWorkoutForm, SetForm
-from stronger.models import Workout, Exercise, Set, Friend
+from ..forms import (
+    BaseSetFormSet,
+    EditWorkoutForm,
+    FindWorkoutForm,
+    SetForm,
+    WorkoutForm,
+)
+from stronger import choices
+from stronger.models import (
+    DailyTrainingRollup,
+    Friend,
+    Set,
+    Workout,
+    WorkoutSummary,
+)
+
+from .utils import _leaderboard_window, _typeahead_response
 
 User = get_user_model()
 
@@ -46,15 +61,20 @@ def ajax_workout(request, workout_id):
     """
     Returns data via JSON which can be used to draw various workout charts on 
     a single workout page (rendered via workout()).
+
+    The chart data is read from the denormalised WorkoutSummary, rather than
+    being recalculated from each set in the workout.
     """
 
-    workout = get_object_or_404(Workout, id=workout_id)
+    workout = get_object_or_404(Workout.objects.select_related('summary'),
+        id=workout_id)
+    summary = WorkoutSummary.objects.for_workout(workout)
 
     data = {
-        'sets': workout.timeline(),
-        'rep-ranges': workout.sets_in_rep_ranges(),
-        'rep-ranges-per-muscle': workout.sets_in_rep_ranges_per_muscle(),
-        'muscle-groups': workout.primary_muscles_targeted(),
+        'sets': summary.timeline(),
+        'rep-ranges': summary.rep_ranges(),
+        'rep-ranges-per-muscle': summary.rep_ranges_per_muscle(),
+        'muscle-groups': summary.primary_muscles_targeted(),
     }
 
     return JsonResponse(data)
@@ -73,7 +93,8 @@ def workouts(request):
     following = [f.friend for f in Friend.objects.following(request.user)]
 
     data = {
-        'most_workouts': Workout.objects.most_frequent_users(),
+        'most_workouts': Workout.objects.most_frequent_users(
+            window=_leaderboard_window(request)),
         'workout_search': FindWorkoutForm(request.user),
         'workout_history': Workout.objects.filter(user=request.user)
             .order_by('-date')[:10],
@@ -98,7 +119,7 @@ def record_workout(request):
     all the problems identified.
     """
 
-    SetFormSet = formset_factory(SetForm, extra=24)
+    SetFormSet = formset_factory(SetForm, formset=BaseSetFormSet, extra=24)
     set_formset = SetFormSet(request.POST or None, request.FILES or None)
     wko_form =  WorkoutForm(request.POST or None, request.FILES or None)
 
@@ -114,31 +135,35 @@ def record_workout(request):
             return render(request, "record_workout.html", data)
         else:
             wko.user_id = request.user.id
-            wko.save()
-            _save_sets(request, wko)
+            with transaction.atomic():
+                wko.save()
+                Set.objects.record_workout_sets(wko, _formset_sets(
+                    set_formset, wko))
 
             return HttpResponseRedirect(reverse('workout',
                             kwargs={'workout_id': wko.id}))
 
     return render(request, "record_workout.html", data)
 
-def _save_sets(request, workout):
+def _formset_sets(set_formset, workout):
     """
-    Iterates over the set formset in a POST request, creating a new 
-    Set instance for each valid form input.
+    Returns an unsaved Set instance for each filled in form of a validated
+    set formset.
     """
+    return [Set(workout=workout, exercise_id=form.cleaned_data['exercise'],
+                weight=form.cleaned_data['weight'],
+                reps=form.cleaned_data['reps'])
+            for form in set_formset
+            if form.cleaned_data.get('exercise')]
 
-    for i in range(int(request.POST.get('form-TOTAL_FORMS'))):
-        if request.POST.get('form-{0}-exercise'.format(i)):
-            Set(workout=workout,
-                exercise=Exercise(request.POST.get(
-                    'form-{0}-exercise'.format(i), '')),
-                weight=request.POST.get(
-                    'form-{0}-weight'.format(i), ''),
-                reps=request.POST.get(
-                    'form-{0}-reps'.format(i), '')).save()
-        else:
-            continue
+@login_required
+def ajax_find_workouts(request):
+    """
+    Returns the workouts of the authenticated user whose description
+    contains the q GET parameter.
+    """
+    return _typeahead_response(choices.search_workouts(request.user,
+        request.GET.get('q', '')))
 
 def ajax_workouts(request):
     """
@@ -149,29 +174,18 @@ def ajax_workouts(request):
     days_back = request.GET.get("days-back", "7")
     end_date = datetime.date.today()
     start_date = end_date - datetime.timedelta(days=int(days_back))
-
-    recent_workouts = Workout.objects.filter(user=request.user,
-        date__range=(start_date, end_date)).order_by('-date')
-
-    # get user workout data
-    range_counter = defaultdict(int)
-    for wko in recent_workouts:
-        for rep_range in wko.sets_in_rep_ranges():
-            range_counter[rep_range] += \
-                wko.sets_in_rep_ranges()[rep_range]
-
-    # get muscle groups
-    muscle_counter = defaultdict(int)
-    for wko in recent_workouts:
-        for muscle in wko.primary_muscles_targeted():
-            muscle_counter[muscle] += wko.primary_muscles_targeted()[muscle]
+    user_average = Workout.objects.average_workouts_per_month(request.user)
+    site_average = dict(Workout.objects.average_workouts_per_month())
 
     data = {
-        'week-rep-ranges': range_counter,
-        'week-muscle-groups': muscle_counter,
+        'week-rep-ranges': DailyTrainingRollup.objects.rep_range_breakdown(
+            request.user, start_date, end_date),
+        'week-muscle-groups': DailyTrainingRollup.objects.muscle_breakdown(
+            request.user, start_date, end_date),
         'average-workout-count': {
-            'user_average': Workout.objects.average_workouts_per_month(request.user),
-            'site_average': Workout.objects.average_workouts_per_month(),
+            'categories': [m.strftime('%b %Y') for m, _ in user_average],
+            'user_average': [count for _, count in user_average],
+            'site_average': [site_average.get(m, 0) for m, _ in user_average],
         }
     }
 
@@ -0,0 +1,418 @@
+"""
+Array based analytics over the sets, meals and bodyweights recorded by
+users.
+
+Records are fetched as plain columns (no model instances) and loaded into
+NumPy arrays, so the calculations below are batched array operations
+regardless of how many years of history a user has recorded.
+"""
+
+import numpy as np
+
+from .models import BodyWeight, DailyNutrition, Set
+
+ONE_REP_MAX_FORMULAS = ('epley', 'brzycki')
+
+PERIODS = ('day', 'week', 'month')
+
+# the energy stored in a kilogram of bodyweight
+KCAL_PER_KG = 7700
+
+# how strongly each weigh-in moves the smoothed weight trend
+WEIGHT_TREND_ALPHA = 0.1
+
+# the number of days maintenance calories are estimated over
+MAINTENANCE_WINDOW = 28
+
+# the trend is smoothed in blocks of this many days, keeping the weights
+# used by the vectorised smoothing well within floating point range
+_SMOOTHING_BLOCK = 128
+
+
+def set_columns(user, exercise, start=None, end=None):
+    """
+    Returns (dates, weights, reps) arrays for every set of an exercise a
+    user has performed, in chronological order, optionally limited to the
+    workouts recorded between two dates.
+    """
+
+    exercise_sets = Set.objects.filter(workout__user=user, exercise=exercise)
+    if start is not None:
+        exercise_sets = exercise_sets.filter(workout__date__gte=start)
+    if end is not None:
+        exercise_sets = exercise_sets.filter(workout__date__lte=end)
+
+    rows = exercise_sets.order_by('workout__date', 'id') \
+        .values_list('workout__date', 'weight', 'reps')
+    if not rows:
+        return (np.array([], dtype='datetime64[D]'), np.array([], dtype=float),
+                np.array([], dtype=int))
+
+    dates, weights, reps = zip(*rows)
+    return (np.array([d.date() for d in dates], dtype='datetime64[D]'),
+            np.array(weights, dtype=float), np.array(reps, dtype=int))
+
+
+def estimated_one_rep_max(weights, reps, formula='epley'):
+    """
+    Estimates the one rep max of each set using the Epley or Brzycki
+    formula. Singles are returned as lifted, and Brzycki is undefined past
+    36 reps so those sets are estimated as nan.
+    """
+
+    weights = np.asarray(weights, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+
+    if formula == 'epley':
+        estimates = weights * (1 + reps / 30.0)
+    elif formula == 'brzycki':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimates = np.where(reps < 37, weights * 36.0 / (37 - reps),
+                np.nan)
+    else:
+        raise ValueError("Unknown one rep max formula '{}'".format(formula))
+
+    return np.where(reps == 1, weights, estimates)
+
+
+def rolling_best(values):
+    """Returns the best value achieved up to and including each point."""
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return values
+    return np.fmax.accumulate(values)
+
+
+def period_start(dates, period):
+    """Truncates an array of dates to the start of each day/week/month."""
+
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if period == 'day':
+        return dates
+    elif period == 'week':
+        # 1970-01-01 was a Thursday, so shift by three days to reach Monday
+        days = dates.astype(np.int64)
+        return dates - ((days + 3) % 7).astype('timedelta64[D]')
+    elif period == 'month':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError("Unknown period '{}'".format(period))
+
+
+def period_maxima(dates, values, period='day'):
+    """
+    Returns (periods, maxima) arrays holding the largest value recorded in
+    each period. The dates are expected in chronological order.
+    """
+
+    values = np.asarray(values, dtype=float)
+    periods = period_start(dates, period)
+    if not len(periods):
+        return periods, values
+
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return periods[starts], np.fmax.reduceat(values, starts)
+
+
+def largest_triangle_three_buckets(x, y, threshold):
+    """
+    Returns the indices of the points kept when downsampling a series to
+    threshold points with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept. The points in between are
+    split into equal buckets, and from each bucket we keep the point which
+    forms the largest triangle with the point kept from the previous bucket
+    and the average of the next bucket - preserving the peaks and troughs
+    a chart would show at full resolution.
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    every = (length - 2) / float(threshold - 2)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, length - 1
+
+    previous = 0
+    for i in xrange(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, length)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous]) -
+            (x[previous] - x[start:end]) * (average_y - y[previous]))
+        previous = start + int(areas.argmax())
+        kept[i + 1] = previous
+
+    return kept
+
+
+def downsample(points, max_points):
+    """
+    Downsamples a chronological list of (date, value) tuples to at most
+    max_points points, see largest_triangle_three_buckets().
+    """
+    if len(points) <= max_points:
+        return points
+
+    ordinals = [d.toordinal() for d, _ in points]
+    values = [v for _, v in points]
+    return [points[i] for i in
+        largest_triangle_three_buckets(ordinals, values, max_points)]
+
+
+def progression(user, exercise, formula='epley', period='day', start=None,
+                end=None, max_points=None):
+    """
+    Returns the estimated one rep max progression of a user for an
+    exercise, as {date: estimate} dictionaries for the best estimate in each
+    period and the all time best at the end of each period.
+
+    The history can be limited to the workouts recorded between two dates,
+    and the series downsampled to at most max_points points.
+    """
+
+    dates, weights, reps = set_columns(user, exercise, start, end)
+    estimates = estimated_one_rep_max(weights, reps, formula)
+    periods, maxima = period_maxima(dates, estimates, period)
+    best = rolling_best(maxima)
+
+    if max_points is not None:
+        # nan estimates would poison the triangle areas, so drop them first
+        keep = ~np.isnan(maxima)
+        periods, maxima, best = periods[keep], maxima[keep], best[keep]
+        kept = largest_triangle_three_buckets(
+            periods.astype(np.int64), maxima, max_points)
+        periods, maxima, best = periods[kept], maxima[kept], best[kept]
+
+    labels = [str(p) for p in periods]
+    return {
+        'estimated': series(labels, maxima),
+        'rolling-best': series(labels, best),
+    }
+
+
+def exponential_trend(values, alpha=WEIGHT_TREND_ALPHA):
+    """
+    Returns the exponentially weighted moving average of a series. Leading
+    nans (days before the first value) are kept as nans, and are expected
+    to be the only gaps in the series.
+
+    Each value of the trend is alpha * value + (1 - alpha) * previous
+    trend, which is calculated a block at a time with cumulative sums
+    rather than a Python loop over every day.
+    """
+
+    values = np.asarray(values, dtype=float)
+    trend = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return trend
+
+    if alpha >= 1:
+        trend[valid[0]:] = values[valid[0]:]
+        return trend
+
+    decay = 1 - alpha
+    previous = values[valid[0]]
+    for start in xrange(valid[0], len(values), _SMOOTHING_BLOCK):
+        block = values[start:start + _SMOOTHING_BLOCK]
+        powers = decay ** np.arange(len(block))
+        trend[start:start + len(block)] = decay * powers * previous + \
+            alpha * powers * np.cumsum(block / powers)
+        previous = trend[start + len(block) - 1]
+    return trend
+
+
+def as_of(days, dates, values):
+    """
+    Returns the latest value recorded on or before each day, carrying each
+    value forward until the next one (nan before the first). The dates are
+    expected in chronological order.
+    """
+    values = np.asarray(values, dtype=float)
+    latest = np.searchsorted(dates, days, side='right') - 1
+    return np.where(latest >= 0, values[np.maximum(latest, 0)], np.nan)
+
+
+def bodyweight_trend(user, start=None, end=None, period='day',
+                     max_points=None, alpha=WEIGHT_TREND_ALPHA):
+    """
+    Returns (dates, weights, trend) arrays holding the weigh-ins of a user
+    between two optional dates, and their smoothed trend on those dates.
+
+    The trend is smoothed over the whole history day by day, so it is the
+    same however the series is cut. Weigh-ins can be averaged per week or
+    month (with the trend at the end of each period), and daily series are
+    downsampled to at most max_points points.
+    """
+
+    dates, weights = _columns(BodyWeight.objects.filter(user=user),
+        'bodyweight')
+    if not len(dates):
+        return dates, weights, weights
+
+    days = np.arange(dates[0], dates[-1] + 1)
+    trend = exponential_trend(as_of(days, dates, weights), alpha)[
+        (dates - dates[0]).astype(np.int64)]
+
+    keep = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        keep &= dates >= np.datetime64(start, 'D')
+    if end is not None:
+        keep &= dates <= np.datetime64(end, 'D')
+    dates, weights, trend = dates[keep], weights[keep], trend[keep]
+    if not len(dates):
+        return dates, weights, trend
+
+    if period != 'day':
+        periods = period_start(dates, period)
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        ends = np.r_[starts[1:], len(dates)]
+        return (periods[starts],
+                np.add.reduceat(weights, starts) / (ends - starts),
+                trend[ends - 1])
+
+    if max_points is not None:
+        kept = largest_triangle_three_buckets(dates.astype(np.int64),
+            weights, max_points)
+        dates, weights, trend = dates[kept], weights[kept], trend[kept]
+    return dates, weights, trend
+
+
+def energy_balance(calorie_dates, calories, weight_dates, weights,
+                   window=MAINTENANCE_WINDOW, alpha=WEIGHT_TREND_ALPHA):
+    """
+    Aligns the calories eaten and the bodyweights recorded by a user onto
+    one array per day, returning (days, intake, trend, maintenance) arrays.
+
+    - intake is the calories eaten each day, nan on days nothing was logged
+    - trend is the smoothed bodyweight, each day using the latest weigh-in
+      on or before it
+    - maintenance is the estimated calories needed to hold weight: the
+      average intake over the preceding window, corrected by the energy of
+      the trend weight gained or lost over the window. Windows with fewer
+      than half of their days logged are nan.
+
+    The dates are expected in chronological order.
+    """
+
+    calorie_dates = np.asarray(calorie_dates, dtype='datetime64[D]')
+    weight_dates = np.asarray(weight_dates, dtype='datetime64[D]')
+    calories = np.asarray(calories, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if not len(calorie_dates) or not len(weight_dates):
+        empty = np.array([], dtype=float)
+        return np.array([], dtype='datetime64[D]'), empty, empty, empty
+
+    first = min(calorie_dates[0], weight_dates[0])
+    last = max(calorie_dates[-1], weight_dates[-1])
+    days = np.arange(first, last + 1)
+
+    # several meals on one day are added together
+    offsets = (calorie_dates - first).astype(np.int64)
+    logged = np.bincount(offsets, minlength=len(days)) > 0
+    intake = np.where(logged, np.bincount(offsets, weights=calories,
+        minlength=len(days)), np.nan)
+
+    trend = exponential_trend(as_of(days, weight_dates, weights), alpha)
+
+    maintenance = np.full(len(days), np.nan)
+    if len(days) > window:
+        eaten = np.r_[0, np.cumsum(np.nan_to_num(intake))]
+        counted = np.r_[0, np.cumsum(logged)]
+        window_eaten = eaten[window + 1:] - eaten[1:-window]
+        window_days = counted[window + 1:] - counted[1:-window]
+        change = trend[window:] - trend[:-window]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimate = window_eaten / window_days - \
+                change * KCAL_PER_KG / window
+        maintenance[window:] = np.where(window_days * 2 >= window, estimate,
+            np.nan)
+
+    return days, intake, trend, maintenance
+
+
+def user_energy_balance(user, window=MAINTENANCE_WINDOW, start=None):
+    """
+    Returns the energy balance (see energy_balance()) of a single user,
+    read from two column queries, optionally cut to the days from a start
+    date. The balance is calculated over the whole history, so cutting it
+    doesn't change the maintenance estimates.
+    """
+    calorie_dates, calories = _columns(DailyNutrition.objects.filter(
+        user=user), 'calories')
+    weight_dates, weights = _columns(BodyWeight.objects.filter(user=user),
+        'bodyweight')
+    balance = energy_balance(calorie_dates, calories, weight_dates, weights,
+        window)
+    if start is None:
+        return balance
+
+    keep = balance[0] >= np.datetime64(start, 'D')
+    return tuple(series[keep] for series in balance)
+
+
+def energy_balances(window=MAINTENANCE_WINDOW):
+    """
+    Yields (user_id, days, intake, trend, maintenance) tuples for every
+    user who has recorded both meals and bodyweights.
+
+    All users are read with two queries, which are split into each user's
+    series with NumPy, so a nightly recompute doesn't query per user.
+    """
+
+    calorie_users, calorie_dates, calories = _user_columns(
+        DailyNutrition.objects.all(), 'calories')
+    weight_users, weight_dates, weights = _user_columns(
+        BodyWeight.objects.all(), 'bodyweight')
+
+    calorie_slices = _user_slices(calorie_users)
+    for user_id, (start, end) in _user_slices(weight_users).iteritems():
+        if user_id not in calorie_slices:
+            continue
+        calorie_start, calorie_end = calorie_slices[user_id]
+        yield (user_id,) + energy_balance(
+            calorie_dates[calorie_start:calorie_end],
+            calories[calorie_start:calorie_end],
+            weight_dates[start:end], weights[start:end], window)
+
+
+def series(labels, values):
+    """Zips labels and values into a JSON friendly dict, dropping nans."""
+    return dict((label, round(float(value), 1))
+        for label, value in zip(labels, values) if not np.isnan(value))
+
+
+def _columns(queryset, field):
+    """Returns (dates, values) arrays of a queryset in date order."""
+    rows = queryset.order_by('date').values_list('date', field)
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=float)
+    dates, values = zip(*rows)
+    return np.array(dates, dtype='datetime64[D]'), np.array(values,
+        dtype=float)
+
+
+def _user_columns(queryset, field):
+    """Returns (users, dates, values) arrays ordered by user and date."""
+    rows = queryset.order_by('user', 'date').values_list('user', 'date',
+        field)
+    if not rows:
+        return (np.array([], dtype=int), np.array([], dtype='datetime64[D]'),
+                np.array([], dtype=float))
+    users, dates, values = zip(*rows)
+    return (np.array(users, dtype=int), np.array(dates, dtype='datetime64[D]'),
+            np.array(values, dtype=float))
+
+
+def _user_slices(users):
+    """Maps each user id onto the (start, end) of their rows."""
+    ids, starts = np.unique(users, return_index=True)
+    ends = np.r_[starts[1:], len(users)]
+    return dict((int(i), (s, e)) for i, s, e in zip(ids, starts, ends))
@@ -0,0 +1,106 @@
+"""
+Helpers for caching expensive statistics derived from the database.
+
+Values are stored alongside the time they go stale. Once stale the old
+value keeps being served while a single background thread recalculates it,
+so requests never queue up behind an expensive query.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+
+# stale values are kept for this many times their timeout before eviction
+STALE_MULTIPLIER = 4
+
+# how long one process may hold the lock to refresh a stale value
+REFRESH_LOCK_TIMEOUT = 60
+
+
+def cached(key, compute, timeout, background=True):
+    """
+    Returns the cached value for a key, calling compute() to populate it.
+
+    If the value is older than timeout seconds it is still returned, but a
+    refresh is started in a background thread (or inline if the background
+    kwarg is False) by whichever request first notices it has gone stale.
+    """
+
+    entry = cache.get(key)
+    if entry is None:
+        return _store(key, compute, timeout)
+
+    expires, value = entry
+    if expires < time.time() and cache.add(_lock_key(key), True,
+                                           REFRESH_LOCK_TIMEOUT):
+        if background:
+            refresh = threading.Thread(target=_background_refresh,
+                args=(key, compute, timeout))
+            refresh.daemon = True
+            refresh.start()
+        else:
+            _refresh(key, compute, timeout)
+    return value
+
+
+def invalidate(key):
+    """Removes a cached value, so it is recalculated on the next request."""
+    cache.delete(key)
+
+
+def versioned_key(namespace, *parts):
+    """
+    Builds a cache key which includes the current version of a namespace,
+    so every key in the namespace can be invalidated with bump_version().
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, None)
+        version = cache.get(_version_key(namespace), 1)
+    return ':'.join(str(p) for p in (namespace, version) + parts)
+
+
+def bump_version(namespace):
+    """Invalidates every key built by versioned_key() for a namespace."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # nothing has been cached in the namespace yet
+        pass
+
+
+def _store(key, compute, timeout):
+    """Calculates a value and caches it with its expiry time."""
+    value = compute()
+    cache.set(key, (time.time() + timeout, value),
+        timeout * STALE_MULTIPLIER)
+    return value
+
+
+def _refresh(key, compute, timeout):
+    """Recalculates a stale value, releasing the refresh lock afterwards."""
+    try:
+        _store(key, compute, timeout)
+    finally:
+        cache.delete(_lock_key(key))
+
+
+def _background_refresh(key, compute, timeout):
+    """
+    Recalculates a stale value from a separate thread. Each thread opens
+    its own database connection, which Django won't close for us.
+    """
+    try:
+        _refresh(key, compute, timeout)
+    finally:
+        connection.close()
+
+
+def _lock_key(key):
+    return '{}:refreshing'.format(key)
+
+
+def _version_key(namespace):
+    return '{}:version'.format(namespace)
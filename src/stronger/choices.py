@@ -0,0 +1,149 @@
+"""
+Cached choice lists for the exercise, user and workout search forms.
+
+Lists are built the first time a form needs them, rather than at import
+time, and cached under versioned keys which signals bump whenever the
+underlying rows change. Building a list reads at most
+CHOICES_TYPEAHEAD_THRESHOLD + 1 rows - lists which turn out longer are
+cached as None, and forms fall back to a typeahead backed by the search
+functions below instead of rendering every row into a <select>.
+"""
+
+import itertools
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .cache import bump_version, cached, versioned_key
+
+EXERCISES = 'exercise-choices'
+USERS = 'user-choices'
+
+
+def exercise_choices():
+    """
+    Returns a list of (primary muscle, [(name, name), ...]) groups of
+    exercise choices, or None if there are too many exercises to list.
+    """
+    from .models import Exercise
+
+    def _build():
+        rows = _bounded(Exercise.objects.order_by('primary_muscle', 'name')
+            .values_list('primary_muscle', 'name'))
+        if rows is None:
+            return None
+        return [(muscle, [(name, name) for _, name in exercises])
+            for muscle, exercises in itertools.groupby(rows, itemgetter(0))]
+
+    return _cached(versioned_key(EXERCISES), _build)
+
+
+def exercise_catalogue():
+    """
+    Returns a list of (name, primary muscle) tuples of every exercise. The
+    catalogue is used to validate recorded sets, so unlike the search
+    choices it is never cut short.
+    """
+    from .models import Exercise
+
+    return _cached(exercise_catalogue_version(), lambda: list(
+        Exercise.objects.order_by('primary_muscle', 'name')
+        .values_list('name', 'primary_muscle')))
+
+
+def exercise_catalogue_version():
+    """Returns a string which changes whenever the catalogue changes."""
+    return versioned_key(EXERCISES, 'catalogue')
+
+
+def user_choices():
+    """
+    Returns a list of (id, username) user choices, or None if there are
+    too many users to list.
+    """
+    return _cached(versioned_key(USERS), lambda: _bounded(
+        get_user_model().objects.order_by('username')
+        .values_list('pk', 'username')))
+
+
+def workout_choices(user):
+    """
+    Returns a list of (id, label) choices of the workouts of a user (newest
+    first), or None if they have recorded too many workouts to list.
+    """
+    from .models import Workout
+
+    def _build():
+        rows = _bounded(Workout.objects.filter(user=user)
+            .order_by('-date', '-id').values_list('pk', 'date', 'description'))
+        if rows is None:
+            return None
+        return [(pk, workout_label(date, description))
+            for pk, date, description in rows]
+
+    return _cached(versioned_key(_workouts_namespace(user.pk)), _build)
+
+
+def search_exercises(term):
+    """Returns (name, name) choices of exercises whose name contains term."""
+    from .models import Exercise
+
+    return [(name, name) for name in Exercise.objects
+        .filter(name__icontains=term).order_by('name')
+        .values_list('name', flat=True)[:settings.TYPEAHEAD_RESULTS]]
+
+
+def search_users(term):
+    """Returns (id, username) choices of users whose username starts with
+    term."""
+    return list(get_user_model().objects.filter(username__istartswith=term)
+        .order_by('username').values_list('pk', 'username')
+        [:settings.TYPEAHEAD_RESULTS])
+
+
+def search_workouts(user, term):
+    """
+    Returns (id, label) choices of the workouts of a user whose description
+    contains term, newest first.
+    """
+    from .models import Workout
+
+    return [(pk, workout_label(date, description)) for pk, date, description
+        in Workout.objects.filter(user=user, description__icontains=term)
+        .order_by('-date', '-id').values_list('pk', 'date', 'description')
+        [:settings.TYPEAHEAD_RESULTS]]
+
+
+def workout_label(date, description):
+    return u'{:%Y-%m-%d} {}'.format(date, description)
+
+
+def invalidate_exercise_choices():
+    bump_version(EXERCISES)
+
+
+def invalidate_user_choices():
+    bump_version(USERS)
+
+
+def invalidate_workout_choices(user_id):
+    bump_version(_workouts_namespace(user_id))
+
+
+def _cached(key, build):
+    return cached(key, build, settings.CHOICES_CACHE_TTL)
+
+
+def _bounded(queryset):
+    """
+    Returns the rows of a queryset as a list, or None if it holds more than
+    CHOICES_TYPEAHEAD_THRESHOLD rows.
+    """
+    threshold = settings.CHOICES_TYPEAHEAD_THRESHOLD
+    rows = list(queryset[:threshold + 1])
+    return rows if len(rows) <= threshold else None
+
+
+def _workouts_namespace(user_id):
+    return 'workout-choices:{}'.format(user_id)
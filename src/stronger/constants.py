@@ -19,3 +19,15 @@ MUSCLE_GROUPS = (
     ('Shoulders', 'Shoulders'),
     ('Traps', 'Traps'),
 )
+
+REP_RANGES = ('strength', 'hypertrophy', 'endurance')
+
+BIG_THREE = ('squat', 'deadlift', 'bench')
+
+# the number of days covered by each leaderboard / statistic time window
+TIME_WINDOWS = {
+    'week': 7,
+    'month': 30,
+    'year': 365,
+    'all': None,
+}
@@ -0,0 +1,78 @@
+"""
+Helpers for converting dates and grouping dated rows into days, weeks and
+months.
+
+Rows are grouped in the database by truncating a datetime column to the
+day or month, so at most one row per day is fetched. Weeks start on a
+Monday and are rolled up from the days.
+"""
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def as_date(value):
+    """
+    Returns the date of a date, a datetime (the local day if it is timezone
+    aware) or a string - dates and truncated datetimes are returned as
+    strings by some database backends (SQLite).
+    """
+    if isinstance(value, basestring):
+        value = parse_datetime(value) or parse_date(value)
+    return workout_day(value) if isinstance(value, datetime) else value
+
+
+def workout_day(date):
+    """Returns the (local) day a workout datetime falls on."""
+    if timezone.is_aware(date):
+        date = timezone.localtime(date)
+    return date.date()
+
+
+def with_period(queryset, model, period, field='date'):
+    """
+    Adds a period column to a queryset, holding the model's datetime field
+    truncated (in the current timezone) to the day, or to the month for
+    monthly periods. The model's table must be part of the query.
+    """
+
+    tzname = timezone.get_current_timezone_name() if settings.USE_TZ \
+        else None
+    trunc_sql, trunc_params = connection.ops.datetime_trunc_sql(
+        'month' if period == 'month' else 'day',
+        '{}.{}'.format(connection.ops.quote_name(model._meta.db_table),
+                       connection.ops.quote_name(field)),
+        tzname,
+    )
+    return queryset.extra(select={'period': trunc_sql},
+        select_params=trunc_params)
+
+
+def period_of(truncated, period):
+    """Returns the start of the period a truncated period column is in."""
+    return period_start(as_date(truncated), period)
+
+
+def period_start(day, period):
+    """Returns the first day of the week or month containing a date."""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    elif period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def periods_between(first, last, period):
+    """Yields the start of every period from first to last inclusive."""
+    current = first
+    while current <= last:
+        yield current
+        if period == 'month':
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=7 if period == 'week' else 1)
+
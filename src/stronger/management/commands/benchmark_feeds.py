@@ -0,0 +1,88 @@
+from optparse import make_option
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from stronger.models import Activity, FeedEntry, Friend, Workout
+
+User = get_user_model()
+
+
+class Command(NoArgsCommand):
+    help = ('Measures feed read latency and write amplification with a '
+            'popular user. Everything is rolled back afterwards.')
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--followers', type='int', default=10000,
+            help='Followers of the popular user (default 10000).'),
+        make_option('--activities', type='int', default=10,
+            help='Workouts recorded by each user (default 10).'),
+        make_option('--reads', type='int', default=50,
+            help='Feed reads timed per strategy (default 50).'),
+    )
+
+    def handle_noargs(self, **options):
+        with transaction.atomic():
+            try:
+                self._benchmark(options['followers'], options['activities'],
+                    options['reads'])
+            finally:
+                transaction.set_rollback(True)
+
+    def _benchmark(self, followers, activities, reads):
+        limit = settings.FEED_PUSH_FOLLOWER_LIMIT
+        popular = User.objects.create(username='benchmark-popular')
+        regular = User.objects.create(username='benchmark-regular')
+        User.objects.bulk_create([User(username='benchmark-{}'.format(i))
+            for i in xrange(followers)], batch_size=500)
+        audience = list(User.objects.filter(username__regex=r'^benchmark-\d+$')
+            .values_list('pk', flat=True))
+
+        # everyone follows the popular user, the regular user has as many
+        # followers as can be pushed to
+        Friend.objects.bulk_create(
+            [Friend(user_id=pk, friend=popular) for pk in audience] +
+            [Friend(user_id=pk, friend=regular) for pk in audience[:limit]],
+            batch_size=500)
+        self.stdout.write('{} followers, pushing to at most {}.\n'.format(
+            followers, limit))
+
+        self._write('regular user (pushed)', regular, activities)
+        self._write('popular user (pulled)', popular, activities)
+        with override_settings(FEED_PUSH_FOLLOWER_LIMIT=followers):
+            self._write('popular user (pushed)', popular, activities)
+
+        reader = User.objects.get(pk=audience[0])
+        self._read('hybrid feed', reads,
+            lambda: FeedEntry.objects.feed(reader))
+        self._read('pull feed', reads,
+            lambda: Activity.objects.following_feed(reader))
+
+    def _write(self, label, user, activities):
+        """Records workouts, reporting the time and rows written for each."""
+        entries = FeedEntry.objects.count()
+        started = time.time()
+        for _ in xrange(activities):
+            Workout.objects.create(user=user, date=timezone.now(),
+                description='Benchmark', comments='')
+        elapsed = (time.time() - started) / activities
+        written = (FeedEntry.objects.count() - entries) / float(activities)
+        self.stdout.write('write {:<24} {:>9.2f} ms {:>9.0f} feed rows\n'
+            .format(label, elapsed * 1000, written))
+
+    def _read(self, label, reads, read):
+        """Times reading a page of a feed."""
+        timings = []
+        for _ in xrange(reads):
+            started = time.time()
+            read()
+            timings.append(time.time() - started)
+        timings.sort()
+        self.stdout.write('read  {:<24} {:>9.2f} ms median {:>9.2f} ms p95\n'
+            .format(label, timings[len(timings) // 2] * 1000,
+                    timings[int(len(timings) * 0.95)] * 1000))
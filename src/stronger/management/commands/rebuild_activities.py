@@ -0,0 +1,14 @@
+from django.core.management.base import NoArgsCommand
+
+from stronger.models import Activity, FeedEntry
+
+
+class Command(NoArgsCommand):
+    help = ('Recreates the activities and feeds from the recorded workouts, '
+            'meals and bodyweights.')
+
+    def handle_noargs(self, **options):
+        count = Activity.objects.rebuild()
+        self.stdout.write('Rebuilt {} activities.'.format(count))
+        count = FeedEntry.objects.rebuild()
+        self.stdout.write('Rebuilt {} feed entries.'.format(count))
@@ -0,0 +1,12 @@
+from django.core.management.base import NoArgsCommand
+
+from stronger.models import BodyWeight
+
+
+class Command(NoArgsCommand):
+    help = ('Recalculates the current bodyweight snapshot of every user from '
+            'their recorded bodyweights.')
+
+    def handle_noargs(self, **options):
+        count = BodyWeight.objects.rebuild_current()
+        self.stdout.write('Stored the bodyweights of {} users.'.format(count))
@@ -0,0 +1,14 @@
+from django.core.management.base import NoArgsCommand
+
+from stronger.models import ExerciseRecord, PowerliftingTotal
+
+
+class Command(NoArgsCommand):
+    help = ('Recalculates every ExerciseRecord from the recorded sets, and '
+            'the powerlifting totals derived from them.')
+
+    def handle_noargs(self, **options):
+        count = ExerciseRecord.objects.rebuild()
+        self.stdout.write('Rebuilt {} exercise records.'.format(count))
+        count = PowerliftingTotal.objects.rebuild()
+        self.stdout.write('Rebuilt {} powerlifting totals.'.format(count))
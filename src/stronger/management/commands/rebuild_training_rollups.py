@@ -0,0 +1,11 @@
+from django.core.management.base import NoArgsCommand
+
+from stronger.models import DailyTrainingRollup
+
+
+class Command(NoArgsCommand):
+    help = 'Recalculates every DailyTrainingRollup from the recorded sets.'
+
+    def handle_noargs(self, **options):
+        count = DailyTrainingRollup.objects.rebuild()
+        self.stdout.write('Rebuilt {} daily training rollups.'.format(count))
@@ -0,0 +1,12 @@
+from django.core.management.base import NoArgsCommand
+
+from stronger.models import MaintenanceEstimate
+
+
+class Command(NoArgsCommand):
+    help = ('Recalculates the maintenance calories of every user from their '
+            'calorie and bodyweight history.')
+
+    def handle_noargs(self, **options):
+        count = MaintenanceEstimate.objects.recompute_all()
+        self.stdout.write('Stored {} maintenance estimates.'.format(count))
@@ -0,0 +1,12 @@
+from django.core.management.base import NoArgsCommand
+
+from stronger.models import UserStats
+
+
+class Command(NoArgsCommand):
+    help = ('Recounts the workouts, meals, groups and friends of every user, '
+            'repairing any stats which have drifted.')
+
+    def handle_noargs(self, **options):
+        count = UserStats.objects.reconcile()
+        self.stdout.write('Repaired the stats of {} users.'.format(count))
@@ -1,15 +1,31 @@
+from .activity import ActivityManager
 from .bodyweight import BodyWeightManager
+from .daily_training_rollup import DailyTrainingRollupManager
 from .exercise import ExerciseManager
+from .exercise_record import ExerciseRecordManager
+from .feed_entry import FeedEntryManager
 from .friend import FriendManager
+from .maintenance_estimate import MaintenanceEstimateManager
 from .nutrition import DailyNutritionManager
+from .powerlifting_total import PowerliftingTotalManager
 from .set import SetManager
+from .user_stats import UserStatsManager
 from .workout import WorkoutManager
+from .workout_summary import WorkoutSummaryManager
 
 __all__ = (
+    ActivityManager,
     BodyWeightManager,
+    DailyTrainingRollupManager,
     ExerciseManager,
+    ExerciseRecordManager,
+    FeedEntryManager,
     FriendManager,
+    MaintenanceEstimateManager,
     DailyNutritionManager,
+    PowerliftingTotalManager,
     SetManager,
+    UserStatsManager,
     WorkoutManager,
+    WorkoutSummaryManager,
 )
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Manager, Q
+
+from ..pagination import keyset_page
+from ..timeline import as_datetime
+
+
+class ActivityManager(Manager):
+    """
+    Custom manager for the Activity model. Activities are written as
+    workouts, meals and bodyweights are recorded, and read back a page at a
+    time with keyset pagination.
+    """
+
+    def record(self, instance):
+        """
+        Writes the activity of a newly recorded workout, meal or weight,
+        pushing it into the feeds of the owner's followers.
+        """
+        from ..models import FeedEntry
+
+        followers = FeedEntry.objects.recipients(instance.user_id)
+        activity = self.create(owner_id=instance.user_id,
+            created=activity_date(instance), pushed=followers is not None,
+            **{_target_field(instance): instance})
+        FeedEntry.objects.push(activity, followers or ())
+        return activity
+
+    def move(self, instance):
+        """Keeps the date of an activity in step with an edited record."""
+        from ..models import FeedEntry
+
+        created = activity_date(instance)
+        activities = self.get_queryset().filter(
+            **{_target_field(instance): instance}).exclude(created=created)
+        moved = [(pk, created) for pk in activities.values_list('pk',
+            flat=True)]
+        if moved:
+            activities.update(created=created)
+            FeedEntry.objects.move(moved)
+
+    def feed(self, users=None, before=None, limit=10):
+        """
+        Returns a (activities, cursor) tuple holding a page of the most
+        recent activities, optionally limited to an iterable (or QuerySet)
+        of users, and the cursor of the next (older) page.
+        """
+        activities = self.get_queryset().select_related('owner', 'workout',
+            'nutrition', 'bodyweight')
+        if users is not None:
+            activities = activities.filter(owner__in=users)
+        return keyset_page(activities, 'created', before, limit)
+
+    def following_feed(self, user, before=None, limit=10):
+        """
+        Returns a page of activities by a user and the users they follow,
+        see feed().
+        """
+        from ..models import Friend
+
+        activities = self.get_queryset().select_related('owner', 'workout',
+            'nutrition', 'bodyweight').filter(Q(owner=user) | Q(
+                owner__in=Friend.objects.filter(user=user).values('friend')))
+        return keyset_page(activities, 'created', before, limit)
+
+    def rebuild(self):
+        """
+        Recreates every activity from the recorded workouts, meals and
+        weights, returning the number of activities written.
+        """
+        from ..models import BodyWeight, DailyNutrition, Workout
+
+        activities = []
+        for model in (Workout, DailyNutrition, BodyWeight):
+            for instance in model.objects.iterator():
+                activities.append(self.model(owner_id=instance.user_id,
+                    created=activity_date(instance),
+                    **{_target_field(instance): instance}))
+
+        with transaction.atomic():
+            self.get_queryset().delete()
+            self.bulk_create(activities, batch_size=500)
+        return len(activities)
+
+
+def activity_date(instance):
+    """
+    Returns the datetime an activity is ordered by. Meals and weights are
+    recorded against a day, so they are placed at midnight UTC.
+    """
+    return as_datetime(instance.date)
+
+
+def _target_field(instance):
+    """Returns the name of the Activity field pointing at a record."""
+    return {
+        'workout': 'workout',
+        'dailynutrition': 'nutrition',
+        'bodyweight': 'bodyweight',
+    }[instance._meta.model_name]
@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.db.models import Manager
 
 
@@ -13,3 +14,55 @@ class BodyWeightManager(Manager):
             return self.get_queryset().filter(user=user).latest()
         except self.model.DoesNotExist:
             return None
+
+    def record_current(self, bodyweight):
+        """
+        Stores a saved bodyweight as the current weight of its user, unless
+        they have since recorded a more recent one (e.g. if it is back-dated).
+        """
+        from ..models import CurrentBodyweight
+
+        current, created = CurrentBodyweight.objects.get_or_create(
+            user_id=bodyweight.user_id, defaults={
+                'bodyweight': bodyweight.bodyweight, 'date': bodyweight.date})
+        if not created:
+            CurrentBodyweight.objects.filter(pk=bodyweight.user_id,
+                date__lte=bodyweight.date).update(
+                bodyweight=bodyweight.bodyweight, date=bodyweight.date)
+
+    def refresh_current(self, user_id):
+        """
+        Recalculates the current weight of a user from their bodyweights,
+        e.g. after their latest weight was edited or deleted.
+        """
+        from ..models import CurrentBodyweight
+
+        latest = self.get_queryset().filter(user=user_id).order_by('-date') \
+            .values_list('bodyweight', 'date').first()
+        if latest is None:
+            CurrentBodyweight.objects.filter(pk=user_id).delete()
+        else:
+            CurrentBodyweight.objects.update_or_create(user_id=user_id,
+                defaults={'bodyweight': latest[0], 'date': latest[1]})
+
+    def rebuild_current(self):
+        """
+        Recalculates the current weight of every user, returning the number
+        of users with a bodyweight. Bodyweights are streamed newest first
+        per user, so only the first of each user is used.
+        """
+        from ..models import CurrentBodyweight
+
+        latest = {}
+        for user_id, weight, date in self.get_queryset() \
+                .order_by('user', '-date') \
+                .values_list('user', 'bodyweight', 'date').iterator():
+            latest.setdefault(user_id, (weight, date))
+
+        with transaction.atomic():
+            CurrentBodyweight.objects.all().delete()
+            CurrentBodyweight.objects.bulk_create([CurrentBodyweight(
+                user_id=user_id, bodyweight=weight, date=date)
+                for user_id, (weight, date) in latest.iteritems()],
+                batch_size=500)
+        return len(latest)
@@ -0,0 +1,207 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Manager, Max, Sum
+from django.utils import timezone
+
+from ..cache import cached, invalidate
+from ..constants import BIG_THREE, REP_RANGES
+from ..dates import as_date, workout_day
+
+
+class DailyTrainingRollupManager(Manager):
+    """
+    Custom manager for the DailyTrainingRollup model. Provides the
+    aggregate queries used by the charts, and keeps the rollups in step
+    with the sets users record.
+    """
+
+    def rep_range_breakdown(self, user, start, end):
+        """
+        Counts the number of sets a user performed between two dates which
+        fall into Strength, Hypertrophy and Endurance rep ranges.
+        """
+        totals = self._between(user, start, end).aggregate(
+            *[Sum('{}_sets'.format(r)) for r in REP_RANGES])
+        return dict((r, totals['{}_sets__sum'.format(r)] or 0)
+            for r in REP_RANGES)
+
+    def muscle_breakdown(self, user, start, end):
+        """
+        Returns the number of sets which targeted each primary muscle group
+        in workouts a user recorded between two dates.
+        """
+        return dict(self._between(user, start, end).order_by()
+            .values_list('exercise__primary_muscle').annotate(Sum('sets')))
+
+    def sum_reps(self, user, exercise, since=None):
+        """
+        Counts the number of reps of an exercise performed by a user, either
+        all time or on and after a given date.
+        """
+        rollups = self.get_queryset().filter(user=user, exercise=exercise)
+        if since is not None:
+            rollups = rollups.filter(date__gte=as_date(since))
+        return rollups.aggregate(Sum('reps'))['reps__sum']
+
+    def rep_totals(self, user, exercise, windows):
+        """
+        Counts the reps of an exercise performed by a user all time, and on
+        and after each of the dates in a {name: date} dictionary, returning
+        a dictionary with an 'all_time' key alongside the window names.
+
+        Every window is summed with a conditional aggregate in one query.
+        """
+
+        qn = connection.ops.quote_name
+        names = sorted(windows)
+        columns = ''.join(
+            ', COALESCE(SUM(CASE WHEN {} >= %s THEN {} ELSE 0 END), 0)'.format(
+                qn('date'), qn('reps')) for _ in names)
+        cursor = connection.cursor()
+        cursor.execute(
+            'SELECT COALESCE(SUM({reps}), 0){columns} FROM {table} '
+            'WHERE {user} = %s AND {exercise} = %s'.format(
+                reps=qn('reps'), columns=columns,
+                table=qn(self.model._meta.db_table), user=qn('user_id'),
+                exercise=qn('exercise_id')),
+            [as_date(windows[n]) for n in names] + [user.pk, exercise.pk])
+        return dict(zip(['all_time'] + names, cursor.fetchone()))
+
+    def big_three_progress(self, user):
+        """
+        Returns a dictionary mapping squat, deadlift and bench onto a
+        {date: weight} dictionary of the heaviest weight a user lifted each
+        day they trained the lift.
+
+        The history of all three lifts is read in one query, and cached per
+        user until they record, edit or delete a big three set.
+        """
+
+        def _progress():
+            progress = dict((lift, {}) for lift in BIG_THREE)
+            for lift, day, weight in self.get_queryset().filter(user=user,
+                    exercise__clean_name__in=BIG_THREE) \
+                    .values_list('exercise__clean_name', 'date', 'top_weight'):
+                progress[lift][day.strftime('%Y-%m-%d')] = weight
+            return progress
+
+        return cached(_big_three_key(user.pk), _progress,
+            settings.BIG_THREE_PROGRESS_CACHE_TTL)
+
+    def invalidate_big_three_progress(self, user_id):
+        """Removes the cached big three progress of a user."""
+        invalidate(_big_three_key(user_id))
+
+    def add_sets(self, sets):
+        """Incrementally adds newly recorded sets to the daily rollups."""
+        self._apply(sets, 1)
+
+    def remove_sets(self, sets):
+        """Incrementally removes deleted sets from the daily rollups."""
+        self._apply(sets, -1)
+
+    def rebuild_day(self, user_id, day):
+        """Recalculates the rollups of a user on a given day from scratch."""
+        day_sets = _day_sets(user_id, day).values_list('exercise', 'weight',
+            'reps')
+
+        rollups = {}
+        for exercise_id, weight, reps in day_sets:
+            rollup = rollups.setdefault(exercise_id, self.model(
+                user_id=user_id, date=day, exercise_id=exercise_id))
+            _add_set(rollup, weight, reps, 1)
+
+        with transaction.atomic():
+            self.get_queryset().filter(user=user_id, date=day).delete()
+            self.bulk_create(rollups.values())
+
+    def rebuild(self):
+        """
+        Recalculates every rollup from the recorded sets. Sets are streamed
+        in user order, so only one user's rollups are held in memory.
+        """
+        from ..models import Set
+
+        all_sets = Set.objects.order_by('workout__user').values_list(
+            'workout__user', 'workout__date', 'exercise', 'weight', 'reps')
+
+        count, rollups, current_user = 0, {}, None
+        with transaction.atomic():
+            self.get_queryset().delete()
+            for user_id, date, exercise_id, weight, reps in all_sets.iterator():
+                if user_id != current_user:
+                    self.bulk_create(rollups.values(), batch_size=500)
+                    count += len(rollups)
+                    rollups, current_user = {}, user_id
+
+                key = (workout_day(date), exercise_id)
+                rollup = rollups.setdefault(key, self.model(user_id=user_id,
+                    date=key[0], exercise_id=exercise_id))
+                _add_set(rollup, weight, reps, 1)
+
+            self.bulk_create(rollups.values(), batch_size=500)
+        return count + len(rollups)
+
+    def _apply(self, sets, sign):
+        """
+        Adds or subtracts sets from the rollups they belong to. The heaviest
+        weight can't be subtracted, so it is recalculated if the heaviest set
+        of the day was removed.
+        """
+        from ..models import Workout
+
+        workouts = dict((pk, (user_id, workout_day(date))) for pk, user_id, date
+            in Workout.objects.filter(pk__in=set(s.workout_id for s in sets))
+            .values_list('pk', 'user', 'date'))
+
+        with transaction.atomic():
+            for s in sets:
+                if s.workout_id not in workouts:
+                    continue
+                user_id, day = workouts[s.workout_id]
+                rollup, _ = self.select_for_update().get_or_create(
+                    user_id=user_id, date=day, exercise_id=s.exercise_id)
+                _add_set(rollup, s.weight, s.reps, sign)
+
+                if rollup.sets <= 0:
+                    rollup.delete()
+                    continue
+                if sign < 0 and s.weight >= rollup.top_weight:
+                    rollup.top_weight = _day_sets(user_id, day).filter(
+                        exercise=s.exercise_id).aggregate(Max('weight'))[
+                        'weight__max'] or 0
+                rollup.save()
+
+    def _between(self, user, start, end):
+        return self.get_queryset().filter(user=user,
+            date__range=(as_date(start), as_date(end)))
+
+
+def _big_three_key(user_id):
+    return 'big-three-progress:{}'.format(user_id)
+
+
+def _day_sets(user_id, day):
+    """Returns a QuerySet of the sets a user performed on a given day."""
+    from ..models import Set
+
+    start = timezone.make_aware(datetime.combine(day, time.min),
+        timezone.get_current_timezone())
+    return Set.objects.filter(workout__user=user_id, workout__date__gte=start,
+        workout__date__lt=start + timedelta(days=1))
+
+
+def _add_set(rollup, weight, reps, sign):
+    """Adds (or with a negative sign, subtracts) a set from a rollup."""
+    from ..models.set import rep_range
+
+    rollup.sets += sign
+    rollup.reps += sign * reps
+    rollup.tonnage += sign * weight * reps
+    if sign > 0:
+        rollup.top_weight = max(rollup.top_weight, weight)
+
+    field = '{}_sets'.format(rep_range(reps))
+    setattr(rollup, field, getattr(rollup, field) + sign)
@@ -1,30 +1,37 @@
-from collections import Counter
-import itertools
-from operator import attrgetter
+from datetime import timedelta
 
-from django.db.models import Manager
+from django.conf import settings
+from django.db.models import Count, Manager
+from django.utils import timezone
 
-class ExerciseManager(Manager):
+from ..cache import cached
+from ..constants import TIME_WINDOWS
 
-    def categorise_exercises(self):
-        """Returns a list of exercises grouped by primary muscle attribute."""
-        all_exercises = self.get_queryset().order_by('primary_muscle')
+class ExerciseManager(Manager):
 
-        categorised_exercises = []
-        for bodypart, exercises in itertools.groupby(
-            all_exercises, key=attrgetter("primary_muscle")):
-            categorised_exercises.append(
-                (bodypart, [(exercise, exercise) for exercise in exercises])
-            )
+    def most_popular(self, limit=5, window=None):
+        """
+        Returns a list of (exercise name, set count) tuples for the exercises
+        with the most sets recorded in user workouts.
 
-        return categorised_exercises
+        The optional window kwarg (see TIME_WINDOWS) restricts the count to
+        recent workouts, for example 'week'. Results are cached for
+        POPULAR_EXERCISES_CACHE_TTL seconds.
+        """
+        return cached(
+            'popular-exercises:{}:{}'.format(window or 'all', limit),
+            lambda: self._count_sets(limit, window),
+            settings.POPULAR_EXERCISES_CACHE_TTL,
+        )
 
-    def most_popular(self, limit=5):
-        """Returns the most popular exercises by counting the number of sets
-        recorded in user workouts."""
+    def _count_sets(self, limit, window):
+        """Counts the sets recorded for each exercise in a single query."""
         from ..models import Set
-        exercise_sets = Set.objects.all().select_related(
-            'exercise'
-        ).values_list('exercise__name', flat=True)
 
-        return Counter(exercise_sets).most_common(limit)
+        exercise_sets = Set.objects.all()
+        if TIME_WINDOWS.get(window):
+            exercise_sets = exercise_sets.filter(workout__date__gte=(
+                timezone.now() - timedelta(days=TIME_WINDOWS[window])))
+
+        return list(exercise_sets.order_by().values_list('exercise')
+            .annotate(sets=Count('id')).order_by('-sets', 'exercise')[:limit])
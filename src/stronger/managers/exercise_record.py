@@ -0,0 +1,183 @@
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Manager, Max, Q
+
+
+class ExerciseRecordManager(Manager):
+    """
+    Custom manager for the ExerciseRecord model. Sets are fed in as they
+    are recorded, edited and deleted so each record always points at the
+    heaviest set for its (user, exercise, reps) combination.
+    """
+
+    def records(self, exercise, user=None):
+        """
+        Returns a dictionary where the keys are the reps and the values are
+        ExerciseRecord instances representing the heaviest weight lifted
+        for a given exercise. If no user kwarg is passed, we return the site
+        wide records.
+        """
+
+        exercise_records = self.get_queryset().filter(exercise=exercise) \
+            .select_related('user')
+
+        if user is not None:
+            return dict((r.reps, r) for r in exercise_records.filter(user=user))
+
+        heaviest = exercise_records.order_by().values_list('reps') \
+            .annotate(Max('weight'))
+        if not heaviest:
+            return {}
+
+        site_records = {}
+        holders = exercise_records.filter(reduce(or_, [
+            Q(reps=reps, weight=weight) for reps, weight in heaviest
+        ])).order_by('set')
+        for record in holders:
+            site_records.setdefault(record.reps, record)
+        return site_records
+
+    def record_sets(self, sets):
+        """
+        Updates records with newly recorded sets, returning a list of the
+        records which were created or beaten.
+
+        The existing records of every (user, exercise, reps) combination in
+        the batch are read in one query, and new records are bulk created,
+        so a whole workout costs a handful of statements.
+        """
+
+        owners = self._owners(sets)
+        heaviest = {}
+        for s in sets:
+            key = (owners[s.workout_id], s.exercise_id, s.reps)
+            if key not in heaviest or s.weight > heaviest[key].weight:
+                heaviest[key] = s
+        if not heaviest:
+            return []
+
+        changed, created = [], []
+        with transaction.atomic():
+            existing = dict(((r.user_id, r.exercise_id, r.reps), r) for r in
+                self.select_for_update().filter(reduce(or_, [
+                    Q(user=user_id, exercise=exercise_id, reps=reps)
+                    for user_id, exercise_id, reps in heaviest])))
+
+            for (user_id, exercise_id, reps), s in heaviest.iteritems():
+                record = existing.get((user_id, exercise_id, reps))
+                if record is None:
+                    created.append(self.model(user_id=user_id,
+                        exercise_id=exercise_id, reps=reps, weight=s.weight,
+                        set=s))
+                elif s.weight > record.weight:
+                    record.weight = s.weight
+                    record.set = s
+                    record.save()
+                    changed.append(record)
+            try:
+                with transaction.atomic():
+                    self.bulk_create(created)
+            except IntegrityError:
+                # another request recorded one of these combinations between
+                # our read and insert, so fall back to one row at a time
+                created = self._record_each(created)
+        return changed + created
+
+    def _record_each(self, records):
+        """
+        Saves unsaved records one at a time with get_or_create, keeping the
+        heavier of our set and a record which already exists.
+        """
+        saved = []
+        for new in records:
+            record, created = self.get_or_create(user_id=new.user_id,
+                exercise_id=new.exercise_id, reps=new.reps,
+                defaults={'weight': new.weight, 'set': new.set})
+            if created:
+                saved.append(record)
+            elif new.weight > record.weight:
+                record.weight = new.weight
+                record.set = new.set
+                record.save()
+                saved.append(record)
+        return saved
+
+    def update_sets(self, sets):
+        """
+        Updates records after sets have been edited - records held by the
+        sets are recalculated, as the weight may have dropped or the reps
+        changed, before checking if the new values beat any record.
+        """
+        held = self.get_queryset().filter(set__in=[s.pk for s in sets])
+        return self._recalculate(held) + self.record_sets(sets)
+
+    def forget_sets(self, sets):
+        """
+        Recalculates records after sets have been deleted. By the time this
+        is called the records held by the sets have had their set cleared,
+        so we look for records without a set in the affected combinations.
+        """
+
+        owners = self._owners(sets)
+        keys = [Q(user=owners[s.workout_id], exercise=s.exercise_id,
+                  reps=s.reps) for s in sets if s.workout_id in owners]
+        if not keys:
+            return []
+
+        orphaned = self.get_queryset().filter(reduce(or_, keys),
+            set__isnull=True)
+        return self._recalculate(orphaned)
+
+    def rebuild(self):
+        """Recalculates every record from scratch."""
+        from ..models import Set
+
+        all_sets = Set.objects.order_by('workout__user', 'exercise', 'reps',
+            '-weight', 'id').values_list('workout__user', 'exercise', 'reps',
+            'weight', 'id')
+
+        records, previous = [], None
+        for user_id, exercise_id, reps, weight, set_id in all_sets.iterator():
+            if (user_id, exercise_id, reps) == previous:
+                continue
+            previous = (user_id, exercise_id, reps)
+            records.append(self.model(user_id=user_id, exercise_id=exercise_id,
+                reps=reps, weight=weight, set_id=set_id))
+
+        with transaction.atomic():
+            self.get_queryset().delete()
+            self.bulk_create(records, batch_size=500)
+        return len(records)
+
+    def _recalculate(self, records):
+        """
+        Looks up the heaviest remaining set for each record, deleting any
+        record which no longer has a set to back it. Returns the records
+        which were changed or deleted.
+        """
+        from ..models import Set
+
+        changed = []
+        for record in records:
+            heaviest = Set.objects.filter(workout__user=record.user_id,
+                exercise=record.exercise_id, reps=record.reps) \
+                .order_by('-weight', 'id').first()
+            if heaviest is None:
+                record.delete()
+            elif (heaviest.pk, heaviest.weight) != (record.set_id,
+                                                    record.weight):
+                record.weight = heaviest.weight
+                record.set = heaviest
+                record.save()
+            else:
+                continue
+            changed.append(record)
+        return changed
+
+    def _owners(self, sets):
+        """Maps the workouts the given sets belong to onto their user."""
+        from ..models import Workout
+        return dict(Workout.objects.filter(
+            pk__in=set(s.workout_id for s in sets)
+        ).values_list('pk', 'user'))
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Manager
+
+from .. import timeline
+
+
+class FeedEntryManager(Manager):
+    """
+    Custom manager for the FeedEntry model, implementing a hybrid push/pull
+    feed.
+
+    Activities are pushed into the feeds of every follower when they are
+    recorded, so reading a feed is a single range scan. Pushing to every
+    follower of a popular user is expensive, so the activities of users
+    with more than FEED_PUSH_FOLLOWER_LIMIT followers are only pushed to
+    their owner, and pulled from the Activity table when feeds are read.
+    """
+
+    def recipients(self, owner_id):
+        """
+        Returns a list of the ids of the followers an activity by the owner
+        should be pushed to, or None if they have too many followers and
+        their activities should be pulled instead.
+
+        Popular owners are spotted from their follower count in UserStats,
+        without reading their followers. Stats aren't created here, as this
+        runs while the owner's counters are being adjusted - so the follower
+        query stays bounded in case the count is missing or has drifted.
+        """
+        from ..models import Friend, UserStats
+
+        limit = settings.FEED_PUSH_FOLLOWER_LIMIT
+        counted = UserStats.objects.filter(pk=owner_id) \
+            .values_list('followers', flat=True).first()
+        if counted is not None and counted > limit:
+            return None
+        followers = list(Friend.objects.filter(friend=owner_id)
+            .values_list('user', flat=True)[:limit + 1])
+        return followers if len(followers) <= limit else None
+
+    def push(self, activity, followers=()):
+        """Pushes an activity into the feeds of its owner and followers."""
+        self.bulk_create([self.model(user_id=user_id, activity=activity,
+            created=activity.created) for user_id in
+            set(followers) | set([activity.owner_id])], batch_size=500)
+
+    def move(self, activities):
+        """Keeps the feeds in step with activities which have moved."""
+        for activity_id, created in activities:
+            self.get_queryset().filter(activity=activity_id) \
+                .update(created=created)
+
+    def feed(self, user, before=None, limit=10):
+        """
+        Returns an (activities, cursor) tuple holding a page of the most
+        recent activities by a user and the users they follow, and the
+        cursor of the next (older) page.
+
+        The activities pushed into the user's feed are merged with those
+        pulled from followed users whose activities aren't pushed, each
+        source limited to a page in the database.
+        """
+        from ..models import Activity, Friend
+
+        pushed = self.get_queryset().filter(user=user).select_related(
+            'activity__owner', 'activity__workout', 'activity__nutrition',
+            'activity__bodyweight')
+        pulled = Activity.objects.filter(pushed=False,
+            owner__in=Friend.objects.filter(user=user).values('friend')) \
+            .select_related('owner', 'workout', 'nutrition', 'bodyweight')
+
+        items, cursor = timeline.merge([(pushed, 'created'),
+            (pulled, 'created')], limit, before)
+        return [getattr(item, 'activity', item) for item in items], cursor
+
+    def follow(self, user_id, friend_id):
+        """
+        Backfills the feed of a user with the recent pushed activities of a
+        user they have started following.
+        """
+        from ..models import Activity
+
+        recent = Activity.objects.filter(owner=friend_id, pushed=True) \
+            .order_by('-created')[:settings.FEED_FOLLOW_BACKFILL]
+        existing = set(self.get_queryset().filter(user=user_id,
+            activity__in=[a.pk for a in recent])
+            .values_list('activity', flat=True))
+        self.bulk_create([self.model(user_id=user_id, activity=a,
+            created=a.created) for a in recent if a.pk not in existing])
+
+    def unfollow(self, user_id, friend_id):
+        """Removes the activities of an unfollowed user from a feed."""
+        self.get_queryset().filter(user=user_id,
+            activity__owner=friend_id).delete()
+
+    def rebuild(self):
+        """
+        Recreates every feed from the Activity table, deciding again which
+        users are pushed or pulled. Returns the number of entries written.
+        """
+        from ..models import Activity
+
+        count = 0
+        with transaction.atomic():
+            self.get_queryset().delete()
+            owners = Activity.objects.order_by().values_list('owner',
+                flat=True).distinct()
+            for owner_id in owners:
+                followers = self.recipients(owner_id)
+                activities = Activity.objects.filter(owner=owner_id)
+                activities.update(pushed=followers is not None)
+                entries = len(set(followers or ()) | set([owner_id]))
+                for activity in activities.iterator():
+                    self.push(activity, followers or ())
+                    count += entries
+        return count
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.utils import timezone
+
+from ..cache import bump_version, cached, versioned_key
+from ..constants import TIME_WINDOWS
+
+
+class UserLeaderboardMixin(object):
+    """
+    Adds a most_frequent_users() leaderboard to the manager of a model which
+    users record (for example workouts or meals).
+
+    The counting is done in SQL and the results are cached until the model
+    calls invalidate_leaderboard() - see the signals module.
+    """
+
+    leaderboard_date_field = 'date'
+
+    def most_frequent_users(self, limit=10, window=None):
+        """
+        Returns a list of (user, int) tuples to represent the users 
+        who have recorded the most instances of the model.
+
+        The optional window kwarg (see TIME_WINDOWS) only counts instances
+        recorded recently, for example in the last 'week' or 'month'.
+        """
+        key = versioned_key(self._leaderboard_namespace(), window or 'all',
+            limit)
+        return cached(key, lambda: self._count_users(limit, window),
+            settings.LEADERBOARD_CACHE_TTL)
+
+    def invalidate_leaderboard(self):
+        """Invalidates every cached leaderboard for the model."""
+        bump_version(self._leaderboard_namespace())
+
+    def _count_users(self, limit, window):
+        """Counts the instances recorded by each user in a single query."""
+
+        recorded = self.get_queryset()
+        if TIME_WINDOWS.get(window):
+            since = timezone.now() - timedelta(days=TIME_WINDOWS[window])
+            field = self.model._meta.get_field(self.leaderboard_date_field)
+            if field.get_internal_type() == 'DateField':
+                since = since.date()
+            recorded = recorded.filter(**{
+                '{}__gte'.format(self.leaderboard_date_field): since
+            })
+
+        counts = list(recorded.order_by().values_list('user')
+            .annotate(count=Count('id')).order_by('-count', 'user')[:limit])
+        users = get_user_model().objects.in_bulk([u for u, _ in counts])
+        return [(users[user_id], count) for user_id, count in counts]
+
+    def _leaderboard_namespace(self):
+        return 'leaderboard:{}'.format(self.model._meta.model_name)
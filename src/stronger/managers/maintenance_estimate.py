@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Manager
+
+import numpy as np
+
+
+class MaintenanceEstimateManager(Manager):
+    """
+    Custom manager for the MaintenanceEstimate model, storing the latest
+    maintenance calories calculated by analytics.energy_balance().
+    """
+
+    def for_user(self, user):
+        """Returns the stored estimate of a user, or None."""
+        return self.get_queryset().filter(user=user).first()
+
+    def recompute(self, user):
+        """Recalculates and stores the estimate of a single user."""
+        from .. import analytics
+
+        estimate = self._latest(user.pk,
+            *analytics.user_energy_balance(user))
+        with transaction.atomic():
+            self.get_queryset().filter(user=user).delete()
+            if estimate is not None:
+                estimate.save()
+        return estimate
+
+    def recompute_all(self):
+        """
+        Recalculates the estimates of every user, returning the number of
+        estimates stored. The histories of all users are read with two
+        queries (see analytics.energy_balances).
+        """
+        from .. import analytics
+
+        estimates = [estimate for estimate in
+            (self._latest(*balance) for balance in analytics.energy_balances())
+            if estimate is not None]
+        with transaction.atomic():
+            self.get_queryset().delete()
+            self.bulk_create(estimates, batch_size=500)
+        return len(estimates)
+
+    def _latest(self, user_id, days, intake, trend, maintenance):
+        """Builds an unsaved estimate from the latest maintenance value."""
+        estimated = np.flatnonzero(~np.isnan(maintenance))
+        if not len(estimated):
+            return None
+        latest = estimated[-1]
+        return self.model(user_id=user_id,
+            calories=int(round(maintenance[latest])),
+            trend_weight=round(float(trend[latest]), 1),
+            date=days[latest].tolist())
@@ -1,44 +1,110 @@
-import itertools
-from operator import attrgetter
+from django.db import connection
+from django.db.models import Manager, Sum
 
-from django.db.models import Manager
+from .leaderboard import UserLeaderboardMixin
 
+NUTRIENTS = ('calories', 'protein', 'carbs', 'fats')
 
-class DailyNutritionManager(Manager):
 
-    def most_frequent_users(self, limit=10):
+class DailyNutritionManager(UserLeaderboardMixin, Manager):
+
+    def day_type_averages(self, user, start=None, end=None):
+        """
+        Returns the average calories and macros a user consumed on workout
+        days and rest days, optionally between two dates, as a dictionary
+        with 'workout_days' and 'rest_days' keys. Each holds the number of
+        days recorded alongside the averages.
+
+        Workout days are the days with a DailyTrainingRollup, so each day is
+        matched by a plain date lookup. The meals of each day are summed in
+        a subquery, and both averages come back from a single grouped query.
+        """
+
+        qn = connection.ops.quote_name
+        conditions, params = self._window(user, start, end)
+        cursor = connection.cursor()
+        cursor.execute(
+            'SELECT d.workout_day, COUNT(*), {averages} FROM ('
+            'SELECT {workout_day} AS workout_day, {sums} '
+            'FROM {nutrition} n WHERE {conditions} '
+            'GROUP BY n.{user}, n.{date}) d '
+            'GROUP BY d.workout_day'.format(
+                workout_day=self._workout_day_sql(),
+                sums=', '.join('SUM(n.{0}) AS {0}'.format(qn(field))
+                    for field in NUTRIENTS),
+                nutrition=qn(self.model._meta.db_table),
+                conditions=conditions, user=qn('user_id'), date=qn('date'),
+                averages=', '.join('AVG(d.{})'.format(qn(field))
+                    for field in NUTRIENTS)),
+            params)
+
+        averages = {
+            'workout_days': _averages(0),
+            'rest_days': _averages(0),
+        }
+        for row in cursor.fetchall():
+            key = 'workout_days' if row[0] else 'rest_days'
+            averages[key] = _averages(row[1], row[2:])
+        return averages
+
+    def summary(self, user, start, end):
         """
-        Returns a list of (user, int) tuples to represent the users 
-        who have recorded the most nutritional data.
+        Returns the nutrition of a user between two dates, as a dictionary
+        holding the calories consumed each day, the total macros, and the
+        average calories and macros on workout and rest days (see
+        day_type_averages).
 
-        A optional kwarg is to denotate the limit of users returned.
+        The meals of each day are summed by one grouped query, so the cost
+        depends on the number of days rather than the number of meals.
         """
 
-        all_nutrition = self.get_queryset().all().order_by('user')
-        nutrition_count = []
-        for user, nutrition in itertools.groupby(all_nutrition, attrgetter('user')):
-            if len(nutrition_count) < limit:
-                nutrition_count.append((user, len([i for i in nutrition])))
-            else:
-                break
+        days = list(self.get_queryset().filter(user=user,
+            date__range=(start, end)).order_by().values('date')
+            .annotate(*[Sum(field) for field in NUTRIENTS]))
+
+        summary = self.day_type_averages(user, start, end)
+        summary.update({
+            'calories': dict((day['date'], day['calories__sum'])
+                for day in days),
+            'macros': dict((field, sum(day[field + '__sum'] for day in days))
+                for field in NUTRIENTS[1:]),
+        })
+        return summary
+
+    def _window(self, user, start, end):
+        """
+        Returns the SQL conditions and params selecting the meals of a user
+        between two optional dates.
+        """
+        qn = connection.ops.quote_name
+        conditions, params = ['n.{} = %s'.format(qn('user_id'))], [user.pk]
+        if start is not None:
+            conditions.append('n.{} >= %s'.format(qn('date')))
+            params.append(start)
+        if end is not None:
+            conditions.append('n.{} <= %s'.format(qn('date')))
+            params.append(end)
+        return ' AND '.join(conditions), params
+
+    def _workout_day_sql(self):
+        """
+        Returns SQL which is 1 if a meal (aliased n) was eaten on a workout
+        day and 0 otherwise, matched against DailyTrainingRollup's dates.
+        """
+        from ..models import DailyTrainingRollup
 
-        return nutrition_count
+        qn = connection.ops.quote_name
+        return ('CASE WHEN EXISTS (SELECT 1 FROM {rollup} r '
+                'WHERE r.{user} = n.{user} AND r.{date} = n.{date}) '
+                'THEN 1 ELSE 0 END'.format(
+                    rollup=qn(DailyTrainingRollup._meta.db_table),
+                    user=qn('user_id'), date=qn('date')))
 
-    def workout_day_nutrition(self, user, calories_only=False):
-        from ..models import Workout
-        wko_dates = Workout.objects.workout_dates(user)
-        wko_data = self.get_queryset().filter(user=user, date__in=wko_dates)
 
-        if wko_data and calories_only:
-            wko_data = sum([n.calories for n in wko_data]) / len(wko_data)
-        
-        return wko_data
+def _averages(days, values=None):
+    """Builds the averages of one kind of day, rounded to whole numbers."""
+    averages = dict((field, int(round(value or 0)))
+        for field, value in zip(NUTRIENTS, values or (0,) * len(NUTRIENTS)))
+    averages['days'] = days
+    return averages
 
-    def rest_day_nutrition(self, user, calories_only=False):
-        from ..models import Workout
-        wko_dates = Workout.objects.workout_dates(user)
-        rest_data = self.get_queryset().filter(user=user).exclude(date__in=wko_dates)
-        if rest_data and calories_only:
-            rest_data = sum([n.calories for n in rest_data]) / len(rest_data)
-        
-        return rest_data
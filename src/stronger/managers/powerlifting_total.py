@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models import Manager, Max
+
+from ..constants import BIG_THREE
+
+
+class PowerliftingTotalManager(Manager):
+    """
+    Custom manager for the PowerliftingTotal model, providing leaderboard
+    queries and keeping totals in step with the exercise records.
+    """
+
+    def leaderboard(self, limit=10, offset=0, users=None):
+        """
+        Returns a page of the users with the largest totals. The optional
+        users kwarg restricts the leaderboard (for example to friends).
+        """
+        totals = self.get_queryset().filter(total__gt=0) \
+            .select_related('user').order_by('-total', 'user')
+        if users is not None:
+            totals = totals.filter(user__in=users)
+        return totals[offset:offset + limit]
+
+    def rank(self, user, users=None):
+        """
+        Returns the position of a user on the leaderboard, or None if they
+        have not recorded any of the big three lifts.
+        """
+        try:
+            total = self.get_queryset().get(user=user, total__gt=0).total
+        except self.model.DoesNotExist:
+            return None
+
+        ahead = self.get_queryset().filter(total__gt=total)
+        if users is not None:
+            ahead = ahead.filter(user__in=users)
+        return ahead.count() + 1
+
+    def update_from_records(self, records):
+        """
+        Refreshes the totals of users whose Squat, Deadlift or Bench records
+        have changed. Other records are ignored.
+        """
+        from ..models import Exercise
+
+        exercise_names = set(r.exercise_id for r in records)
+        if not exercise_names:
+            return
+
+        big_three = set(Exercise.objects.filter(name__in=exercise_names,
+            clean_name__in=BIG_THREE).values_list('name', flat=True))
+        for user_id in set(r.user_id for r in records
+                           if r.exercise_id in big_three):
+            self.refresh(user_id)
+
+    def refresh(self, user_id):
+        """Recalculates the total of a single user from their records."""
+        from ..models import ExerciseRecord
+
+        heaviest = dict(ExerciseRecord.objects.filter(user=user_id,
+            exercise__clean_name__in=BIG_THREE).order_by()
+            .values_list('exercise__clean_name').annotate(Max('weight')))
+        if not heaviest:
+            self.get_queryset().filter(user=user_id).delete()
+            return None
+
+        total = self.model(user_id=user_id, **self._lifts(heaviest))
+        total.save()
+        return total
+
+    def rebuild(self):
+        """Recalculates the totals of every user from their records."""
+        from ..models import ExerciseRecord
+
+        heaviest = {}
+        for user_id, lift, weight in ExerciseRecord.objects.filter(
+                exercise__clean_name__in=BIG_THREE).order_by() \
+                .values_list('user', 'exercise__clean_name') \
+                .annotate(Max('weight')):
+            heaviest.setdefault(user_id, {})[lift] = weight
+
+        totals = [self.model(user_id=user_id, **self._lifts(lifts))
+            for user_id, lifts in heaviest.iteritems()]
+        with transaction.atomic():
+            self.get_queryset().delete()
+            self.bulk_create(totals, batch_size=500)
+        return len(totals)
+
+    def _lifts(self, heaviest):
+        """Builds the model kwargs from a {lift: heaviest weight} dict."""
+        lifts = dict((lift, heaviest.get(lift, 0)) for lift in BIG_THREE)
+        lifts['total'] = sum(lifts.values())
+        return lifts
@@ -1,44 +1,119 @@
-import itertools
-from operator import attrgetter, itemgetter
+from django.db import transaction
+from django.db.models import Count, Manager, Max
 
-from django.db.models import Manager
+from ..constants import BIG_THREE, REP_RANGES
+from ..dates import period_of, with_period, workout_day
 
 
 class SetManager(Manager):
 
-    def get_biggest_totals(self, user=None, friends=False):
+    def record_workout_sets(self, workout, sets):
+        """
+        Saves the unsaved sets of a newly recorded workout, returning the
+        saved sets.
+
+        The sets are written with one bulk insert, which doesn't send the
+        post_save signals that maintain the workout summary, training
+        rollups, exercise records and powerlifting totals one set at a
+        time - so they are updated once for the whole batch instead.
+        """
+        from ..models import (
+            DailyTrainingRollup,
+            ExerciseRecord,
+            PowerliftingTotal,
+            WorkoutSummary,
+        )
+        from ..models.exercise import clean_exercise_name
+
+        with transaction.atomic():
+            self.bulk_create(sets)
+            # bulk_create doesn't set primary keys, which records need
+            saved = list(self.get_queryset().filter(workout=workout)
+                .select_related('exercise').order_by('id'))
+
+            WorkoutSummary.objects.rebuild(workout.pk, saved)
+            DailyTrainingRollup.objects.rebuild_day(workout.user_id,
+                workout_day(workout.date))
+            PowerliftingTotal.objects.update_from_records(
+                ExerciseRecord.objects.record_sets(saved))
+
+        if any(clean_exercise_name(s.exercise_id) in BIG_THREE
+               for s in saved):
+            DailyTrainingRollup.objects.invalidate_big_three_progress(
+                workout.user_id)
+        return saved
+
+    def recorded_between(self, user, start, end):
+        """
+        Returns a QuerySet of sets performed by a user in workouts recorded
+        between the start and end dates.
+        """
+        return self.get_queryset().filter(workout__user=user,
+            workout__date__range=(start, end))
+
+    def rep_range_breakdown(self, user, start, end):
+        """
+        Counts the number of sets a user performed between two dates which
+        fall into Strength, Hypertrophy and Endurance rep ranges.
+
+        The sets are grouped by reps in a single query, so the cost does not
+        depend on the number of workouts in the period.
+        """
+        from ..models.set import rep_range
+
+        breakdown = dict.fromkeys(REP_RANGES, 0)
+        rep_counts = self.recorded_between(user, start, end).order_by() \
+            .values_list('reps').annotate(Count('id'))
+        for reps, count in rep_counts:
+            breakdown[rep_range(reps)] += count
+        return breakdown
+
+    def muscle_breakdown(self, user, start, end):
+        """
+        Returns the number of sets which targeted each primary muscle group
+        in workouts a user recorded between two dates.
+        """
+        return dict(self.recorded_between(user, start, end).order_by()
+            .values_list('exercise__primary_muscle').annotate(Count('id')))
+
+    def heaviest_per_period(self, user, exercise, reps, start=None, end=None,
+                            period='day'):
+        """
+        Returns a list of (date, weight) tuples holding the heaviest weight a
+        user lifted for a number of reps of an exercise in each day, week or
+        month, oldest first.
+
+        The sets are grouped in the database by truncating the workout date,
+        so at most one row per day (or month) is fetched. Weeks start on a
+        Monday and are rolled up from the daily maxima.
+        """
+        from ..models import Workout
+
+        exercise_sets = self.get_queryset().filter(workout__user=user,
+            exercise=exercise, reps=reps)
+        if start is not None:
+            exercise_sets = exercise_sets.filter(workout__date__gte=start)
+        if end is not None:
+            exercise_sets = exercise_sets.filter(workout__date__lte=end)
+
+        heaviest = {}
+        for truncated, weight in with_period(exercise_sets, Workout, period) \
+                .order_by().values_list('period').annotate(Max('weight')):
+            day = period_of(truncated, period)
+            heaviest[day] = max(weight, heaviest.get(day, weight))
+        return sorted(heaviest.iteritems())
+
+    def get_biggest_totals(self, user=None, friends=False, limit=10):
         """
         Returns the a iterable of tuples denoting users with the largest 
         1RM total - by combining Squat, Deadlift and Bench lifts.
 
-        Each tuple contains (user, squat, deadlift, bench) data.
-        """
-
-        exercises = ['squat', 'deadlift', 'bench']
-
-        if user and friends:
-            all_sets = self.get_queryset().filter(exercise__clean_name__in=exercises,
-                workout__user__in=friends).order_by('workout__user')
-        else:
-            all_sets = self.get_queryset().filter(exercise__clean_name__in=exercises) \
-                .order_by('workout__user')
-
-        total_counter = {}
-        for user, sets in itertools.groupby(all_sets, attrgetter('workout.user')):
-            total_counter[user] = {}
-            for exercise, exercise_sets in itertools.groupby(sorted(sets,
-              key=attrgetter('exercise.clean_name')),
-              attrgetter('exercise.clean_name')):
-                total_counter[user][exercise] = \
-                    max([s.weight for s in exercise_sets])
-
-        # now get the totals
-        totals_list = []
-        for k, v in total_counter.iteritems():
-            totals_list.append([k, sum(v.values())])
-
-        sorted_totals = sorted(totals_list, key=itemgetter(1), reverse=True)
-        return [(t[0], t[1],
-            total_counter[t[0]].get('squat', 0),
-            total_counter[t[0]].get('deadlift', 0),
-            total_counter[t[0]].get('bench', 0)) for t in sorted_totals]
+        Each tuple contains (user, total, squat, deadlift, bench) data. If
+        a user and an iterable of their friends is passed, only the friends
+        are ranked.
+        """
+        from ..models import PowerliftingTotal
+
+        users = friends if user and friends is not False else None
+        return [(t.user, t.total, t.squat, t.deadlift, t.bench) for t in
+            PowerliftingTotal.objects.leaderboard(limit=limit, users=users)]
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Count, F, Manager
+
+COUNTERS = ('following', 'followers', 'groups', 'meals', 'workouts')
+
+
+class UserStatsManager(Manager):
+    """
+    Custom manager for the UserStats model. Counters are adjusted in the
+    database with F expressions, so concurrent updates can't overwrite
+    each other.
+    """
+
+    def for_user(self, user_id):
+        """
+        Returns the stats of a user, counting them from scratch if the user
+        has no stats yet.
+        """
+        try:
+            return self.get_queryset().get(pk=user_id)
+        except self.model.DoesNotExist:
+            stats, _ = self.get_or_create(user_id=user_id,
+                defaults=self._counts(user_id))
+            return stats
+
+    def adjust(self, user_id, counter, amount):
+        """
+        Adds an amount (which may be negative) to a counter of a user. Users
+        without stats are left alone - they are counted from scratch when
+        their stats are next read.
+        """
+        self.get_queryset().filter(pk=user_id).update(
+            **{counter: F(counter) + amount})
+
+    def reconcile(self):
+        """
+        Recounts the stats of every user, rewriting any which have drifted
+        or are missing, and returns the number of stats repaired. Each
+        counter is counted for every user with one grouped query.
+        """
+        from ..models import StrongerUser
+
+        counts = dict((pk, dict.fromkeys(COUNTERS, 0)) for pk in
+            StrongerUser.objects.values_list('pk', flat=True))
+        for counter, queryset, field in _sources():
+            for user_id, count in queryset.order_by().values_list(field) \
+                    .annotate(Count('id')):
+                counts[user_id][counter] = count
+
+        stored = dict((row[0], dict(zip(COUNTERS, row[1:]))) for row in
+            self.get_queryset().values_list('pk', *COUNTERS))
+        drifted = [pk for pk, user_counts in counts.iteritems()
+            if stored.get(pk) != user_counts]
+
+        with transaction.atomic():
+            self.get_queryset().filter(pk__in=drifted).delete()
+            self.bulk_create([self.model(user_id=pk, **counts[pk])
+                for pk in drifted], batch_size=500)
+        return len(drifted)
+
+    def _counts(self, user_id):
+        """Counts every counter of a single user."""
+        return dict((counter, queryset.filter(**{field: user_id}).count())
+            for counter, queryset, field in _sources())
+
+
+def _sources():
+    """
+    Returns (counter, queryset, user field) tuples describing the rows
+    each counter counts.
+    """
+    from ..models import DailyNutrition, Friend, GroupMember, Workout
+
+    return (
+        ('following', Friend.objects.all(), 'user'),
+        ('followers', Friend.objects.all(), 'friend'),
+        ('groups', GroupMember.objects.all(), 'user'),
+        ('meals', DailyNutrition.objects.all(), 'user'),
+        ('workouts', Workout.objects.all(), 'user'),
+    )
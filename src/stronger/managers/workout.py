@@ -1,11 +1,17 @@
-from datetime import date, timedelta
-import itertools
-from operator import attrgetter, itemgetter
+from collections import defaultdict
+from datetime import timedelta
 
-from django.db.models import Manager
+from django.conf import settings
+from django.db.models import Count, Manager, Prefetch
+from django.utils import timezone
 
+from ..cache import cached
+from ..dates import period_of, period_start, periods_between, with_period
+from ..pagination import keyset_page
+from .leaderboard import UserLeaderboardMixin
 
-class WorkoutManager(Manager):
+
+class WorkoutManager(UserLeaderboardMixin, Manager):
     """
     Custom manager for the Workout model class - adding a range of methods 
     which could be considered class methods.
@@ -19,58 +25,91 @@ class WorkoutManager(Manager):
 
         return [w.date.date() for w in self.get_queryset().filter(user=user)]
 
-    def most_frequent_users(self, limit=10):
+    def get_workouts_including_exercise(self, user, exercise):
         """
-        Returns a list of (user, int) tuples to represent the users 
-        who have recorded the most workouts.
+        Returns a queryset of workout instances that a particular user has 
+        logged, which include a specified exercise.
 
-        A optional kwarg is to denotate the limit of users returned.
+        The sets are matched with a single semi-join, rather than probing
+        each workout in turn.
         """
+        from ..models import Set
+
+        return self.get_queryset().filter(user=user, pk__in=Set.objects.filter(
+            exercise=exercise, workout__user=user).values('workout')
+        ).order_by('date')
 
-        all_workouts = self.get_queryset().all().order_by('user')
-        workout_count = []
-        for user, workouts in itertools.groupby(all_workouts, attrgetter('user')):
-            if len(workout_count) < limit:
-                workout_count.append((user, len([i for i in workouts])))
-            else:
-                break
+    def get_workouts_with_exercise_sets(self, user, exercise):
+        """
+        Returns the same workouts as get_workouts_including_exercise(), with
+        the sets of the exercise performed in each workout prefetched into an
+        exercise_sets attribute (two queries in total).
+        """
+        from ..models import Set
 
-        return sorted(workout_count, key=itemgetter(1), reverse=True)
+        return self.get_workouts_including_exercise(user, exercise) \
+            .prefetch_related(Prefetch('set',
+                queryset=Set.objects.filter(exercise=exercise).order_by('id'),
+                to_attr='exercise_sets'))
 
-    def get_workouts_including_exercise(self, user, exercise):
+    def page_including_exercise(self, user, exercise, before=None, limit=10):
         """
-        Returns a queryset of workout instances that a particular user has 
-        logged, which include a specified exercise.
+        Returns a (workouts, cursor) tuple holding a page of the most recent
+        workouts a user logged which include an exercise, and the cursor of
+        the next (older) page or None if this is the last page.
+
+        Pages are keyset paginated on (date, id), so fetching a page costs
+        the same however far back it is.
+        """
+
+        return keyset_page(self.get_workouts_including_exercise(user,
+            exercise).select_related('user'), 'date', before, limit)
+
+    def workouts_per_period(self, user=None, start=None, end=None,
+                            period='month'):
+        """
+        Returns a list of (date, int) tuples counting the workouts recorded
+        in each day, week or month between two dates, oldest first. Periods
+        without any workouts are included with a count of zero.
+
+        The workouts are grouped in the database by truncating their date,
+        so only one row per day (or month) is returned. Weeks start on a
+        Monday and are rolled up from the daily counts.
         """
 
-        workouts = self.get_queryset().filter(user=user).order_by('date')
-        return [w for w in workouts if w.includes_exercise(exercise)]
+        workouts = self.get_queryset().filter(date__range=(start, end))
+        if user:
+            workouts = workouts.filter(user=user)
+
+        counts = defaultdict(int)
+        for truncated, count in with_period(workouts, self.model, period) \
+                .order_by().values_list('period').annotate(Count('id')):
+            counts[period_of(truncated, period)] += count
+
+        first = period_start(timezone.localtime(start).date()
+            if timezone.is_aware(start) else start.date(), period)
+        last = period_start(timezone.localtime(end).date()
+            if timezone.is_aware(end) else end.date(), period)
+        return [(p, counts[p]) for p in periods_between(first, last, period)]
 
     def average_workouts_per_month(self, user=None, history=365):
         """
-        Returns an iterable denoting the average number of workouts recorded 
-        each month.
+        Returns a list of (date, int) tuples denoting the number of workouts
+        recorded each month.
 
         By default this method returns data for the last 365 days and includes 
-        all users.
+        all users. The site wide series is cached, as it covers every workout
+        on the site, under a key including the current month so it is not
+        served a month behind.
         """
 
-        days_back = history
-        end_date = date.today()
-        start_date = end_date - timedelta(days=int(days_back))
+        end_date = timezone.now()
+        start_date = end_date - timedelta(days=int(history))
 
         if user:
-            workouts = self.get_queryset().filter(user=user,
-                date__range=(start_date, end_date)).order_by('-date')
-        else:
-            workouts = self.get_queryset().filter(date__range=(
-                start_date, end_date)).order_by('-date')
-
-        temp_counter = {}
-        for m, wko in itertools.groupby(workouts, attrgetter('date.month')):
-            temp_counter[m] = len([w for w in wko])
-        for i in xrange(1, 13):
-            if i not in temp_counter:
-                temp_counter[i] = 0
-        return [v for k, v in sorted(temp_counter.iteritems(),
-            key=itemgetter(0))]
+            return self.workouts_per_period(user, start_date, end_date)
+
+        return cached('workouts-per-month:{}:{:%Y-%m}'.format(history,
+            end_date),
+            lambda: self.workouts_per_period(None, start_date, end_date),
+            settings.SITE_STATISTICS_CACHE_TTL)
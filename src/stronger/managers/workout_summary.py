@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models import Manager
+
+
+class WorkoutSummaryManager(Manager):
+    """
+    Custom manager for the WorkoutSummary model, responsible for keeping
+    each summary in step with the sets recorded in the workout.
+    """
+
+    def for_workout(self, workout):
+        """
+        Returns the summary of a workout, building it from the recorded sets
+        if it does not exist yet (for example workouts logged before
+        summaries were introduced).
+        """
+        try:
+            return workout.summary
+        except self.model.DoesNotExist:
+            return self.rebuild(workout.pk)
+
+    def add_sets(self, workout_id, sets):
+        """Incrementally adds newly recorded sets to a workout summary."""
+        with transaction.atomic():
+            summary, _ = self.select_for_update().get_or_create(
+                workout_id=workout_id)
+            summary.apply_sets(sets, self._muscles(sets))
+            summary.save()
+        return summary
+
+    def remove_sets(self, workout_id, sets):
+        """
+        Incrementally removes deleted sets from a workout summary. If the
+        summary has already gone (the whole workout is being deleted) there
+        is nothing to do.
+        """
+        with transaction.atomic():
+            try:
+                summary = self.select_for_update().get(workout_id=workout_id)
+            except self.model.DoesNotExist:
+                return None
+            summary.apply_sets(sets, self._muscles(sets), sign=-1)
+            summary.save()
+        return summary
+
+    def rebuild(self, workout_id, sets=None):
+        """
+        Recalculates a workout summary from scratch. The sets of the workout
+        are read unless they are passed in, with their exercises selected.
+        """
+        from ..models import Set
+
+        if sets is None:
+            sets = list(Set.objects.filter(workout_id=workout_id)
+                .select_related('exercise').order_by('id'))
+        muscles = dict((s.exercise_id, s.exercise.primary_muscle) for s in sets)
+
+        summary = self.model(workout_id=workout_id)
+        summary.apply_sets(sets, muscles)
+        summary.save()
+        return summary
+
+    def _muscles(self, sets):
+        """Maps the exercises performed in the given sets to their muscle."""
+        from ..models import Exercise
+        return dict(Exercise.objects.filter(
+            name__in=set(s.exercise_id for s in sets)
+        ).values_list('name', 'primary_muscle'))
@@ -1,25 +1,43 @@
+from .activity import Activity
 from .bodyweight import BodyWeight
+from .current_bodyweight import CurrentBodyweight
+from .daily_training_rollup import DailyTrainingRollup
 from .exercise import Exercise
+from .exercise_record import ExerciseRecord
+from .feed_entry import FeedEntry
 from .goal import Goal
 from .friend import Friend
 from .group import Group
 from .group_member import GroupMember
+from .maintenance_estimate import MaintenanceEstimate
 from .nutrition import DailyNutrition
+from .powerlifting_total import PowerliftingTotal
 from .set import Set
 from .user import StrongerUser
+from .user_stats import UserStats
 from .workout import Workout
+from .workout_summary import WorkoutSummary
 
 __all__ = (
+    Activity,
     BodyWeight,
+    CurrentBodyweight,
+    DailyTrainingRollup,
     Exercise,
+    ExerciseRecord,
+    FeedEntry,
     Goal,
     Friend,
     Group,
     GroupMember,
+    MaintenanceEstimate,
     DailyNutrition,
+    PowerliftingTotal,
     Set,
     StrongerUser,
+    UserStats,
     Workout,
+    WorkoutSummary,
 )
 
 import stronger.signals
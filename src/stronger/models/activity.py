@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import models
+
+from ..managers import ActivityManager
+
+
+class Activity(models.Model):
+    """
+    An entry in the activity feeds - written when a user records a
+    workout, meal or bodyweight, and pointing back at the record.
+
+    Feeds read a page of these rows (see ActivityManager) rather than
+    merging every workout, meal and bodyweight recorded on the site.
+    """
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    created = models.DateTimeField()
+    workout = models.ForeignKey('stronger.Workout', null=True,
+        related_name='+')
+    nutrition = models.ForeignKey('stronger.DailyNutrition', null=True,
+        related_name='+')
+    bodyweight = models.ForeignKey('stronger.BodyWeight', null=True,
+        related_name='+')
+    # whether the activity was pushed into the feeds of the owner's
+    # followers, or has to be pulled when their feeds are read
+    pushed = models.BooleanField(default=True)
+
+    objects = ActivityManager()
+
+    class Meta:
+        index_together = (('owner', 'created'),)
+        verbose_name_plural = 'activities'
+
+    def __unicode__(self):
+        return "{} by {} at {}".format(self.target.newsfeed_category(),
+            self.owner_id, self.created)
+
+    @property
+    def target(self):
+        """
+        Returns the workout, meal or bodyweight the activity represents,
+        sharing the owner so rendering the feed doesn't look the user up
+        again for every row.
+        """
+        target = self.workout or self.nutrition or self.bodyweight
+        target.user = self.owner
+        return target
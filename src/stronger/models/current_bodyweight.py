@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.db import models
+
+
+class CurrentBodyweight(models.Model):
+    """
+    The latest bodyweight recorded by a user, so reading a user's weight
+    costs one primary key lookup.
+
+    The snapshot is kept in step by signals as bodyweights are saved and
+    deleted, and rebuilt by the rebuild_current_bodyweights management
+    command. It is kept off the user row so saving a user (e.g. from the
+    settings form) can't write back a weight read earlier in the request.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+        related_name='+')
+    bodyweight = models.IntegerField()
+    date = models.DateField()
+
+    def __unicode__(self):
+        return "{} is {}".format(self.user_id, self.bodyweight)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import models
+
+from ..managers import DailyTrainingRollupManager
+
+
+class DailyTrainingRollup(models.Model):
+    """
+    The training volume of a user for one exercise on one day, aggregated
+    from the sets they recorded. Rollups are maintained as sets are saved
+    and deleted, so charts can read a handful of compact rows rather than
+    scanning every set in a user's history.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    date = models.DateField()
+    exercise = models.ForeignKey('stronger.Exercise', related_name='+')
+    sets = models.IntegerField(default=0)
+    reps = models.IntegerField(default=0)
+    tonnage = models.FloatField(default=0)
+    top_weight = models.FloatField(default=0)
+    strength_sets = models.IntegerField(default=0)
+    hypertrophy_sets = models.IntegerField(default=0)
+    endurance_sets = models.IntegerField(default=0)
+
+    objects = DailyTrainingRollupManager()
+
+    class Meta:
+        unique_together = ('user', 'date', 'exercise')
+        index_together = (('user', 'exercise', 'date'),)
+        ordering = ('date',)
+
+    def __unicode__(self):
+        return "{} sets of {} by {} on {}".format(self.sets, self.exercise_id,
+            self.user_id, self.date)
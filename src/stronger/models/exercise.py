@@ -1,6 +1,4 @@
 from datetime import datetime
-import itertools
-from operator import attrgetter
 
 from django.conf import settings
 from django.db import models
@@ -45,42 +43,30 @@ class Exercise(models.Model):
 
     def records(self, user=None):
         """
-        Returns a dictionary where the keys are the reps and the values are a
-        set representing the heaviest amount of of weight lifted for a given
-        exercise. If no user kwarg is passed, we return the site wide records.
+        Returns a dictionary where the keys are the reps and the values are
+        ExerciseRecord instances representing the heaviest amount of weight
+        lifted for a given exercise. If no user kwarg is passed, we return
+        the site wide records.
         """
-        exercise_sets = self.set.filter(exercise=self).order_by('reps')
-        if user:
-            exercise_sets.filter(workout__user=user)
-
-        exercise_records = {}
-        for reps, sets in itertools.groupby(exercise_sets, attrgetter('reps')):
-            exercise_records[reps] = max(sets, key=attrgetter('weight'))
-
-        return exercise_records
+        from . import ExerciseRecord
+        return ExerciseRecord.objects.records(self, user)
 
     def sum_reps(self, user, time_limit=None):
         """Count the number of reps performed during a given period by a user."""
-        if time_limit is None:
-            exercise_sets = self.set.filter(
-                exercise=self,
-                workout__user=user,
-            )
-        else:
-            exercise_sets = self.set.filter(
-                exercise=self,
-                workout__user=user,
-                workout__date__gt=time_limit,
-            )
-        return exercise_sets.aggregate(models.Sum('reps'))['reps__sum']
+        from . import DailyTrainingRollup
+        return DailyTrainingRollup.objects.sum_reps(user, self, time_limit)
 
     def _clean_exercise_name(self):
-        """
-        Creates a database friendly version of the exercise name, in lower 
-        case without whitespace. This is used as part of the URI design.
+        """See clean_exercise_name()."""
+        return clean_exercise_name(self.name)
 
-        For example the name 'Military Press' would be transformed into 
-        militarypress.
-        """
 
-        return ''.join(self.name.split()).lower()
+def clean_exercise_name(name):
+    """
+    Creates a database friendly version of an exercise name, in lower
+    case without whitespace. This is used as part of the URI design.
+
+    For example the name 'Military Press' would be transformed into
+    militarypress.
+    """
+    return ''.join(name.split()).lower()
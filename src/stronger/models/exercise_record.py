@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import models
+
+from ..managers import ExerciseRecordManager
+
+
+class ExerciseRecord(models.Model):
+    """
+    The heaviest weight a user has lifted for a number of reps of a given
+    exercise, alongside the set which achieved it.
+
+    Records are maintained as sets are recorded (see ExerciseRecordManager)
+    so looking them up does not depend on the size of the Set table.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    exercise = models.ForeignKey('stronger.Exercise', related_name='+')
+    reps = models.IntegerField()
+    weight = models.FloatField()
+    set = models.ForeignKey('stronger.Set', null=True, related_name='+',
+        on_delete=models.SET_NULL)
+
+    objects = ExerciseRecordManager()
+
+    class Meta:
+        unique_together = ('user', 'exercise', 'reps')
+        index_together = (('exercise', 'reps', 'weight'),)
+
+    def __unicode__(self):
+        return "{} - {} x {} by {}".format(self.exercise_id, self.weight,
+            self.reps, self.user_id)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import models
+
+from ..managers import FeedEntryManager
+
+
+class FeedEntry(models.Model):
+    """
+    An activity pushed into the feed of a user, either their own activity
+    or that of a user they follow.
+
+    Activities of users with more followers than FEED_PUSH_FOLLOWER_LIMIT
+    are not pushed, and are instead pulled when feeds are read (see
+    FeedEntryManager).
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    activity = models.ForeignKey('stronger.Activity', related_name='+')
+    # copied from the activity so feeds can be read from a single index
+    created = models.DateTimeField()
+
+    objects = FeedEntryManager()
+
+    class Meta:
+        unique_together = ('user', 'activity')
+        index_together = (('user', 'created'),)
+        verbose_name_plural = 'feed entries'
+
+    def __unicode__(self):
+        return "{} in the feed of {}".format(self.activity_id, self.user_id)
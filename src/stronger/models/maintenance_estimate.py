@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import models
+
+from ..managers import MaintenanceEstimateManager
+
+
+class MaintenanceEstimate(models.Model):
+    """
+    The latest estimate of the calories a user needs to eat to maintain
+    their bodyweight, derived from their calorie and bodyweight history
+    (see analytics.energy_balance). Estimates are recomputed nightly.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+        related_name='+')
+    calories = models.IntegerField()
+    trend_weight = models.FloatField()
+    date = models.DateField()
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = MaintenanceEstimateManager()
+
+    def __unicode__(self):
+        return "{} kcal for {} on {}".format(self.calories, self.user_id,
+            self.date)
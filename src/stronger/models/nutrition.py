@@ -18,6 +18,9 @@ class DailyNutrition(models.Model):
 
     objects = DailyNutritionManager()
 
+    class Meta:
+        index_together = (('user', 'date'),)
+
     def __unicode__(self):
         return "{}".format(self.id)
 
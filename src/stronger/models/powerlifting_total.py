@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import models
+
+from ..managers import PowerliftingTotalManager
+
+
+class PowerliftingTotal(models.Model):
+    """
+    The heaviest Squat, Deadlift and Bench lifted by a user, combined into
+    a powerlifting total. Totals are kept up to date as exercise records are
+    beaten, so leaderboards can be read with indexed queries.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+        related_name='+')
+    squat = models.FloatField(default=0)
+    deadlift = models.FloatField(default=0)
+    bench = models.FloatField(default=0)
+    total = models.FloatField(default=0, db_index=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = PowerliftingTotalManager()
+
+    class Meta:
+        ordering = ('-total',)
+
+    def __unicode__(self):
+        return "{} has a {} kg total".format(self.user_id, self.total)
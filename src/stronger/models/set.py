@@ -3,6 +3,18 @@ from django.db import models
 from ..managers import SetManager
 
 
+def rep_range(reps):
+    """
+    Classifies a number of reps as a Strength, Hypertrophy or Endurance
+    set.
+    """
+    if reps <= 5:
+        return 'strength'
+    elif reps <= 12:
+        return 'hypertrophy'
+    return 'endurance'
+
+
 class Set(models.Model):
     """
     Each set is performed as part of one workout, but each workout 
@@ -21,9 +33,4 @@ class Set(models.Model):
 
     @property
     def rep_range(self):
-        if self.reps <=5:
-            return 'strength'
-        elif self.reps <=12:
-            return 'hypertrophy'
-        elif self.reps >=13:
-            return 'endurance'
+        return rep_range(self.reps)
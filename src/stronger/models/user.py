@@ -25,34 +25,47 @@ class StrongerUser(AbstractUser):
 
     @property
     def bodyweight(self):
-        """Returns the most recent bodyweight instance for the user."""
-        from . import BodyWeight
-        return BodyWeight.objects.current_bodyweight(self)
+        """
+        Returns the most recent weight recorded by the user (in kg), or None.
+        The weight is read from its snapshot once per instance.
+        """
+        if not hasattr(self, '_bodyweight'):
+            from . import CurrentBodyweight
+            self._bodyweight = CurrentBodyweight.objects.filter(pk=self.pk) \
+                .values_list('bodyweight', flat=True).first()
+        return self._bodyweight
 
     def bodyweight_history(self):
         """Returns all bodyweight records relating to the user."""
         from . import BodyWeight
         return BodyWeight.objects.get_bodyweight_history(self)
 
+    @property
+    def stats(self):
+        """
+        Returns the denormalized statistics of the user, which are read
+        once per instance.
+        """
+        if not hasattr(self, '_stats'):
+            from . import UserStats
+            self._stats = UserStats.objects.for_user(self.pk)
+        return self._stats
+
     def count_following(self):
         """Returns the number of other users the user is following."""
-        from . import Friend
-        return Friend.objects.following(self).count()
+        return self.stats.following
 
     def count_followers(self):
         """Returns the number of followers the user has."""
-        from . import Friend
-        return Friend.objects.followers(self).count()
+        return self.stats.followers
 
     def count_groups(self):
         """Returns the number of groups a user is a member of."""
-        from . import GroupMember
-        return GroupMember.objects.filter(user=self.id).count()
+        return self.stats.groups
 
     def count_meals(self):
         """Returns the number of meals a user has recorded."""
-        from . import DailyNutrition
-        return DailyNutrition.objects.filter(user=self.id).count()
+        return self.stats.meals
 
     def count_photos(self):
         """Returns the number of photos a user has uploaded."""
@@ -60,5 +73,4 @@ class StrongerUser(AbstractUser):
 
     def count_workouts(self):
         """Returns the number of workouts a user has recorded."""
-        from . import Workout
-        return Workout.objects.filter(user=self).count()
+        return self.stats.workouts
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import models
+
+from ..managers import UserStatsManager
+
+
+class UserStats(models.Model):
+    """
+    Denormalized counts of the workouts, meals, groups and friends of a
+    user, so profile and sidebar statistics cost one primary key lookup.
+
+    The counters are adjusted by signals as rows are created and deleted,
+    and repaired by the reconcile_user_stats management command.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+        related_name='+')
+    following = models.IntegerField(default=0)
+    followers = models.IntegerField(default=0)
+    groups = models.IntegerField(default=0)
+    meals = models.IntegerField(default=0)
+    workouts = models.IntegerField(default=0)
+
+    objects = UserStatsManager()
+
+    class Meta:
+        verbose_name_plural = 'user stats'
+
+    def __unicode__(self):
+        return "Stats for {}".format(self.user_id)
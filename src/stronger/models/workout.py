@@ -4,7 +4,6 @@ from operator import attrgetter
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.db import models
-from django.db.models import Q
 
 from ..managers import WorkoutManager
 
@@ -19,6 +18,9 @@ class Workout(models.Model):
 
     objects = WorkoutManager()
 
+    class Meta:
+        index_together = (('user', 'date'),)
+
     def __unicode__(self):
         return "{}".format(self.id)
 
@@ -40,8 +42,7 @@ class Workout(models.Model):
         Returns a boolean to indicate if an exercise was performed during a 
         specified workout.
         """
-        return True if self.set.filter(Q(workout=self) | \
-            Q(exercise=exercise)) else False
+        return self.set.filter(exercise=exercise).exists()
 
     def newsfeed_category(self):
         """
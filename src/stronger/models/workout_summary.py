@@ -0,0 +1,107 @@
+import json
+
+from django.db import models
+
+from ..constants import REP_RANGES
+from ..managers import WorkoutSummaryManager
+from .set import rep_range
+
+
+class WorkoutSummary(models.Model):
+    """
+    Denormalised totals for a single workout, kept up to date as sets are
+    recorded so the workout charts can be drawn from one row.
+
+    The per muscle and per exercise breakdowns are stored as JSON mappings
+    of {name: {rep_range: set_count}}, and the timeline as a JSON list of
+    [set_id, exercise_name, reps] triples in the order they were recorded.
+    """
+
+    workout = models.OneToOneField('stronger.Workout', primary_key=True,
+        related_name='summary')
+    set_count = models.IntegerField(default=0)
+    tonnage = models.FloatField(default=0)
+    strength = models.IntegerField(default=0)
+    hypertrophy = models.IntegerField(default=0)
+    endurance = models.IntegerField(default=0)
+    muscle_breakdown = models.TextField(default='{}')
+    exercise_breakdown = models.TextField(default='{}')
+    set_timeline = models.TextField(default='[]')
+
+    objects = WorkoutSummaryManager()
+
+    def __unicode__(self):
+        return "Summary of workout {}".format(self.workout_id)
+
+    def apply_sets(self, sets, exercises, sign=1):
+        """
+        Adds (or with a negative sign, removes) the given sets to the
+        summary totals. The exercises kwarg maps exercise names to their
+        primary muscle.
+        """
+
+        muscles = json.loads(self.muscle_breakdown)
+        breakdown = json.loads(self.exercise_breakdown)
+        timeline = json.loads(self.set_timeline)
+
+        for s in sets:
+            reps_range = rep_range(s.reps)
+            muscle = exercises.get(s.exercise_id, '')
+
+            self.set_count += sign
+            self.tonnage += sign * s.weight * s.reps
+            setattr(self, reps_range, getattr(self, reps_range) + sign)
+
+            for counter, key in ((muscles, muscle),
+                                 (breakdown, s.exercise_id)):
+                ranges = counter.setdefault(key, dict.fromkeys(REP_RANGES, 0))
+                ranges[reps_range] += sign
+                if not any(ranges.values()):
+                    del counter[key]
+
+            if sign > 0:
+                timeline.append([s.pk, s.exercise_id, s.reps])
+            else:
+                timeline = [t for t in timeline if t[0] != s.pk]
+
+        self.muscle_breakdown = json.dumps(muscles)
+        self.exercise_breakdown = json.dumps(breakdown)
+        self.set_timeline = json.dumps(timeline)
+
+    def timeline(self):
+        """Returns a list of exercise (name, reps) tuples."""
+        return [(name, reps) for _, name, reps in json.loads(self.set_timeline)]
+
+    def rep_ranges(self):
+        """
+        Returns the number of sets which fall into Strength, Hypertrophy
+        and Endurance rep ranges.
+        """
+        return dict((r, getattr(self, r)) for r in REP_RANGES)
+
+    def primary_muscles_targeted(self):
+        """Returns the number of sets which targeted each primary muscle."""
+        return dict((muscle, sum(ranges.values())) for muscle, ranges
+            in json.loads(self.muscle_breakdown).iteritems())
+
+    def rep_ranges_per_muscle(self):
+        """Returns the rep range breakdown for each primary muscle."""
+        return self._rep_ranges_per('muscles', self.muscle_breakdown)
+
+    def rep_ranges_per_exercise(self):
+        """Returns the rep range breakdown for each exercise."""
+        return self._rep_ranges_per('exercises', self.exercise_breakdown)
+
+    def _rep_ranges_per(self, label, breakdown):
+        """
+        Transforms a stored breakdown into the parallel lists expected by
+        the workout charts, ordered by name.
+        """
+
+        data = dict((r, []) for r in REP_RANGES)
+        data[label] = []
+        for name, ranges in sorted(json.loads(breakdown).iteritems()):
+            data[label].append(name)
+            for r in REP_RANGES:
+                data[r].append(ranges[r])
+        return data
@@ -0,0 +1,62 @@
+"""
+Keyset pagination helpers.
+
+Pages are ordered newest first on a (datetime, id) pair, and each page
+ends with a cursor encoding the position of its last row. The next page
+is fetched by filtering on rows before that position, so a page costs the
+same however far back it is - unlike OFFSET based pagination.
+"""
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+CURSOR_DATE_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def keyset_page(queryset, date_field, before=None, limit=10):
+    """
+    Returns a (rows, cursor) tuple holding a page of a queryset ordered by
+    date_field and id (newest first), starting before the position of the
+    before cursor. The cursor of the next page is None on the last page.
+    """
+
+    queryset = queryset.order_by('-{}'.format(date_field), '-id')
+
+    position = decode_cursor(before)
+    if position is not None:
+        date, pk = position
+        queryset = queryset.filter(
+            Q(**{'{}__lt'.format(date_field): date}) |
+            Q(**{date_field: date, 'id__lt': pk}))
+
+    page = list(queryset[:limit + 1])
+    if len(page) > limit:
+        last = page[limit - 1]
+        return page[:limit], encode_cursor(getattr(last, date_field), last.pk)
+    return page, None
+
+
+def encode_cursor(date, pk):
+    """Encodes a (datetime, id) position as a URL safe cursor."""
+    if timezone.is_aware(date):
+        date = timezone.localtime(date, timezone.utc)
+    return '{}_{}'.format(date.strftime(CURSOR_DATE_FORMAT), pk)
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (datetime, id) position encoded by encode_cursor(), or None
+    if the cursor is missing or malformed.
+    """
+    try:
+        date, pk = cursor.split('_')
+        date = datetime.strptime(date, CURSOR_DATE_FORMAT)
+        pk = int(pk)
+    except (AttributeError, ValueError):
+        return None
+    if settings.USE_TZ:
+        date = timezone.make_aware(date, timezone.utc)
+    return date, pk
@@ -135,5 +135,24 @@ INTERNAL_IPS = ('127.0.0.1',)
 
 GITHUB_URL = 'https://github.com/dannymilsom/stronger'
 
+# how long (in seconds) site wide statistics are cached before refreshing
+POPULAR_EXERCISES_CACHE_TTL = 60 * 15
+LEADERBOARD_CACHE_TTL = 60 * 60
+SITE_STATISTICS_CACHE_TTL = 60 * 60 * 6
+BIG_THREE_PROGRESS_CACHE_TTL = 60 * 60 * 24
+CHOICES_CACHE_TTL = 60 * 60 * 24
+
+# search forms with more choices than this use a typeahead instead of
+# rendering every choice into a <select>
+CHOICES_TYPEAHEAD_THRESHOLD = 500
+# how many matches a typeahead search returns
+TYPEAHEAD_RESULTS = 20
+
+# activities of users with more followers than this are pulled into feeds
+# when they are read, rather than pushed into every follower's feed
+FEED_PUSH_FOLLOWER_LIMIT = 1000
+# how many recent activities are added to a feed when following a user
+FEED_FOLLOW_BACKFILL = 50
+
 TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
 
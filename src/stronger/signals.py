@@ -1,14 +1,34 @@
 from django.conf import settings
 from django.db.models import signals
 from django.db import IntegrityError
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils.translation import ugettext as _
 from django.utils.text import get_text_list
 
 from rest_framework.authtoken.models import Token
 
-from .models import StrongerUser
+from . import choices
+from .constants import BIG_THREE
+from .dates import workout_day
+from .models import (
+    Activity,
+    BodyWeight,
+    DailyNutrition,
+    DailyTrainingRollup,
+    Exercise,
+    ExerciseRecord,
+    FeedEntry,
+    Friend,
+    GroupMember,
+    PowerliftingTotal,
+    Set,
+    StrongerUser,
+    UserStats,
+    Workout,
+    WorkoutSummary,
+)
+from .models.exercise import clean_exercise_name
 
 @receiver(post_save, sender=StrongerUser)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
@@ -18,6 +38,231 @@ def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
 
+@receiver(post_save, sender=Set)
+def update_workout_summary(sender, instance=None, created=False, raw=False,
+                           **kwargs):
+    """
+    Add newly recorded sets to the workout summary. Edited sets could have
+    changed in any way, so the summary is rebuilt instead.
+    """
+    if raw:
+        return
+    if created:
+        WorkoutSummary.objects.add_sets(instance.workout_id, [instance])
+    else:
+        WorkoutSummary.objects.rebuild(instance.workout_id)
+
+@receiver(post_delete, sender=Set)
+def remove_from_workout_summary(sender, instance=None, **kwargs):
+    """Remove deleted sets from the workout summary."""
+    WorkoutSummary.objects.remove_sets(instance.workout_id, [instance])
+
+@receiver(post_save, sender=Set)
+def update_exercise_records(sender, instance=None, created=False, raw=False,
+                            **kwargs):
+    """
+    Check if a recorded or edited set beats the existing record, updating
+    the powerlifting total if a big three record changed.
+    """
+    if raw:
+        return
+    if created:
+        changed = ExerciseRecord.objects.record_sets([instance])
+    else:
+        changed = ExerciseRecord.objects.update_sets([instance])
+    PowerliftingTotal.objects.update_from_records(changed)
+
+@receiver(post_delete, sender=Set)
+def remove_from_exercise_records(sender, instance=None, **kwargs):
+    """Recalculate any record which was held by a deleted set."""
+    changed = ExerciseRecord.objects.forget_sets([instance])
+    PowerliftingTotal.objects.update_from_records(changed)
+
+@receiver(post_save, sender=DailyNutrition)
+@receiver(post_save, sender=Workout)
+def invalidate_leaderboard(sender, instance=None, created=False, **kwargs):
+    """
+    Invalidate the cached most frequent user leaderboards when a workout or
+    meal is recorded.
+    """
+    if created:
+        sender.objects.invalidate_leaderboard()
+
+@receiver(post_delete, sender=DailyNutrition)
+@receiver(post_delete, sender=Workout)
+def invalidate_leaderboard_on_delete(sender, instance=None, **kwargs):
+    """Invalidate the cached leaderboards when a workout or meal is deleted."""
+    sender.objects.invalidate_leaderboard()
+
+@receiver(post_save, sender=Set)
+def update_training_rollups(sender, instance=None, created=False, raw=False,
+                            **kwargs):
+    """
+    Add newly recorded sets to the daily training rollups. Edited sets
+    could have changed in any way, so their day is rebuilt instead.
+    """
+    if raw:
+        return
+    if created:
+        DailyTrainingRollup.objects.add_sets([instance])
+    else:
+        workout = instance.workout
+        DailyTrainingRollup.objects.rebuild_day(workout.user_id,
+            workout_day(workout.date))
+
+@receiver(post_delete, sender=Set)
+def remove_from_training_rollups(sender, instance=None, **kwargs):
+    """Remove deleted sets from the daily training rollups."""
+    DailyTrainingRollup.objects.remove_sets([instance])
+
+@receiver(pre_save, sender=Workout)
+def remember_workout_date(sender, instance=None, raw=False, **kwargs):
+    """Keep track of the date of edited workouts, see move_training_rollups."""
+    if instance.pk is not None and not raw:
+        instance._previous_date = Workout.objects.filter(pk=instance.pk) \
+            .values_list('date', flat=True).first()
+
+@receiver(post_save, sender=Workout)
+def move_training_rollups(sender, instance=None, created=False, **kwargs):
+    """
+    Rebuild the training rollups of both days if the date of a workout is
+    changed, as its sets now belong to a different day.
+    """
+    previous = getattr(instance, '_previous_date', None)
+    if created or previous is None:
+        return
+
+    previous_day, day = workout_day(previous), workout_day(instance.date)
+    if previous_day != day:
+        DailyTrainingRollup.objects.rebuild_day(instance.user_id, previous_day)
+        DailyTrainingRollup.objects.rebuild_day(instance.user_id, day)
+        DailyTrainingRollup.objects.invalidate_big_three_progress(
+            instance.user_id)
+
+@receiver(post_save, sender=Set)
+@receiver(post_delete, sender=Set)
+def invalidate_big_three_progress(sender, instance=None, raw=False, **kwargs):
+    """
+    Invalidate the cached big three progress of a user when they record,
+    edit or delete a squat, deadlift or bench set.
+    """
+    if raw or clean_exercise_name(instance.exercise_id) not in BIG_THREE:
+        return
+    user_id = Workout.objects.filter(pk=instance.workout_id) \
+        .values_list('user', flat=True).first()
+    if user_id is not None:
+        DailyTrainingRollup.objects.invalidate_big_three_progress(user_id)
+
+@receiver(post_save, sender=BodyWeight)
+@receiver(post_save, sender=DailyNutrition)
+@receiver(post_save, sender=Workout)
+def record_activity(sender, instance=None, created=False, raw=False,
+                    **kwargs):
+    """
+    Add newly recorded workouts, meals and weights to the activity feeds,
+    keeping the feed date in step when they are edited.
+    """
+    if raw:
+        return
+    if created:
+        Activity.objects.record(instance)
+    else:
+        Activity.objects.move(instance)
+
+@receiver(post_save, sender=Friend)
+def backfill_feed(sender, instance=None, created=False, raw=False, **kwargs):
+    """Add the recent activities of a newly followed user to a feed."""
+    if created and not raw:
+        FeedEntry.objects.follow(instance.user_id, instance.friend_id)
+
+@receiver(post_delete, sender=Friend)
+def clear_feed(sender, instance=None, **kwargs):
+    """Remove the activities of an unfollowed user from a feed."""
+    FeedEntry.objects.unfollow(instance.user_id, instance.friend_id)
+
+@receiver(post_save, sender=DailyNutrition)
+@receiver(post_save, sender=Friend)
+@receiver(post_save, sender=GroupMember)
+@receiver(post_save, sender=Workout)
+def increment_user_stats(sender, instance=None, created=False, raw=False,
+                         **kwargs):
+    """Count newly recorded workouts, meals, groups and friends."""
+    if created and not raw:
+        _adjust_user_stats(instance, 1)
+
+@receiver(post_delete, sender=DailyNutrition)
+@receiver(post_delete, sender=Friend)
+@receiver(post_delete, sender=GroupMember)
+@receiver(post_delete, sender=Workout)
+def decrement_user_stats(sender, instance=None, **kwargs):
+    """Stop counting deleted workouts, meals, groups and friends."""
+    _adjust_user_stats(instance, -1)
+
+def _adjust_user_stats(instance, amount):
+    """Adjusts the stats counters a row is counted by."""
+    if isinstance(instance, Friend):
+        UserStats.objects.adjust(instance.user_id, 'following', amount)
+        UserStats.objects.adjust(instance.friend_id, 'followers', amount)
+    elif isinstance(instance, GroupMember):
+        UserStats.objects.adjust(instance.user_id, 'groups', amount)
+    elif isinstance(instance, DailyNutrition):
+        UserStats.objects.adjust(instance.user_id, 'meals', amount)
+    else:
+        UserStats.objects.adjust(instance.user_id, 'workouts', amount)
+
+@receiver(pre_save, sender=BodyWeight)
+def remember_bodyweight_date(sender, instance=None, raw=False, **kwargs):
+    """
+    Keep track of the date of edited bodyweights, see
+    update_current_bodyweight.
+    """
+    if instance.pk is not None and not raw:
+        instance._previous_date = BodyWeight.objects.filter(pk=instance.pk) \
+            .values_list('date', flat=True).first()
+
+@receiver(post_save, sender=BodyWeight)
+def update_current_bodyweight(sender, instance=None, created=False,
+                              raw=False, **kwargs):
+    """
+    Store a newly recorded bodyweight as the current weight of its user if
+    it is their latest.
+    Edited bodyweights may have been moved back in time, so the current
+    weight is recalculated instead.
+    """
+    if raw:
+        return
+    if created or getattr(instance, '_previous_date', None) == instance.date:
+        BodyWeight.objects.record_current(instance)
+    else:
+        BodyWeight.objects.refresh_current(instance.user_id)
+
+@receiver(post_delete, sender=BodyWeight)
+def remove_current_bodyweight(sender, instance=None, **kwargs):
+    """Recalculate the current weight of a user when a bodyweight is deleted."""
+    BodyWeight.objects.refresh_current(instance.user_id)
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_choices(sender, **kwargs):
+    """Invalidate the cached exercise search choices."""
+    choices.invalidate_exercise_choices()
+
+@receiver(post_save, sender=StrongerUser)
+@receiver(post_delete, sender=StrongerUser)
+def invalidate_user_choices(sender, update_fields=None, **kwargs):
+    """
+    Invalidate the cached user search choices, unless only the last login
+    time of a user changed.
+    """
+    if update_fields is None or set(update_fields) != set(['last_login']):
+        choices.invalidate_user_choices()
+
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+def invalidate_workout_choices(sender, instance=None, **kwargs):
+    """Invalidate the cached workout search choices of a user."""
+    choices.invalidate_workout_choices(instance.user_id)
+
 def check_unique_together(sender, **kwargs):
     """
     Check models unique_together manually. Django enforced unique together 
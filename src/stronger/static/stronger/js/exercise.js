@@ -96,6 +96,45 @@
                         }]
                     });
 
+                }
+                else if (['exercise-e1rm'].indexOf(chart_id) >= 0) {
+
+                    var toSeries = function(points) {
+                        var series = [];
+                        for (i in points) {
+                            var dt = new Date(i);
+                            series.push([Date.UTC(dt.getUTCFullYear(),
+                                         dt.getUTCMonth(), dt.getUTCDate()),
+                                         points[i]]);
+                        }
+                        return series.sort();
+                    };
+
+                    var chart_options = $.extend({}, line_chart, {
+                        title: {
+                            text: 'Estimated 1RM'
+                        },
+                        xAxis: {
+                            type: 'datetime'
+                        },
+                        yAxis: {
+                            title: {
+                                text: 'Weight (kg)'
+                            }
+                        },
+                        legend: {
+                            enabled: true
+                        },
+                        series: [{
+                            name: 'Estimated 1RM',
+                            data: toSeries(data['estimated'])
+                        },
+                        {
+                            name: 'Best Estimated 1RM',
+                            data: toSeries(data['rolling-best'])
+                        }]
+                    });
+
                 }
                 else if ((['exercise-records'].indexOf(chart_id) >= 0)) {
 
@@ -139,7 +139,7 @@
 
             res = $.ajax({
                 method: 'GET',
-                url: '/api/bodyweight?user=' + data_from_django['user_id'],
+                url: '/ajax/bodyweight/' + data_from_django['username'] + '/',
                 cache: false
             });
 
@@ -161,13 +161,15 @@
         },
         _drawBodyweightChart: function(data){
 
-            // parse and sort the data
-            bw_chart_data = [];
-            for (var i=0; i < data.length; i++) {
-                var dt = new Date(data[i]['date']);
-                bw_chart_data.push([Date.UTC(dt.getUTCFullYear(), dt.getUTCMonth(),
-                                    dt.getUTCDate()), data[i]['bodyweight']]);
-            }
+            var toSeries = function(points) {
+                var series = [];
+                for (var i=0; i < points.length; i++) {
+                    var dt = new Date(points[i][0]);
+                    series.push([Date.UTC(dt.getUTCFullYear(), dt.getUTCMonth(),
+                                 dt.getUTCDate()), points[i][1]]);
+                }
+                return series;
+            };
 
             // render the chart
             $('#bw-chart').highcharts($.extend({}, line_chart_variable_dates, {
@@ -186,7 +188,11 @@
                 },
                 series: [{
                     name: 'Bodyweight',
-                    data: bw_chart_data
+                    data: toSeries(data['bodyweight'])
+                },
+                {
+                    name: 'Trend',
+                    data: toSeries(data['trend'])
                 }]
             }));
 
@@ -10,6 +10,7 @@
         prepareDOM: function() {
 
             this.hideInputs();
+            this.loadExercises();
 
         },
         hideInputs: function() {
@@ -18,6 +19,35 @@
                                   .not(":nth-child(5n+1)")
                                   .addClass("hidden");
 
+        },
+        loadExercises: function() {
+        /*
+            The exercise selects are rendered without options, so fetch the
+            exercise catalogue once (revalidated with its ETag) and copy the
+            options into every select, keeping any selected exercise
+        */
+
+            res = $.ajax({
+                method: 'GET',
+                url: '/ajax/exercise-catalogue/',
+                dataType: 'json'
+            });
+
+            res.done(function(data) {
+                var options = '';
+                for (var i=0; i < data['exercises'].length; i++) {
+                    options += $('<option>').val(data['exercises'][i][0])
+                                            .text(data['exercises'][i][0])
+                                            .prop('outerHTML');
+                }
+
+                $(".workout-exercise").each(function() {
+                    var selected = $(this).val();
+                    $(this).find("option[value!='']").remove();
+                    $(this).append(options).val(selected);
+                });
+            });
+
         },
         bindListeners: function() {
 
@@ -13,6 +13,7 @@
             this.prepareRegistrationDialog();
             this.prepareLoginDialog();
             this.prepareAjax();
+            this.prepareTypeaheads();
 
         },
         changeBackground: function() {
@@ -78,6 +79,32 @@
                 }
             });
 
+        },
+        prepareTypeaheads: function() {
+        /*
+            Search fields with too many choices to list are rendered as text
+            inputs, which search their typeahead URL as the user types
+        */
+
+            $("input[data-typeahead-url]").each(function() {
+                var url = $(this).data('typeahead-url');
+                $(this).select2({
+                    placeholder: $(this).attr('placeholder'),
+                    minimumInputLength: 1,
+                    ajax: {
+                        url: url,
+                        dataType: 'json',
+                        quietMillis: 250,
+                        data: function(term) {
+                            return { q: term };
+                        },
+                        results: function(data) {
+                            return data;
+                        }
+                    }
+                });
+            });
+
         },
         bindListeners: function() {
 
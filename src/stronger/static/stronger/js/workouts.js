@@ -38,9 +38,7 @@
                             text: 'Workout Count'
                         },
                         xAxis: {
-                            categories: ['Jan', 'Feb', 'Mar', 'Apr', 'May',
-                                         'Jun', 'Jul', 'Aug', 'Sep', 'Oct',
-                                         'Nov', 'Dec'],
+                            categories: data['categories'],
                             tickInterval: 1
                         },
                         legend: {
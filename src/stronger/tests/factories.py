@@ -25,3 +25,33 @@ class BodyweightFactory(DjangoModelFactory):
     user = factory.SubFactory(UserFactory)
     bodyweight = fuzzy.FuzzyInteger(150)
     date = fuzzy.FuzzyDate(timezone.now().date() - timedelta(weeks=52))
+
+
+class ExerciseFactory(DjangoModelFactory):
+    class Meta:
+        model = models.Exercise
+
+    name = fuzzy.FuzzyText(length=15)
+    primary_muscle = 'Chest'
+    secondary_muscles = 'Triceps'
+    added_by = factory.SubFactory(UserFactory)
+
+
+class WorkoutFactory(DjangoModelFactory):
+    class Meta:
+        model = models.Workout
+
+    user = factory.SubFactory(UserFactory)
+    date = factory.LazyAttribute(lambda a: timezone.now())
+    description = fuzzy.FuzzyText(length=20)
+    comments = fuzzy.FuzzyText(length=20)
+
+
+class SetFactory(DjangoModelFactory):
+    class Meta:
+        model = models.Set
+
+    workout = factory.SubFactory(WorkoutFactory)
+    exercise = factory.SubFactory(ExerciseFactory)
+    weight = fuzzy.FuzzyInteger(20, 200)
+    reps = fuzzy.FuzzyInteger(1, 15)
@@ -0,0 +1,216 @@
+from datetime import date, datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+import numpy as np
+
+from .factories import (
+    UserFactory,
+    BodyweightFactory,
+    ExerciseFactory,
+    WorkoutFactory,
+    SetFactory,
+)
+from .. import analytics
+from ..models import DailyNutrition, MaintenanceEstimate
+
+
+class TestOneRepMax(TestCase):
+
+    def test_epley(self):
+        estimates = analytics.estimated_one_rep_max([100, 100], [1, 10])
+        self.assertEqual(list(estimates.round(1)), [100, 133.3])
+
+    def test_brzycki(self):
+        estimates = analytics.estimated_one_rep_max([100, 100, 100],
+            [1, 10, 40], formula='brzycki')
+        self.assertEqual(list(estimates[:2].round(1)), [100, 133.3])
+        self.assertTrue(np.isnan(estimates[2]))
+
+    def test_unknown_formula(self):
+        self.assertRaises(ValueError, analytics.estimated_one_rep_max,
+            [100], [1], formula='guess')
+
+
+class TestPeriods(TestCase):
+
+    def setUp(self):
+        self.dates = np.array(['2014-09-29', '2014-10-01', '2014-10-06',
+            '2014-11-02'], dtype='datetime64[D]')
+        self.values = [100, 110, 105, 90]
+
+    def test_weekly_maxima(self):
+        periods, maxima = analytics.period_maxima(self.dates, self.values,
+            'week')
+        self.assertEqual([str(p) for p in periods],
+            ['2014-09-29', '2014-10-06', '2014-10-27'])
+        self.assertEqual(list(maxima), [110, 105, 90])
+
+    def test_monthly_maxima(self):
+        periods, maxima = analytics.period_maxima(self.dates, self.values,
+            'month')
+        self.assertEqual([str(p) for p in periods],
+            ['2014-09-01', '2014-10-01', '2014-11-01'])
+        self.assertEqual(list(maxima), [100, 110, 90])
+
+    def test_rolling_best(self):
+        self.assertEqual(list(analytics.rolling_best(self.values)),
+            [100, 110, 110, 110])
+
+
+class TestDownsampling(TestCase):
+
+    def test_keeps_endpoints_and_peaks(self):
+        x = np.arange(100)
+        y = np.zeros(100)
+        y[37], y[71] = 50, -50
+        kept = analytics.largest_triangle_three_buckets(x, y, 10)
+        self.assertEqual(len(kept), 10)
+        self.assertEqual((kept[0], kept[-1]), (0, 99))
+        self.assertTrue(37 in kept and 71 in kept)
+
+    def test_short_series_untouched(self):
+        points = [(date(2014, 10, 1) + timedelta(days=i), i) for i in range(5)]
+        self.assertEqual(analytics.downsample(points, 10), points)
+        self.assertEqual(len(analytics.downsample(points, 3)), 3)
+
+
+class TestProgression(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.squat = ExerciseFactory(name='Squat')
+        for day, weight, reps in ((1, 100, 5), (1, 120, 1), (8, 110, 5)):
+            workout = WorkoutFactory(user=self.danny, date=timezone.make_aware(
+                datetime(2014, 10, day, 18), timezone.utc))
+            SetFactory(workout=workout, exercise=self.squat, weight=weight,
+                reps=reps)
+
+    def test_progression(self):
+        with self.assertNumQueries(1):
+            progression = analytics.progression(self.danny, self.squat)
+        self.assertEqual(progression['estimated'],
+            {'2014-10-01': 120.0, '2014-10-08': 128.3})
+        self.assertEqual(progression['rolling-best'],
+            {'2014-10-01': 120.0, '2014-10-08': 128.3})
+
+    def test_progression_without_sets(self):
+        self.assertEqual(analytics.progression(UserFactory(), self.squat),
+            {'estimated': {}, 'rolling-best': {}})
+
+    def test_progression_range_and_max_points(self):
+        progression = analytics.progression(self.danny, self.squat,
+            start=timezone.make_aware(datetime(2014, 10, 2), timezone.utc))
+        self.assertEqual(progression['estimated'], {'2014-10-08': 128.3})
+
+        progression = analytics.progression(self.danny, self.squat,
+            max_points=3)
+        self.assertEqual(len(progression['estimated']), 2)
+
+
+class TestEnergyBalance(TestCase):
+
+    def setUp(self):
+        # 60 days eating 2500 kcal while losing a kilogram
+        self.calorie_dates = np.arange('2014-01-01', '2014-03-02',
+            dtype='datetime64[D]')
+        self.calories = np.full(len(self.calorie_dates), 2500.0)
+        self.weight_dates = np.array(['2014-01-01', '2014-01-31',
+            '2014-03-01'], dtype='datetime64[D]')
+        self.weights = [81, 80.5, 80]
+
+    def test_exponential_trend(self):
+        values = np.r_[np.nan, np.linspace(80, 90, 300)]
+        trend = analytics.exponential_trend(values, alpha=0.2)
+        expected = values[1]
+        for value, smoothed in zip(values[1:], trend[1:]):
+            expected = 0.8 * expected + 0.2 * value
+            self.assertAlmostEqual(smoothed, expected)
+        self.assertTrue(np.isnan(trend[0]))
+
+    def test_weights_carried_forward(self):
+        days, intake, trend, _ = analytics.energy_balance(self.calorie_dates,
+            self.calories, self.weight_dates, self.weights, alpha=1)
+        self.assertEqual(len(days), 60)
+        self.assertEqual(list(trend[[0, 29, 30, 59]]), [81, 81, 80.5, 80])
+
+    def test_maintenance(self):
+        _, _, _, maintenance = analytics.energy_balance(self.calorie_dates,
+            self.calories, self.weight_dates, self.weights, window=30,
+            alpha=1)
+        self.assertTrue(np.isnan(maintenance[:30]).all())
+        # 81kg on January 30th to 80kg on March 1st adds 7700 / 30 kcal a day
+        self.assertAlmostEqual(maintenance[59], 2500 + 7700 / 30.0)
+
+    def test_sparse_logging(self):
+        _, _, _, maintenance = analytics.energy_balance(
+            self.calorie_dates[::3], self.calories[::3], self.weight_dates,
+            self.weights, window=30)
+        self.assertTrue(np.isnan(maintenance).all())
+
+
+class TestBodyweightTrend(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory()
+        for day in xrange(60):
+            BodyweightFactory(user=self.user, bodyweight=80 + day % 2,
+                date=date(2014, 1, 1) + timedelta(days=day))
+
+    def test_trend_smooths_whole_history(self):
+        dates, weights, trend = analytics.bodyweight_trend(self.user,
+            start=date(2014, 2, 1))
+        self.assertEqual(str(dates[0]), '2014-02-01')
+        self.assertEqual(len(weights), 29)
+        _, _, full = analytics.bodyweight_trend(self.user)
+        self.assertEqual(list(trend), list(full[31:]))
+        self.assertTrue(80 < trend[-1] < 81)
+
+    def test_monthly_buckets(self):
+        dates, weights, trend = analytics.bodyweight_trend(self.user,
+            period='month')
+        self.assertEqual([str(d) for d in dates],
+            ['2014-01-01', '2014-02-01', '2014-03-01'])
+        self.assertEqual(list(weights), [80 + 15 / 31.0, 80.5, 81])
+
+    def test_downsampled(self):
+        dates, weights, trend = analytics.bodyweight_trend(self.user,
+            max_points=10)
+        self.assertEqual(len(dates), 10)
+        self.assertEqual(len(trend), 10)
+        self.assertEqual(str(dates[-1]), '2014-03-01')
+
+    def test_no_weigh_ins(self):
+        dates, weights, trend = analytics.bodyweight_trend(UserFactory(
+            username='ray'))
+        self.assertEqual(len(dates), 0)
+
+
+class TestMaintenanceEstimates(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.ray = UserFactory(username='ray')
+        for user in (self.danny, self.ray):
+            for day in xrange(40):
+                DailyNutrition.objects.create(user=user,
+                    date=datetime(2014, 10, 1).date() + timedelta(days=day),
+                    calories=2400, protein=150, carbs=250, fats=70,
+                    created_on=timezone.now())
+        BodyweightFactory(user=self.danny, date=datetime(2014, 10, 1).date(),
+            bodyweight=80)
+
+    def test_recompute_all(self):
+        # two reads, then the delete and insert wrapped in a savepoint
+        with self.assertNumQueries(6):
+            self.assertEqual(MaintenanceEstimate.objects.recompute_all(), 1)
+        estimate = MaintenanceEstimate.objects.get(user=self.danny)
+        self.assertEqual((estimate.calories, estimate.trend_weight),
+            (2400, 80))
+        self.assertEqual(estimate.date, datetime(2014, 11, 9).date())
+
+    def test_recompute(self):
+        self.assertIsNone(MaintenanceEstimate.objects.recompute(self.ray))
+        self.assertEqual(MaintenanceEstimate.objects.recompute(
+            self.danny).calories, 2400)
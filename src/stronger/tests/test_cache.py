@@ -0,0 +1,29 @@
+from itertools import count
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..cache import cached, invalidate
+
+
+class TestCached(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.compute = count(1).next
+
+    def test_value_cached_until_stale(self):
+        self.assertEqual(cached('key', self.compute, 60), 1)
+        self.assertEqual(cached('key', self.compute, 60), 1)
+
+    def test_stale_value_served_while_refreshing(self):
+        """Assert the stale value is returned and refreshed afterwards."""
+        cache.set('key', (0, 'stale'))
+        self.assertEqual(cached('key', self.compute, 60, background=False),
+            'stale')
+        self.assertEqual(cached('key', self.compute, 60, background=False), 1)
+
+    def test_invalidate(self):
+        cached('key', self.compute, 60)
+        invalidate('key')
+        self.assertEqual(cached('key', self.compute, 60), 2)
@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from .factories import UserFactory, ExerciseFactory, WorkoutFactory
+from .. import choices
+
+
+class TestChoices(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.danny = UserFactory(username='danny')
+        self.ray = UserFactory(username='ray')
+        ExerciseFactory(name='Squat', primary_muscle='Legs',
+            added_by=self.danny)
+        ExerciseFactory(name='Bench', primary_muscle='Chest',
+            added_by=self.danny)
+
+    def test_choices_are_cached(self):
+        """Assert choices are only queried once until they are invalidated."""
+        self.assertEqual(choices.user_choices(),
+            [(self.danny.pk, 'danny'), (self.ray.pk, 'ray')])
+        with self.assertNumQueries(0):
+            choices.user_choices()
+
+        UserFactory(username='steve')
+        self.assertEqual(len(choices.user_choices()), 3)
+
+    def test_exercise_choices_grouped_by_muscle(self):
+        self.assertEqual(choices.exercise_choices(), [
+            ('Chest', [('Bench', 'Bench')]),
+            ('Legs', [('Squat', 'Squat')]),
+        ])
+
+    def test_workout_choices_invalidated_per_user(self):
+        workout = WorkoutFactory(user=self.danny, description='Legs')
+        self.assertEqual([pk for pk, _ in choices.workout_choices(self.danny)],
+            [workout.pk])
+        self.assertEqual(choices.workout_choices(self.ray), [])
+
+        workout.delete()
+        self.assertEqual(choices.workout_choices(self.danny), [])
+
+    @override_settings(CHOICES_TYPEAHEAD_THRESHOLD=1)
+    def test_too_many_choices(self):
+        """Assert long lists are replaced by a search."""
+        self.assertIsNone(choices.user_choices())
+        self.assertEqual(choices.search_users('RA'), [(self.ray.pk, 'ray')])
+        self.assertEqual(choices.search_exercises('ua'),
+            [('Squat', 'Squat')])
@@ -0,0 +1,22 @@
+from datetime import date, datetime
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from .. import dates
+
+
+class TestAsDate(TestCase):
+
+    def test_as_date(self):
+        """Assert dates, datetimes and database strings become dates."""
+        for value in (date(2014, 10, 1), datetime(2014, 10, 1, 18),
+                      '2014-10-01', '2014-10-01 00:00:00'):
+            self.assertEqual(dates.as_date(value), date(2014, 10, 1))
+
+    @override_settings(TIME_ZONE='Europe/London')
+    def test_as_date_uses_local_day(self):
+        """Assert aware datetimes fall on the day they are locally."""
+        late = timezone.make_aware(datetime(2014, 9, 30, 23, 30), timezone.utc)
+        self.assertEqual(dates.as_date(late), date(2014, 10, 1))
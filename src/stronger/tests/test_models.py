@@ -1,13 +1,38 @@
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 
 import factory
 
-from .factories import UserFactory, BodyweightFactory
-from ..models import BodyWeight
+from .factories import (
+    UserFactory,
+    BodyweightFactory,
+    ExerciseFactory,
+    WorkoutFactory,
+    SetFactory,
+)
+from ..models import (
+    Activity,
+    BodyWeight,
+    CurrentBodyweight,
+    DailyNutrition,
+    DailyTrainingRollup,
+    Exercise,
+    ExerciseRecord,
+    FeedEntry,
+    Friend,
+    Group,
+    GroupMember,
+    PowerliftingTotal,
+    Set,
+    UserStats,
+    Workout,
+    WorkoutSummary,
+)
 
 User = get_user_model()
 
@@ -49,6 +74,50 @@ class TestBodyweightModel(TestCase):
             self.danny_bodyweights[0]
         )
 
+    def test_current_bodyweight_snapshot(self):
+        """Assert the latest bodyweight is kept in a snapshot, ignoring
+        back-dated entries and following edits and deletes."""
+        latest, previous = self.danny_bodyweights
+        danny = User.objects.get(pk=self.danny.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(danny.bodyweight, latest.bodyweight)
+            self.assertEqual(danny.bodyweight, latest.bodyweight)
+
+        BodyweightFactory(user=self.danny, bodyweight=200,
+            date=previous.date - timedelta(days=7))
+        self.assertEqual(User.objects.get(pk=self.danny.pk).bodyweight,
+            latest.bodyweight)
+
+        latest.date = previous.date - timedelta(days=1)
+        latest.save()
+        self.assertEqual(User.objects.get(pk=self.danny.pk).bodyweight,
+            previous.bodyweight)
+
+        previous.delete()
+        self.assertEqual(User.objects.get(pk=self.danny.pk).bodyweight,
+            latest.bodyweight)
+
+        for bodyweight in BodyWeight.objects.filter(user=self.danny):
+            bodyweight.delete()
+        self.assertIsNone(User.objects.get(pk=self.danny.pk).bodyweight)
+
+    def test_saving_stale_user_keeps_bodyweight(self):
+        """Assert saving a user loaded before a weigh-in keeps the new
+        weight."""
+        danny = User.objects.get(pk=self.danny.pk)
+        BodyweightFactory(user=self.danny, bodyweight=200,
+            date=timezone.now().date() + timedelta(days=1))
+        danny.gym = 'Iron Temple'
+        danny.save()
+        self.assertEqual(User.objects.get(pk=self.danny.pk).bodyweight, 200)
+
+    def test_rebuild_current_bodyweight(self):
+        """Assert rebuilding restores the current bodyweight of each user."""
+        CurrentBodyweight.objects.all().delete()
+        self.assertEqual(BodyWeight.objects.rebuild_current(), 2)
+        self.assertEqual(User.objects.get(pk=self.steve.pk).bodyweight,
+            self.steve_bodyweights[0].bodyweight)
+
 
 class TestSelectRealted(TestCase):
 
@@ -124,3 +193,744 @@ class TestSelectRealted(TestCase):
         with self.assertNumQueries(1):
             [s for s in Set.objects.filter(exercise=self.rows).select_related('workout').values_list('workout', flat=True)]
 
+
+
+class TestWorkoutSummary(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.bench = ExerciseFactory(name='Bench', primary_muscle='Chest')
+        self.squat = ExerciseFactory(name='Squat', primary_muscle='Quads')
+        self.workout = WorkoutFactory(user=self.danny)
+
+        self.sets = [
+            SetFactory(workout=self.workout, exercise=self.bench,
+                weight=100, reps=5),
+            SetFactory(workout=self.workout, exercise=self.bench,
+                weight=80, reps=10),
+            SetFactory(workout=self.workout, exercise=self.squat,
+                weight=140, reps=3),
+        ]
+
+    def test_summary_updated_as_sets_recorded(self):
+        """Assert that recording sets keeps the summary totals current."""
+        summary = WorkoutSummary.objects.get(workout=self.workout)
+        self.assertEqual(summary.set_count, 3)
+        self.assertEqual(summary.tonnage, 100 * 5 + 80 * 10 + 140 * 3)
+        self.assertEqual(summary.rep_ranges(),
+            {'strength': 2, 'hypertrophy': 1, 'endurance': 0})
+        self.assertEqual(summary.primary_muscles_targeted(),
+            {'Chest': 2, 'Quads': 1})
+        self.assertEqual(summary.timeline(),
+            [('Bench', 5), ('Bench', 10), ('Squat', 3)])
+
+    def test_summary_updated_when_sets_deleted(self):
+        """Assert that deleted sets are removed from the summary."""
+        self.sets[2].delete()
+        summary = WorkoutSummary.objects.get(workout=self.workout)
+        self.assertEqual(summary.set_count, 2)
+        self.assertEqual(summary.primary_muscles_targeted(), {'Chest': 2})
+        self.assertEqual(summary.rep_ranges_per_muscle(), {
+            'muscles': ['Chest'],
+            'strength': [1],
+            'hypertrophy': [1],
+            'endurance': [0],
+        })
+
+    def test_summary_matches_rebuild(self):
+        """Assert that the incremental totals match a full rebuild."""
+        self.sets[0].reps = 12
+        self.sets[0].save()
+        incremental = WorkoutSummary.objects.get(workout=self.workout)
+        WorkoutSummary.objects.all().delete()
+        rebuilt = WorkoutSummary.objects.for_workout(self.workout)
+        self.assertEqual(incremental.rep_ranges(), rebuilt.rep_ranges())
+        self.assertEqual(incremental.timeline(), rebuilt.timeline())
+
+
+class TestSetBreakdowns(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        bench = ExerciseFactory(name='Bench', primary_muscle='Chest')
+        curl = ExerciseFactory(name='Curl', primary_muscle='Biceps')
+
+        now = timezone.now()
+        for days_ago in (1, 3, 30):
+            workout = WorkoutFactory(user=self.danny,
+                date=now - timedelta(days=days_ago))
+            SetFactory(workout=workout, exercise=bench, reps=5)
+            SetFactory(workout=workout, exercise=curl, reps=12)
+            SetFactory(workout=workout, exercise=curl, reps=15)
+
+        self.start = now - timedelta(days=7)
+        self.end = now
+
+    def test_rep_range_breakdown(self):
+        """Assert the rep ranges are counted in one query over the period."""
+        with self.assertNumQueries(1):
+            breakdown = Set.objects.rep_range_breakdown(self.danny,
+                self.start, self.end)
+        self.assertEqual(breakdown,
+            {'strength': 2, 'hypertrophy': 2, 'endurance': 2})
+
+    def test_muscle_breakdown(self):
+        """Assert the primary muscles are counted in one query."""
+        with self.assertNumQueries(1):
+            breakdown = Set.objects.muscle_breakdown(self.danny,
+                self.start, self.end)
+        self.assertEqual(breakdown, {'Chest': 2, 'Biceps': 4})
+
+
+class TestDailyTrainingRollups(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.bench = ExerciseFactory(name='Bench', primary_muscle='Chest')
+        self.curl = ExerciseFactory(name='Curl', primary_muscle='Biceps')
+
+        now = timezone.now()
+        self.workout = WorkoutFactory(user=self.danny,
+            date=now - timedelta(days=1))
+        self.sets = [
+            SetFactory(workout=self.workout, exercise=self.bench,
+                weight=100, reps=5),
+            SetFactory(workout=self.workout, exercise=self.bench,
+                weight=80, reps=10),
+            SetFactory(workout=self.workout, exercise=self.curl,
+                weight=20, reps=15),
+        ]
+        old = WorkoutFactory(user=self.danny, date=now - timedelta(days=30))
+        SetFactory(workout=old, exercise=self.bench, weight=90, reps=3)
+
+        self.start = now - timedelta(days=7)
+        self.end = now
+
+    def _rollups(self):
+        return list(DailyTrainingRollup.objects.order_by('date', 'exercise')
+            .values_list('date', 'exercise', 'sets', 'reps', 'tonnage',
+                         'top_weight', 'strength_sets', 'hypertrophy_sets',
+                         'endurance_sets'))
+
+    def test_rollups_updated_as_sets_recorded(self):
+        """Assert that recording sets keeps the daily totals current."""
+        rollup = DailyTrainingRollup.objects.get(exercise=self.bench,
+            date__gte=self.start.date())
+        self.assertEqual((rollup.sets, rollup.reps, rollup.top_weight),
+            (2, 15, 100))
+        self.assertEqual(rollup.tonnage, 100 * 5 + 80 * 10)
+
+    def test_heaviest_set_deleted(self):
+        """Assert the top weight is recalculated when the top set is deleted."""
+        self.sets[0].delete()
+        rollup = DailyTrainingRollup.objects.get(exercise=self.bench,
+            date__gte=self.start.date())
+        self.assertEqual((rollup.sets, rollup.top_weight), (1, 80))
+
+        self.sets[2].delete()
+        self.assertFalse(DailyTrainingRollup.objects.filter(
+            exercise=self.curl).exists())
+
+    def test_rollups_match_rebuild(self):
+        """Assert the incremental rollups match a full rebuild."""
+        self.sets[1].reps = 3
+        self.sets[1].save()
+        self.workout.date = self.workout.date - timedelta(days=2)
+        self.workout.save()
+
+        incremental = self._rollups()
+        DailyTrainingRollup.objects.rebuild()
+        self.assertEqual(incremental, self._rollups())
+
+    def test_breakdowns(self):
+        """Assert the chart breakdowns are read in one query each."""
+        with self.assertNumQueries(1):
+            rep_ranges = DailyTrainingRollup.objects.rep_range_breakdown(
+                self.danny, self.start, self.end)
+        self.assertEqual(rep_ranges,
+            {'strength': 1, 'hypertrophy': 1, 'endurance': 1})
+
+        with self.assertNumQueries(1):
+            muscles = DailyTrainingRollup.objects.muscle_breakdown(
+                self.danny, self.start, self.end)
+        self.assertEqual(muscles, {'Chest': 2, 'Biceps': 1})
+
+    def test_rep_totals(self):
+        """Assert every rep window is summed in one query."""
+        with self.assertNumQueries(1):
+            totals = DailyTrainingRollup.objects.rep_totals(self.danny,
+                self.bench, {'week': self.start, 'day': self.end})
+        self.assertEqual(totals, {'all_time': 18, 'week': 15, 'day': 0})
+
+    def test_sum_reps(self):
+        """Assert reps are summed all time and since a given date."""
+        self.assertEqual(self.bench.sum_reps(self.danny), 18)
+        self.assertEqual(self.bench.sum_reps(self.danny, self.start), 15)
+
+
+class TestHeaviestPerPeriod(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.bench = ExerciseFactory(name='Bench')
+        for day, weight, reps in ((6, 100, 5), (6, 105, 5), (8, 110, 5),
+                                  (8, 130, 3), (20, 90, 5)):
+            workout = WorkoutFactory(user=self.danny, date=timezone.make_aware(
+                datetime(2014, 10, day, 18), timezone.utc))
+            SetFactory(workout=workout, exercise=self.bench, weight=weight,
+                reps=reps)
+
+    def test_daily_maxima(self):
+        """Assert the heaviest lift each day is found in one query."""
+        with self.assertNumQueries(1):
+            heaviest = Set.objects.heaviest_per_period(self.danny, self.bench,
+                5)
+        self.assertEqual(heaviest, [(date(2014, 10, 6), 105),
+            (date(2014, 10, 8), 110), (date(2014, 10, 20), 90)])
+
+    def test_weekly_maxima(self):
+        """Assert the daily maxima are rolled up into weeks."""
+        heaviest = Set.objects.heaviest_per_period(self.danny, self.bench, 5,
+            end=timezone.make_aware(datetime(2014, 10, 9), timezone.utc),
+            period='week')
+        self.assertEqual(heaviest, [(date(2014, 10, 6), 110)])
+
+
+class TestExerciseRecords(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.steve = UserFactory(username='steve')
+        self.squat = ExerciseFactory(name='Squat', primary_muscle='Quads')
+
+        danny_workout = WorkoutFactory(user=self.danny)
+        steve_workout = WorkoutFactory(user=self.steve)
+        self.danny_sets = [
+            SetFactory(workout=danny_workout, exercise=self.squat,
+                weight=weight, reps=5) for weight in (100, 140, 120)
+        ]
+        self.steve_sets = [
+            SetFactory(workout=steve_workout, exercise=self.squat,
+                weight=weight, reps=reps) for weight, reps in ((160, 5),
+                                                               (180, 1))
+        ]
+
+    def test_personal_records(self):
+        """Assert the user filter is applied to personal records."""
+        records = self.squat.records(self.danny)
+        self.assertEqual(records.keys(), [5])
+        self.assertEqual(records[5].weight, 140)
+        self.assertEqual(records[5].set, self.danny_sets[1])
+
+    def test_site_records(self):
+        """Assert site wide records are served from the record table."""
+        with self.assertNumQueries(2):
+            records = self.squat.records()
+        self.assertEqual(records[5].weight, 160)
+        self.assertEqual(records[5].user, self.steve)
+        self.assertEqual(records[1].weight, 180)
+
+    def test_deleting_record_set_falls_back(self):
+        """Assert deleting the record holding set promotes the next best."""
+        self.danny_sets[1].delete()
+        self.assertEqual(self.squat.records(self.danny)[5].weight, 120)
+
+        self.steve_sets[1].delete()
+        self.assertNotIn(1, self.squat.records(self.steve))
+
+    def test_editing_record_set(self):
+        """Assert editing the record holding set recalculates the record."""
+        self.danny_sets[1].reps = 3
+        self.danny_sets[1].save()
+        records = self.squat.records(self.danny)
+        self.assertEqual(records[5].weight, 120)
+        self.assertEqual(records[3].weight, 140)
+
+    def test_record_each_keeps_heavier_existing_record(self):
+        """Assert the insert fallback only replaces lighter records."""
+        lighter, heavier = [ExerciseRecord(user=self.danny,
+            exercise=self.squat, reps=5, weight=weight, set=set)
+            for weight, set in ((130, self.danny_sets[2]),
+                                (150, self.danny_sets[0]))]
+        self.assertEqual(ExerciseRecord.objects._record_each([lighter]), [])
+        self.assertEqual(self.squat.records(self.danny)[5].weight, 140)
+
+        saved = ExerciseRecord.objects._record_each([heavier])
+        self.assertEqual([r.weight for r in saved], [150])
+        self.assertEqual(self.squat.records(self.danny)[5].weight, 150)
+
+    def test_rebuild_matches_incremental_records(self):
+        incremental = sorted(ExerciseRecord.objects.values_list(
+            'user', 'exercise', 'reps', 'weight', 'set'))
+        ExerciseRecord.objects.rebuild()
+        self.assertEqual(incremental, sorted(ExerciseRecord.objects
+            .values_list('user', 'exercise', 'reps', 'weight', 'set')))
+
+
+class TestPowerliftingTotals(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.steve = UserFactory(username='steve')
+        self.ray = UserFactory(username='ray')
+
+        lifts = dict((name, ExerciseFactory(name=name.capitalize()))
+            for name in ('squat', 'deadlift', 'bench', 'curl'))
+
+        for user, weights in ((self.danny, (140, 180, 100, 50)),
+                              (self.steve, (160, 200, 120, 40)),
+                              (self.ray, (100, 120, 80, 30))):
+            workout = WorkoutFactory(user=user)
+            for name, weight in zip(('squat', 'deadlift', 'bench', 'curl'),
+                                    weights):
+                SetFactory(workout=workout, exercise=lifts[name],
+                    weight=weight, reps=1)
+
+    def test_totals_maintained_from_records(self):
+        """Assert only the big three lifts count towards the total."""
+        total = PowerliftingTotal.objects.get(user=self.danny)
+        self.assertEqual((total.squat, total.deadlift, total.bench),
+            (140, 180, 100))
+        self.assertEqual(total.total, 420)
+
+    def test_leaderboard(self):
+        """Assert the leaderboard is ordered and paginated by total."""
+        self.assertEqual(
+            [t.user for t in PowerliftingTotal.objects.leaderboard(limit=2)],
+            [self.steve, self.danny]
+        )
+        self.assertEqual(
+            [t.user for t in PowerliftingTotal.objects.leaderboard(
+                limit=2, offset=2)],
+            [self.ray]
+        )
+
+    def test_friend_leaderboard(self):
+        friends = [self.danny, self.ray]
+        self.assertEqual(
+            [t[0] for t in Set.objects.get_biggest_totals(
+                self.steve, friends=friends)],
+            [self.danny, self.ray]
+        )
+        self.assertEqual(PowerliftingTotal.objects.rank(self.ray,
+            users=friends), 2)
+
+    def test_rank(self):
+        self.assertEqual(PowerliftingTotal.objects.rank(self.steve), 1)
+        self.assertEqual(PowerliftingTotal.objects.rank(self.ray), 3)
+        self.assertEqual(
+            PowerliftingTotal.objects.rank(UserFactory(username='new')), None)
+
+
+class TestPopularExercises(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        bench = ExerciseFactory(name='Bench')
+        squat = ExerciseFactory(name='Squat')
+        ExerciseFactory(name='Curl')
+
+        recent = WorkoutFactory()
+        old = WorkoutFactory(date=timezone.now() - timedelta(days=60))
+        SetFactory.create_batch(2, workout=recent, exercise=bench)
+        SetFactory.create_batch(3, workout=old, exercise=squat)
+
+    def test_most_popular(self):
+        """Assert exercises are ranked by set count in a single query."""
+        with self.assertNumQueries(1):
+            popular = Exercise.objects.most_popular(5)
+        self.assertEqual(popular, [('Squat', 3), ('Bench', 2)])
+
+    def test_most_popular_cached(self):
+        Exercise.objects.most_popular(5)
+        with self.assertNumQueries(0):
+            Exercise.objects.most_popular(5)
+
+    def test_most_popular_window(self):
+        self.assertEqual(Exercise.objects.most_popular(5, 'week'),
+            [('Bench', 2)])
+
+
+class TestMostFrequentUsers(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.danny = UserFactory(username='danny')
+        self.steve = UserFactory(username='steve')
+        self.ray = UserFactory(username='ray')
+
+        last_month = timezone.now() - timedelta(days=20)
+        WorkoutFactory.create_batch(2, user=self.danny)
+        WorkoutFactory.create_batch(3, user=self.steve, date=last_month)
+        WorkoutFactory.create_batch(1, user=self.ray)
+
+    def test_most_frequent_users(self):
+        """Assert users are ranked by count, not by id."""
+        self.assertEqual(Workout.objects.most_frequent_users(limit=2),
+            [(self.steve, 3), (self.danny, 2)])
+
+    def test_most_frequent_users_window(self):
+        self.assertEqual(Workout.objects.most_frequent_users(window='week'),
+            [(self.danny, 2), (self.ray, 1)])
+
+    def test_leaderboard_invalidated_by_new_workouts(self):
+        Workout.objects.most_frequent_users()
+        with self.assertNumQueries(0):
+            Workout.objects.most_frequent_users()
+
+        WorkoutFactory.create_batch(3, user=self.ray)
+        self.assertEqual(Workout.objects.most_frequent_users()[0],
+            (self.ray, 4))
+
+
+class TestWorkoutsPerPeriod(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.danny = UserFactory(username='danny')
+        for day in ((2013, 10, 30), (2014, 10, 1), (2014, 10, 2),
+                    (2014, 10, 31), (2014, 12, 25)):
+            WorkoutFactory(user=self.danny, date=timezone.make_aware(
+                datetime(*day + (12,)), timezone.utc))
+        WorkoutFactory(date=timezone.make_aware(datetime(2014, 10, 2, 12),
+            timezone.utc))
+
+        self.start = timezone.make_aware(datetime(2014, 9, 29), timezone.utc)
+        self.end = timezone.make_aware(datetime(2014, 12, 31), timezone.utc)
+
+    def test_monthly_counts_do_not_merge_years(self):
+        with self.assertNumQueries(1):
+            counts = Workout.objects.workouts_per_period(self.danny,
+                self.start, self.end)
+        self.assertEqual(counts, [
+            (date(2014, 9, 1), 0),
+            (date(2014, 10, 1), 3),
+            (date(2014, 11, 1), 0),
+            (date(2014, 12, 1), 1),
+        ])
+
+    def test_weekly_counts(self):
+        counts = Workout.objects.workouts_per_period(None, self.start,
+            self.start + timedelta(days=13), period='week')
+        self.assertEqual(counts, [(date(2014, 9, 29), 3),
+                                  (date(2014, 10, 6), 0)])
+
+    def test_site_average_cached(self):
+        Workout.objects.average_workouts_per_month()
+        with self.assertNumQueries(0):
+            Workout.objects.average_workouts_per_month()
+
+
+class TestWorkoutsIncludingExercise(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.squat = ExerciseFactory(name='Squat')
+        self.curl = ExerciseFactory(name='Curl')
+
+        self.leg_day = WorkoutFactory(user=self.danny,
+            date=timezone.now() - timedelta(days=2))
+        self.arm_day = WorkoutFactory(user=self.danny)
+        self.squats = SetFactory.create_batch(2, workout=self.leg_day,
+            exercise=self.squat)
+        SetFactory(workout=self.leg_day, exercise=self.curl)
+        SetFactory(workout=self.arm_day, exercise=self.curl)
+        SetFactory(exercise=self.squat)
+
+    def test_includes_exercise(self):
+        self.assertTrue(self.leg_day.includes_exercise(self.squat))
+        self.assertFalse(self.arm_day.includes_exercise(self.squat))
+
+    def test_get_workouts_including_exercise(self):
+        """Assert only the user's workouts with the exercise are returned."""
+        with self.assertNumQueries(1):
+            workouts = list(Workout.objects.get_workouts_including_exercise(
+                self.danny, self.squat))
+        self.assertEqual(workouts, [self.leg_day])
+        self.assertEqual(list(Workout.objects.get_workouts_including_exercise(
+            self.danny, self.curl)), [self.leg_day, self.arm_day])
+
+    def test_get_workouts_with_exercise_sets(self):
+        with self.assertNumQueries(2):
+            workouts = list(Workout.objects.get_workouts_with_exercise_sets(
+                self.danny, self.squat))
+            self.assertEqual(workouts[0].exercise_sets, self.squats)
+
+    def test_page_including_exercise(self):
+        """Assert workouts are paged newest first with a keyset cursor."""
+        with self.assertNumQueries(1):
+            workouts, cursor = Workout.objects.page_including_exercise(
+                self.danny, self.curl, limit=1)
+        self.assertEqual(workouts, [self.arm_day])
+
+        workouts, cursor = Workout.objects.page_including_exercise(
+            self.danny, self.curl, cursor, limit=1)
+        self.assertEqual((workouts, cursor), ([self.leg_day], None))
+
+
+class TestActivityFeed(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.ray = UserFactory(username='ray')
+        self.stranger = UserFactory(username='stranger')
+        Friend.objects.create(user=self.danny, friend=self.ray)
+
+        now = timezone.now()
+        self.workouts = [
+            WorkoutFactory(user=self.danny, date=now - timedelta(days=3)),
+            WorkoutFactory(user=self.ray, date=now - timedelta(days=2)),
+            WorkoutFactory(user=self.stranger, date=now - timedelta(days=1)),
+        ]
+        self.weight = BodyweightFactory(user=self.danny,
+            date=now.date() - timedelta(days=5))
+
+    def test_activities_recorded(self):
+        """Assert an activity is written for each workout and weight."""
+        self.assertEqual(Activity.objects.count(), 4)
+        self.assertEqual(Activity.objects.get(bodyweight=self.weight).owner,
+            self.danny)
+
+    def test_following_feed(self):
+        """Assert the feed only covers the user and who they follow."""
+        with self.assertNumQueries(1):
+            activities, cursor = Activity.objects.following_feed(self.danny,
+                limit=2)
+            targets = [a.target for a in activities]
+            [t.user for t in targets]
+        self.assertEqual(targets, self.workouts[1::-1])
+
+        activities, cursor = Activity.objects.following_feed(self.danny,
+            cursor, limit=2)
+        self.assertEqual(([a.target for a in activities], cursor),
+            ([self.weight], None))
+
+    def test_edited_workout_moves(self):
+        """Assert editing the date of a workout moves its activity."""
+        self.workouts[0].date = timezone.now()
+        self.workouts[0].save()
+        activities, _ = Activity.objects.feed([self.danny], limit=1)
+        self.assertEqual(activities[0].workout, self.workouts[0])
+
+    def test_rebuild(self):
+        """Assert a rebuild recreates the same activities."""
+        Activity.objects.all().delete()
+        self.assertEqual(Activity.objects.rebuild(), 4)
+        activities, _ = Activity.objects.feed()
+        self.assertEqual(activities[0].workout, self.workouts[2])
+
+
+@override_settings(FEED_PUSH_FOLLOWER_LIMIT=1)
+class TestHybridFeed(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.ray = UserFactory(username='ray')
+        self.celebrity = UserFactory(username='celebrity')
+        Friend.objects.create(user=self.danny, friend=self.ray)
+        Friend.objects.create(user=self.danny, friend=self.celebrity)
+        Friend.objects.create(user=self.ray, friend=self.celebrity)
+
+        now = timezone.now()
+        self.workouts = [
+            WorkoutFactory(user=self.ray, date=now - timedelta(days=3)),
+            WorkoutFactory(user=self.celebrity, date=now - timedelta(days=2)),
+            WorkoutFactory(user=self.danny, date=now - timedelta(days=1)),
+        ]
+
+    def test_write_fan_out(self):
+        """Assert activities are pushed unless the owner is too popular."""
+        self.assertEqual(FeedEntry.objects.filter(
+            activity__workout=self.workouts[0]).count(), 2)
+        self.assertEqual(FeedEntry.objects.filter(
+            activity__workout=self.workouts[1]).count(), 1)
+        self.assertFalse(Activity.objects.get(
+            workout=self.workouts[1]).pushed)
+
+    def test_feed_merges_pushed_and_pulled(self):
+        """Assert a feed includes pulled activities in date order."""
+        with self.assertNumQueries(2):
+            activities, cursor = FeedEntry.objects.feed(self.danny)
+        self.assertEqual([a.workout for a in activities],
+            self.workouts[::-1])
+        self.assertIsNone(cursor)
+
+    def test_follow_and_unfollow(self):
+        """Assert following backfills a feed, and unfollowing clears it."""
+        friendship = Friend.objects.create(user=self.ray, friend=self.danny)
+        activities, _ = FeedEntry.objects.feed(self.ray)
+        self.assertEqual([a.workout for a in activities], self.workouts[::-1])
+
+        friendship.delete()
+        activities, _ = FeedEntry.objects.feed(self.ray)
+        self.assertEqual([a.workout for a in activities],
+            self.workouts[1::-1])
+
+    def test_rebuild(self):
+        """Assert a rebuild writes the same feed entries."""
+        FeedEntry.objects.all().delete()
+        self.assertEqual(FeedEntry.objects.rebuild(), 4)
+        activities, _ = FeedEntry.objects.feed(self.danny)
+        self.assertEqual([a.workout for a in activities],
+            self.workouts[::-1])
+
+
+class TestDayTypeAverages(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        workout = WorkoutFactory(user=self.danny, date=timezone.make_aware(
+            datetime(2014, 10, 1, 18), timezone.utc))
+        SetFactory(workout=workout)
+        # a workout without any sets doesn't make a workout day
+        WorkoutFactory(user=self.danny, date=timezone.make_aware(
+            datetime(2014, 10, 3, 18), timezone.utc))
+
+        for day, calories, protein in ((1, 3000, 200), (2, 2000, 150),
+                                       (3, 2500, 170)):
+            DailyNutrition.objects.create(user=self.danny,
+                date=date(2014, 10, day), calories=calories, protein=protein,
+                carbs=300, fats=80, created_on=timezone.now())
+
+    def test_day_type_averages(self):
+        """Assert both kinds of day are averaged in one query."""
+        with self.assertNumQueries(1):
+            averages = DailyNutrition.objects.day_type_averages(self.danny)
+        self.assertEqual(averages['workout_days'], {'days': 1,
+            'calories': 3000, 'protein': 200, 'carbs': 300, 'fats': 80})
+        self.assertEqual(averages['rest_days'], {'days': 2,
+            'calories': 2250, 'protein': 160, 'carbs': 300, 'fats': 80})
+
+    def test_day_type_averages_sum_meals_per_day(self):
+        """Assert several meals on one day are averaged as one day."""
+        DailyNutrition.objects.create(user=self.danny,
+            date=date(2014, 10, 1), calories=1000, protein=50, carbs=100,
+            fats=20, created_on=timezone.now())
+        averages = DailyNutrition.objects.day_type_averages(self.danny)
+        self.assertEqual(averages['workout_days'], {'days': 1,
+            'calories': 4000, 'protein': 250, 'carbs': 400, 'fats': 100})
+        self.assertEqual(averages['rest_days']['days'], 2)
+
+    def test_day_type_averages_between(self):
+        """Assert days without any meals average to zero."""
+        averages = DailyNutrition.objects.day_type_averages(self.danny,
+            start=date(2014, 10, 2), end=date(2014, 10, 2))
+        self.assertEqual(averages['workout_days']['days'], 0)
+        self.assertEqual(averages['workout_days']['calories'], 0)
+        self.assertEqual(averages['rest_days']['calories'], 2000)
+
+    def test_summary(self):
+        """Assert the summary costs two grouped queries over the window."""
+        with self.assertNumQueries(2):
+            summary = DailyNutrition.objects.summary(self.danny,
+                date(2014, 10, 2), date(2014, 10, 3))
+        self.assertEqual(summary['calories'],
+            {date(2014, 10, 2): 2000, date(2014, 10, 3): 2500})
+        self.assertEqual(summary['macros'],
+            {'protein': 320, 'carbs': 600, 'fats': 160})
+        self.assertEqual(summary['workout_days']['days'], 0)
+        self.assertEqual(summary['rest_days']['calories'], 2250)
+
+    def test_summary_sums_meals_per_day(self):
+        """Assert several meals on one day are averaged as one day."""
+        DailyNutrition.objects.create(user=self.danny,
+            date=date(2014, 10, 2), calories=1000, protein=50, carbs=100,
+            fats=20, created_on=timezone.now())
+        summary = DailyNutrition.objects.summary(self.danny,
+            date(2014, 10, 1), date(2014, 10, 3))
+        self.assertEqual(summary['calories'][date(2014, 10, 2)], 3000)
+        self.assertEqual(summary['rest_days'], {'days': 2,
+            'calories': 2750, 'protein': 185, 'carbs': 350, 'fats': 90})
+        self.assertEqual(summary['workout_days'], DailyNutrition.objects
+            .day_type_averages(self.danny)['workout_days'])
+
+
+class TestUserStats(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.ray = UserFactory(username='ray')
+        # stats are counted from scratch the first time they are read
+        UserStats.objects.for_user(self.danny.pk)
+        UserStats.objects.for_user(self.ray.pk)
+
+        Friend.objects.create(user=self.danny, friend=self.ray)
+        self.workouts = WorkoutFactory.create_batch(3, user=self.danny)
+        DailyNutrition.objects.create(user=self.danny,
+            date=timezone.now().date(), calories=2500, protein=150,
+            carbs=250, fats=70, created_on=timezone.now())
+        group = Group.objects.create(name='lifters', about='',
+            created=timezone.now().date())
+        GroupMember.objects.create(user=self.danny, group=group,
+            joined=timezone.now().date())
+
+    def test_counters(self):
+        """Assert counters follow created and deleted rows."""
+        self.workouts[0].delete()
+        danny = User.objects.get(pk=self.danny.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual([danny.count_following(), danny.count_followers(),
+                danny.count_groups(), danny.count_meals(),
+                danny.count_workouts()], [1, 0, 1, 1, 2])
+        self.assertEqual(User.objects.get(pk=self.ray.pk).count_followers(),
+            1)
+
+    def test_missing_stats_are_counted(self):
+        """Assert a user without stats has them counted when read."""
+        UserStats.objects.all().delete()
+        WorkoutFactory(user=self.danny)
+        self.assertEqual(self.danny.count_workouts(), 4)
+
+    def test_reconcile(self):
+        """Assert reconciling only rewrites stats which have drifted."""
+        UserStats.objects.filter(pk=self.danny.pk).update(workouts=10)
+        self.assertEqual(UserStats.objects.reconcile(), 1)
+        self.assertEqual(UserStats.objects.get(pk=self.danny.pk).workouts, 3)
+        self.assertEqual(UserStats.objects.reconcile(), 0)
+
+
+class TestRecordWorkoutSets(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.squat = ExerciseFactory(name='Squat', primary_muscle='Quads')
+        self.curl = ExerciseFactory(name='Curl', primary_muscle='Biceps')
+        SetFactory(workout=WorkoutFactory(user=self.danny),
+            exercise=self.squat, weight=150, reps=5)
+        self.workout = WorkoutFactory(user=self.danny)
+
+    def _sets(self):
+        return [Set(workout=self.workout, exercise=exercise, weight=weight,
+                    reps=reps)
+                for exercise, weight, reps in [(self.squat, 140, 5)] * 8 +
+                [(self.squat, 160, 5), (self.curl, 20, 10)] +
+                [(self.curl, 22, 8)] * 14]
+
+    def test_aggregates_updated_in_batch(self):
+        """Assert 24 sets are saved with a handful of statements, leaving
+        the same aggregates as recording them one at a time."""
+        # (including four pairs of savepoints)
+        with self.assertNumQueries(22):
+            saved = Set.objects.record_workout_sets(self.workout, self._sets())
+        self.assertEqual(len(saved), 24)
+
+        summary = WorkoutSummary.objects.get(workout=self.workout)
+        rollups = list(DailyTrainingRollup.objects.filter(user=self.danny)
+            .order_by('exercise').values_list('exercise', 'sets', 'reps'))
+        records = sorted(ExerciseRecord.objects.filter(user=self.danny)
+            .values_list('exercise', 'reps', 'weight', 'set'))
+        total = PowerliftingTotal.objects.get(user=self.danny).squat
+
+        Set.objects.filter(workout=self.workout).delete()
+        for s in self._sets():
+            s.save()
+        rebuilt = WorkoutSummary.objects.get(workout=self.workout)
+        self.assertEqual((summary.set_count, summary.tonnage),
+            (rebuilt.set_count, rebuilt.tonnage))
+        self.assertEqual(rollups, list(DailyTrainingRollup.objects
+            .filter(user=self.danny).order_by('exercise')
+            .values_list('exercise', 'sets', 'reps')))
+        self.assertEqual([r[:3] for r in records], sorted(
+            ExerciseRecord.objects.filter(user=self.danny)
+            .values_list('exercise', 'reps', 'weight')))
+        self.assertEqual(total, 160)
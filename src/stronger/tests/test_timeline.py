@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .factories import UserFactory, BodyweightFactory, WorkoutFactory
+from .. import timeline
+from ..models import BodyWeight, Workout
+
+
+class TestMerge(TestCase):
+
+    def setUp(self):
+        self.danny = UserFactory(username='danny')
+        self.workouts = [WorkoutFactory(user=self.danny,
+            date=timezone.make_aware(datetime(2014, 10, day, 18), timezone.utc))
+            for day in (1, 3, 5)]
+        self.weights = [BodyweightFactory(user=self.danny,
+            date=date(2014, 10, day)) for day in (2, 3, 6)]
+        self.sources = [
+            (Workout.objects.filter(user=self.danny), 'date'),
+            (BodyWeight.objects.filter(user=self.danny), 'date'),
+        ]
+
+    def test_merge_newest_first(self):
+        """Assert each source is limited in the database and merged."""
+        with self.assertNumQueries(2):
+            items, cursor = timeline.merge(self.sources, limit=3)
+        self.assertEqual(items, [self.weights[2], self.workouts[2],
+            self.workouts[1]])
+        self.assertIsNotNone(cursor)
+
+    def test_merge_pages(self):
+        """Assert following the cursors visits every item once."""
+        pages, cursor = [], None
+        while True:
+            items, cursor = timeline.merge(self.sources, limit=2,
+                before=cursor)
+            pages.append(items)
+            if cursor is None:
+                break
+        self.assertEqual(pages, [
+            [self.weights[2], self.workouts[2]],
+            [self.workouts[1], self.weights[1]],
+            [self.weights[0], self.workouts[0]],
+        ])
+
+    def test_as_datetime(self):
+        self.assertEqual(timeline.as_datetime(date(2014, 10, 1)),
+            timezone.make_aware(datetime(2014, 10, 1), timezone.utc))
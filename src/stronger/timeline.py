@@ -0,0 +1,130 @@
+"""
+Timelines merged from several querysets, such as the pushed and pulled
+activities of a hybrid feed (see FeedEntryManager.feed).
+
+Each queryset is ordered newest first and limited to a page (plus one
+row) in the database, then the pages are merged lazily with a heap - so
+the newest n items of k querysets cost at most k * (n + 1) rows however
+long the history.
+Days recorded with a DateField are placed at midnight UTC.
+"""
+
+import calendar
+import heapq
+from datetime import datetime, time
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import DateTimeField, Q
+from django.utils import timezone
+
+from .pagination import CURSOR_DATE_FORMAT
+
+
+def merge(sources, limit=10, before=None):
+    """
+    Returns an (items, cursor) tuple holding the newest limit items of
+    several querysets, and the cursor of the next (older) page - or None
+    on the last page.
+
+    Sources are (queryset, date_field) tuples. Items with the same date
+    are ordered by source and then by id, newest first.
+    """
+
+    position = _decode(before)
+    streams = []
+    for index, (queryset, field) in enumerate(sources):
+        queryset = queryset.order_by('-{}'.format(field), '-id')
+        if position is not None:
+            queryset = queryset.filter(_after(queryset.model, field, index,
+                position))
+        streams.append(_stream(queryset[:limit + 1], field, index))
+
+    # one extra item tells us whether there is an older page
+    items = list(islice(heapq.merge(*streams), limit + 1))
+    cursor = _encode(*items[limit - 1][:3]) if len(items) > limit else None
+    return [item for _, _, _, item in items[:limit]], cursor
+
+
+def as_datetime(value):
+    """Places a date at midnight UTC, leaving datetimes untouched."""
+    if isinstance(value, datetime):
+        return value
+    value = datetime.combine(value, time.min)
+    return timezone.make_aware(value, timezone.utc) if settings.USE_TZ \
+        else value
+
+
+def _stream(queryset, field, index):
+    """
+    Yields (sort key, source, -id, item) tuples for the rows of a queryset,
+    which sort in ascending order from newest to oldest.
+    """
+    for item in queryset:
+        yield (-_timestamp(as_datetime(getattr(item, field))), index,
+               -item.pk, item)
+
+
+def _after(model, field, index, position):
+    """
+    Returns a Q object matching the rows of a source which come after the
+    cursor position in the merged timeline.
+    """
+
+    timestamp, source, pk = position
+    moment = _from_timestamp(timestamp)
+
+    if isinstance(model._meta.get_field(field), DateTimeField):
+        earlier, same = Q(**{'{}__lt'.format(field): moment}), \
+            Q(**{field: moment})
+    else:
+        day = timezone.localtime(moment, timezone.utc).date() \
+            if timezone.is_aware(moment) else moment.date()
+        if as_datetime(day) == moment:
+            earlier, same = Q(**{'{}__lt'.format(field): day}), \
+                Q(**{field: day})
+        else:
+            # no day falls at exactly this moment
+            earlier, same = Q(**{'{}__lte'.format(field): day}), Q(pk__in=[])
+
+    if index > source:
+        return earlier | same
+    elif index == source:
+        return earlier | (same & Q(id__lt=pk))
+    return earlier
+
+
+def _timestamp(moment):
+    """Returns the number of microseconds since the epoch (UTC)."""
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment, timezone.utc)
+    return calendar.timegm(moment.timetuple()) * 10 ** 6 + moment.microsecond
+
+
+def _from_timestamp(timestamp):
+    moment = datetime.utcfromtimestamp(timestamp // 10 ** 6).replace(
+        microsecond=timestamp % 10 ** 6)
+    return timezone.make_aware(moment, timezone.utc) if settings.USE_TZ \
+        else moment
+
+
+def _encode(key, source, negative_pk):
+    """Encodes the position of a merged item as a URL safe cursor."""
+    moment = _from_timestamp(-key)
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment, timezone.utc)
+    return '{}_{}_{}'.format(moment.strftime(CURSOR_DATE_FORMAT), source,
+        -negative_pk)
+
+
+def _decode(cursor):
+    """
+    Returns the (timestamp, source, id) position encoded by _encode(), or
+    None if the cursor is missing or malformed.
+    """
+    try:
+        moment, source, pk = cursor.split('_')
+        moment = datetime.strptime(moment, CURSOR_DATE_FORMAT)
+        return _timestamp(moment), int(source), int(pk)
+    except (AttributeError, ValueError):
+        return None